@@ -49,6 +49,8 @@ INSTALLED_APPS = [
     'corsheaders',
     'users',
     'places',
+    'outbox',
+    'jobs',
 ]
 
 
@@ -171,6 +173,7 @@ CORS_ALLOW_HEADERS = [
     "user-agent",
     "x-csrftoken",
     "x-requested-with",
+    "idempotency-key",
 ]
 
 # CSRF settings
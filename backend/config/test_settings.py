@@ -7,6 +7,13 @@ DATABASES = {
     }
 }
 
+# Point the suite at a Postgres server to exercise the Postgres-only constraints
+# and locking paths, e.g. TEST_DATABASE_URL=postgres://localhost/parkr_test
+if os.getenv('TEST_DATABASE_URL'):
+    DATABASES = {
+        'default': dj_database_url.parse(os.getenv('TEST_DATABASE_URL'))
+    }
+
 PASSWORD_HASHERS = [
     'django.contrib.auth.hashers.MD5PasswordHasher',
 ]
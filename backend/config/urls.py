@@ -21,4 +21,5 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('users.urls')),
     path('api/places/', include('places.urls')),
+    path('api/jobs/', include('jobs.urls')),
 ]
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = "Show background job queue depth and latency."
+
+    def handle(self, *args, **options):
+        stats = Job.get_stats()
+        for status, count in stats['by_status'].items():
+            self.stdout.write(f"{status}: {count}")
+        self.stdout.write(f"due now: {stats['due']} (oldest waiting {stats['oldest_due_seconds']:.1f}s)")
+        if stats['avg_wait_seconds'] is not None:
+            self.stdout.write(f"average wait over the last hour: {stats['avg_wait_seconds']:.1f}s")
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background jobs from the jobs table on one or more threads. Start "
+        "several processes to scale out; they claim work with SKIP LOCKED so no "
+        "job runs twice at once. Also keeps periodic tasks scheduled."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=1, help='Worker threads in this process')
+        parser.add_argument('--batch-size', type=int, default=1, help='Jobs claimed per thread at a time')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when no job is due')
+        parser.add_argument('--burst', action='store_true', help='Exit once no jobs are due')
+        parser.add_argument('--no-periodic', action='store_true', help='Do not schedule periodic tasks')
+
+    def handle(self, *args, **options):
+        if options['threads'] > 1 and connection.vendor == 'sqlite' \
+                and connection.settings_dict['NAME'] in (':memory:', ''):
+            raise CommandError("Threads cannot share an in-memory SQLite database")
+
+        worker = Worker(
+            threads=options['threads'],
+            batch_size=options['batch_size'],
+            interval=options['interval'],
+            burst=options['burst'],
+            periodic=not options['no_periodic'],
+        )
+        counts = worker.run()
+        self.stdout.write(f"succeeded: {counts['succeeded']}, failed: {counts['failed']}")
@@ -0,0 +1,217 @@
+from django.db import models, transaction, IntegrityError
+from django.db.models import Avg, Count, F, Min, Q
+from django.conf import settings
+from django.utils import timezone
+from datetime import datetime, timedelta, timezone as dt_timezone
+import logging
+
+from .registry import get_task, get_periodic_tasks
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class Job(models.Model):
+    """
+    A unit of background work. Workers claim due jobs, highest priority first,
+    with SELECT ... FOR UPDATE SKIP LOCKED and hold them under a lease; a job
+    whose worker dies becomes claimable again when the lease runs out.
+    Failed jobs are retried with exponential backoff up to max_attempts.
+    """
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    )
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    priority = models.SmallIntegerField(default=0)  # Higher runs first
+    run_at = models.DateTimeField(default=timezone.now)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    # At most one queued or running job may hold a given key, e.g. one
+    # pending run of each periodic task
+    unique_key = models.CharField(max_length=255, null=True, blank=True)
+    locked_by = models.CharField(max_length=255, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+            models.Index(fields=['status', 'locked_until'], name='job_status_locked_until_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['unique_key'],
+                condition=Q(status__in=['queued', 'running']),
+                name='unique_pending_job_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.get_status_display()})"
+
+    @classmethod
+    def enqueue(cls, task, priority=0, run_at=None, max_attempts=5, unique_key=None, **payload):
+        """
+        Queue a task. Call inside a transaction to queue it only if that
+        transaction commits. With unique_key, returns the already pending job
+        holding that key instead of queueing a duplicate.
+        """
+        if get_task(task) is None:
+            raise ValueError(f"Unknown task: {task}")
+
+        job = cls(task=task, payload=payload, priority=priority, run_at=run_at or timezone.now(),
+                  max_attempts=max_attempts, unique_key=unique_key)
+        if unique_key is None:
+            job.save()
+            return job
+
+        while True:
+            try:
+                with transaction.atomic():
+                    job.save()
+                return job
+            except IntegrityError:
+                existing = cls.objects.filter(unique_key=unique_key, status__in=['queued', 'running']).first()
+                if existing is not None:
+                    return existing
+                # The job holding the key finished in between; try again
+
+    @classmethod
+    def schedule_periodic(cls, now=None):
+        """
+        Make sure every periodic task has its next run queued, aligned to
+        multiples of its interval so all workers agree on the slot.
+        """
+        now = now or timezone.now()
+        for name, every in get_periodic_tasks().items():
+            interval = every.total_seconds()
+            slot = -(-(now - EPOCH).total_seconds() // interval) * interval
+            cls.enqueue(name, run_at=EPOCH + timedelta(seconds=slot), unique_key=f'periodic:{name}')
+
+    @classmethod
+    def claim(cls, worker, batch_size=1, now=None):
+        """
+        Claim up to batch_size due jobs for worker, including running jobs
+        whose lease has expired. Returns the claimed jobs, now running.
+        Expired jobs that have used up their attempts are failed instead, so
+        a job that keeps killing its worker is not retried forever.
+        """
+        now = now or timezone.now()
+        lease = timedelta(seconds=getattr(settings, 'JOBS_LEASE_SECONDS', 300))
+
+        with transaction.atomic():
+            cls.objects.filter(
+                status='running', locked_until__lt=now, attempts__gte=F('max_attempts')
+            ).update(status='failed', locked_until=None, finished_at=now,
+                     last_error="Lease expired after the final attempt")
+            ids = list(
+                cls.objects.select_for_update(skip_locked=True)
+                .filter(Q(status='queued', run_at__lte=now) | Q(status='running', locked_until__lt=now))
+                .order_by('-priority', 'run_at', 'id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return []
+            cls.objects.filter(id__in=ids).update(
+                status='running', locked_by=worker, locked_until=now + lease,
+                started_at=now, attempts=F('attempts') + 1
+            )
+
+        return list(cls.objects.filter(id__in=ids).order_by('-priority', 'run_at', 'id'))
+
+    def renew_lease(self, now=None):
+        """
+        Extend the lease on a claimed job, e.g. before running the later jobs
+        of a batch. Returns False if the job has been reclaimed elsewhere.
+        """
+        now = now or timezone.now()
+        locked_until = now + timedelta(seconds=getattr(settings, 'JOBS_LEASE_SECONDS', 300))
+        renewed = type(self).objects.filter(
+            pk=self.pk, status='running', locked_by=self.locked_by, attempts=self.attempts
+        ).update(locked_until=locked_until)
+        if renewed:
+            self.locked_until = locked_until
+        return bool(renewed)
+
+    @staticmethod
+    def get_backoff(attempts):
+        """Delay before retrying a job that has failed attempts times"""
+        base = getattr(settings, 'JOBS_RETRY_BASE_SECONDS', 10)
+        cap = getattr(settings, 'JOBS_RETRY_MAX_SECONDS', 3600)
+        return timedelta(seconds=min(base * 2 ** (attempts - 1), cap))
+
+    def run(self):
+        """
+        Run a claimed job and record the outcome. Only the worker still holding
+        the lease records it, so a job that outlived its lease and was picked
+        up elsewhere is not marked twice.
+        Returns True if the task succeeded
+        """
+        func = get_task(self.task)
+        try:
+            if func is None:
+                raise LookupError(f"Unknown task: {self.task}")
+            func(**self.payload)
+        except Exception as e:
+            logger.warning(f"Job {self.pk} ({self.task}) failed: {e}", exc_info=True)
+            now = timezone.now()
+            if self.attempts >= self.max_attempts:
+                changes = {'status': 'failed', 'finished_at': now}
+            else:
+                changes = {'status': 'queued', 'run_at': now + self.get_backoff(self.attempts)}
+            self._finish(last_error=f"{type(e).__name__}: {e}", **changes)
+            return False
+
+        self._finish(status='succeeded', finished_at=timezone.now(), last_error='')
+        return True
+
+    def _finish(self, **changes):
+        updated = type(self).objects.filter(
+            pk=self.pk, status='running', locked_by=self.locked_by, attempts=self.attempts
+        ).update(locked_until=None, **changes)
+        if not updated:
+            logger.warning(f"Job {self.pk} ({self.task}) lost its lease before finishing")
+        for field, value in changes.items():
+            setattr(self, field, value)
+
+    @classmethod
+    def get_stats(cls, now=None, window=timedelta(hours=1)):
+        """
+        Queue depth and latency: jobs per status, how many are due now, how
+        long the oldest due job has waited, and the average wait between
+        run_at and start for jobs started within window.
+        """
+        now = now or timezone.now()
+        by_status = dict(cls.objects.values_list('status').annotate(count=Count('id')).order_by())
+        due = cls.objects.filter(status='queued', run_at__lte=now).aggregate(count=Count('id'), oldest=Min('run_at'))
+        recent = cls.objects.filter(started_at__gte=now - window).aggregate(wait=Avg(F('started_at') - F('run_at')))
+
+        wait = recent['wait']
+        if wait is not None and not isinstance(wait, timedelta):
+            # SQLite returns the average duration in microseconds
+            wait = timedelta(microseconds=wait)
+
+        return {
+            'by_status': {status: by_status.get(status, 0) for status, _ in cls.STATUS_CHOICES},
+            'due': due['count'],
+            'oldest_due_seconds': (now - due['oldest']).total_seconds() if due['oldest'] else 0,
+            'avg_wait_seconds': wait.total_seconds() if wait is not None else None,
+        }
+
+    @classmethod
+    def purge_finished(cls, older_than):
+        """Delete succeeded and failed jobs that finished more than older_than ago"""
+        deleted, _ = cls.objects.filter(
+            status__in=['succeeded', 'failed'], finished_at__lte=timezone.now() - older_than
+        ).delete()
+        return deleted
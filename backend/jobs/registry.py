@@ -0,0 +1,33 @@
+"""
+Task registry. A task is a function taking a job's JSON payload as keyword
+arguments; register it under a name with @task, then queue it with
+Job.enqueue(name, **payload).
+"""
+from datetime import timedelta
+
+_tasks = {}
+_periodic = {}
+
+
+def task(name, every=None):
+    """
+    Register the decorated function as the task called name. With every (a
+    timedelta), workers also keep one run of it scheduled at each multiple of
+    that interval.
+    """
+    def register(func):
+        _tasks[name] = func
+        if every is not None:
+            if every < timedelta(seconds=1):
+                raise ValueError("Periodic tasks must run at most once a second")
+            _periodic[name] = every
+        return func
+    return register
+
+
+def get_task(name):
+    return _tasks.get(name)
+
+
+def get_periodic_tasks():
+    return dict(_periodic)
@@ -0,0 +1,81 @@
+"""
+Built-in tasks. The periodic ones replace running the equivalent management
+commands from cron when a run_jobs worker is deployed.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+
+from .registry import task
+
+
+@task('bookings.transition', every=timedelta(minutes=5))
+def transition_bookings():
+    from places.booking.models import Booking
+
+    Booking.complete_finished()
+    Booking.expire_pending(timedelta(hours=getattr(settings, 'PENDING_BOOKING_EXPIRY_HOURS', 24)))
+
+
+@task('outbox.drain', every=timedelta(minutes=1))
+def drain_outbox():
+    from outbox.models import OutboxEvent
+
+    OutboxEvent.drain()
+
+
+@task('idempotency.purge', every=timedelta(hours=1))
+def purge_idempotency_keys():
+    from places.idempotency.models import IdempotencyKey
+
+    IdempotencyKey.purge_expired()
+
+
+@task('jobs.purge', every=timedelta(days=1))
+def purge_finished_jobs():
+    from .models import Job
+
+    Job.purge_finished(timedelta(days=getattr(settings, 'JOBS_RETENTION_DAYS', 7)))
+
+
+@task('calendar.sync_imports', every=timedelta(minutes=15))
+def sync_calendar_imports():
+    from places.calendar_feed.models import CalendarImport
+    from .models import Job
+
+    for import_id in CalendarImport.objects.exclude(url='').values_list('id', flat=True).iterator():
+        Job.enqueue('calendar.sync_import', unique_key=f'calendar-import:{import_id}', import_id=import_id)
+
+
+@task('calendar.sync_import')
+def sync_calendar_import(import_id):
+    from places.calendar_feed.models import CalendarImport
+
+    calendar_import = CalendarImport.objects.select_related('place').filter(pk=import_id).first()
+    if calendar_import is not None:
+        calendar_import.fetch_and_sync()
+
+
+@task('blocked_periods.compact', every=timedelta(days=1))
+def compact_blocked_periods():
+    from django.utils import timezone
+    from places.blocked_period.models import BlockedPeriod
+
+    BlockedPeriod.purge_ended(timezone.now() - timedelta(days=getattr(settings, 'BLOCKED_PERIOD_RETENTION_DAYS', 90)))
+    BlockedPeriod.compact()
+
+
+@task('place_images.generate_variants')
+def generate_image_variants(image_ids):
+    from places.place_image.models import PlaceImage
+
+    PlaceImage.generate_variants_for(image_ids)
+
+
+@task('storage.delete_keys')
+def delete_storage_keys(keys):
+    from places.s3_service import s3_service
+
+    failed = s3_service.delete_files(keys)
+    if failed:
+        raise RuntimeError(f"Could not delete {len(failed)} of {len(keys)} files from S3")
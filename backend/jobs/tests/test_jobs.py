@@ -0,0 +1,199 @@
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from jobs import registry
+from jobs.models import Job
+from jobs.worker import Worker
+from places.tests.conftest import requires_postgres
+
+User = get_user_model()
+
+calls = []
+calls_lock = threading.Lock()
+
+
+def record(**payload):
+    with calls_lock:
+        calls.append(payload)
+
+
+def explode(**payload):
+    raise ValueError('boom')
+
+
+@pytest.fixture(autouse=True)
+def test_tasks():
+    calls.clear()
+    with patch.dict(registry._tasks, {'test.record': record, 'test.explode': explode}), \
+            patch.dict(registry._periodic, clear=True):
+        yield
+
+
+@pytest.mark.django_db
+class TestJobQueue:
+    def test_runs_by_priority_then_due_time(self):
+        now = timezone.now()
+        Job.enqueue('test.record', n=1, run_at=now - timedelta(minutes=2))
+        Job.enqueue('test.record', n=2, run_at=now - timedelta(minutes=1), priority=5)
+        Job.enqueue('test.record', n=3, run_at=now + timedelta(hours=1))
+
+        Worker(burst=True).run()
+
+        assert calls == [{'n': 2}, {'n': 1}]
+        assert Job.objects.get(payload__n=3).status == 'queued'
+
+    def test_unknown_task_is_rejected(self):
+        with pytest.raises(ValueError):
+            Job.enqueue('test.missing')
+
+    def test_failures_retry_with_backoff_then_fail(self):
+        job = Job.enqueue('test.explode', max_attempts=2)
+
+        [claimed] = Job.claim('w')
+        assert claimed.run() is False
+        job.refresh_from_db()
+        assert (job.status, job.attempts) == ('queued', 1)
+        assert job.run_at > timezone.now()
+        assert 'boom' in job.last_error
+
+        [claimed] = Job.claim('w', now=job.run_at)
+        claimed.run()
+        job.refresh_from_db()
+        assert (job.status, job.attempts) == ('failed', 2)
+
+    def test_expired_lease_is_reclaimed(self):
+        Job.enqueue('test.record')
+        [first] = Job.claim('w1')
+
+        assert Job.claim('w2') == []
+        [second] = Job.claim('w2', now=timezone.now() + timedelta(hours=1))
+
+        assert second.pk == first.pk
+        assert second.run() is True
+        # The original worker no longer holds the lease, so cannot mark it again
+        first.run()
+        assert Job.objects.get().attempts == 2
+
+    def test_expired_lease_on_final_attempt_fails_the_job(self):
+        Job.enqueue('test.record', max_attempts=1)
+        Job.claim('w1')
+
+        assert Job.claim('w2', now=timezone.now() + timedelta(hours=1)) == []
+
+        job = Job.objects.get()
+        assert job.status == 'failed'
+        assert job.attempts == 1
+        assert job.locked_until is None
+        assert 'final attempt' in job.last_error
+
+    def test_unique_key_dedupes_pending_jobs(self):
+        first = Job.enqueue('test.record', unique_key='k')
+        assert Job.enqueue('test.record', unique_key='k').pk == first.pk
+
+        Worker(burst=True).run()
+
+        assert Job.enqueue('test.record', unique_key='k').pk != first.pk
+
+    def test_unique_key_retries_when_the_holder_finishes(self):
+        original = Job.save
+        attempts = []
+
+        def save(job, *args, **kwargs):
+            attempts.append(job)
+            if len(attempts) == 1:
+                # Another job held the key, then finished before the lookup
+                raise IntegrityError('unique_pending_job_key')
+            return original(job, *args, **kwargs)
+
+        with patch.object(Job, 'save', save):
+            job = Job.enqueue('test.record', unique_key='k')
+
+        assert len(attempts) == 2
+        assert Job.objects.get().pk == job.pk
+
+    def test_batch_skips_jobs_reclaimed_elsewhere(self):
+        Job.enqueue('test.record', n=1)
+        Job.enqueue('test.record', n=2)
+        first, second = Job.claim('w1', batch_size=2)
+
+        [reclaimed] = Job.claim('w2', now=timezone.now() + timedelta(hours=1))
+
+        assert reclaimed.pk == first.pk
+        assert first.renew_lease() is False
+        assert second.renew_lease() is True
+        assert Job.objects.get(pk=second.pk).locked_until == second.locked_until
+
+    def test_worker_schedules_periodic_tasks_once_a_minute(self):
+        for n in range(3):
+            Job.enqueue('test.record', n=n)
+
+        with patch.object(Job, 'schedule_periodic') as schedule_periodic:
+            Worker(burst=True).run()
+
+        assert len(calls) == 3
+        assert schedule_periodic.call_count == 1
+
+    def test_periodic_jobs_are_scheduled_once_per_slot(self):
+        registry._periodic['test.record'] = timedelta(minutes=5)
+        now = datetime(2030, 1, 7, 9, 2, tzinfo=dt_timezone.utc)
+
+        Job.schedule_periodic(now)
+        Job.schedule_periodic(now)
+
+        job = Job.objects.get()
+        assert job.run_at == datetime(2030, 1, 7, 9, 5, tzinfo=dt_timezone.utc)
+        assert job.unique_key == 'periodic:test.record'
+
+    def test_stats(self):
+        now = timezone.now()
+        Job.enqueue('test.record', run_at=now - timedelta(seconds=30))
+        Job.enqueue('test.record', run_at=now + timedelta(hours=1))
+
+        stats = Job.get_stats(now=now)
+
+        assert stats['by_status']['queued'] == 2
+        assert stats['due'] == 1
+        assert stats['oldest_due_seconds'] == pytest.approx(30)
+
+        Job.claim('w', now=now)
+        assert Job.get_stats(now=now)['avg_wait_seconds'] == pytest.approx(30)
+
+    def test_stats_endpoint_is_staff_only(self):
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(email='a@example.com', password='x'))
+        assert client.get(reverse('job-stats')).status_code == 403
+
+        client.force_authenticate(user=User.objects.create_user(email='b@example.com', password='x', is_staff=True))
+        assert client.get(reverse('job-stats')).json()['due'] == 0
+
+
+@pytest.mark.django_db
+def test_run_jobs_command():
+    Job.enqueue('test.record')
+    Job.enqueue('test.explode')
+    out = StringIO()
+
+    call_command('run_jobs', '--burst', '--no-periodic', stdout=out)
+
+    assert 'succeeded: 1, failed: 1' in out.getvalue()
+
+
+@requires_postgres
+@pytest.mark.django_db(transaction=True)
+def test_threads_never_run_a_job_twice():
+    Job.objects.bulk_create([Job(task='test.record', payload={'n': n}) for n in range(200)])
+
+    counts = Worker(threads=8, batch_size=5, burst=True, periodic=False).run()
+
+    assert counts == {'succeeded': 200, 'failed': 0}
+    assert sorted(call['n'] for call in calls) == list(range(200))
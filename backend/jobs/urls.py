@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('stats/', views.job_stats, name='job-stats'),
+]
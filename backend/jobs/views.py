@@ -0,0 +1,11 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+
+from .models import Job
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def job_stats(request):
+    """Queue depth and latency of the background job queue, for staff"""
+    return Response(Job.get_stats())
@@ -0,0 +1,92 @@
+import logging
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """
+    Runs queued jobs on a number of threads until stopped. Start as many
+    worker processes as needed; they coordinate only through the jobs table.
+    """
+
+    def __init__(self, threads=1, batch_size=1, interval=1.0, burst=False, periodic=True):
+        self.threads = threads
+        self.batch_size = batch_size
+        self.interval = interval
+        self.burst = burst
+        self.periodic = periodic
+        # Periodic tasks are (re)queued at most once per interval, not on every poll
+        self.next_schedule_at = 0.0
+        self.stopping = threading.Event()
+        self.counts = {'succeeded': 0, 'failed': 0}
+        self._lock = threading.Lock()
+
+    def run(self):
+        """Run until stop() is called, or in burst mode until no jobs are due"""
+        if self.threads == 1:
+            try:
+                self._loop(0)
+            except KeyboardInterrupt:
+                pass
+            return self.counts
+
+        workers = [
+            threading.Thread(target=self._thread, args=(index,), name=f'jobs-worker-{index}', daemon=True)
+            for index in range(self.threads)
+        ]
+        for thread in workers:
+            thread.start()
+        try:
+            for thread in workers:
+                while thread.is_alive():
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.stop()
+            for thread in workers:
+                thread.join()
+        return self.counts
+
+    def stop(self):
+        self.stopping.set()
+
+    def _thread(self, index):
+        try:
+            self._loop(index, recycle_connections=True)
+        except Exception:
+            logger.exception(f"Job worker thread {index} crashed")
+        finally:
+            connection.close()
+
+    def _loop(self, index, recycle_connections=False):
+        name = f"{socket.gethostname()}:{os.getpid()}:{index}"
+        while not self.stopping.is_set():
+            if recycle_connections:
+                close_old_connections()
+            if self.periodic and index == 0 and time.monotonic() >= self.next_schedule_at:
+                Job.schedule_periodic()
+                self.next_schedule_at = time.monotonic() + getattr(settings, 'JOBS_SCHEDULE_INTERVAL_SECONDS', 60)
+
+            jobs = Job.claim(name, batch_size=self.batch_size)
+            if not jobs:
+                if self.burst:
+                    break
+                self.stopping.wait(self.interval)
+                continue
+
+            for position, job in enumerate(jobs):
+                # Earlier jobs in the batch may have used up much of the lease
+                if position and not job.renew_lease():
+                    logger.warning(f"Job {job.pk} ({job.task}) was reclaimed before it could run")
+                    continue
+                succeeded = job.run()
+                with self._lock:
+                    self.counts['succeeded' if succeeded else 'failed'] += 1
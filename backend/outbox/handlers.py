@@ -0,0 +1,48 @@
+"""
+Handlers that carry out outbox events, keyed by topic. Each receives the
+event's payload. Topics with no handler (e.g. booking events, kept for
+future webhooks) are marked sent without doing anything.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def handler(*topics):
+    """Register the decorated function as the handler for the given topics"""
+    def register(func):
+        for topic in topics:
+            _handlers[topic] = func
+        return func
+    return register
+
+
+def get_handler(topic):
+    return _handlers.get(topic)
+
+
+@handler('user.registered', 'user.verification_requested')
+def send_verification(payload):
+    from users.models import VerificationToken
+    from users.util.email import send_verification_email
+
+    token = VerificationToken.objects.select_related('user').filter(token=payload['token']).first()
+    if token is None:
+        # Already used or replaced by a newer token
+        logger.info(f"Skipping verification email for user {payload['user_id']}: token no longer exists")
+        return
+    send_verification_email(token.user, token)
+
+
+@handler('user.password_reset_requested')
+def send_password_reset(payload):
+    from users.models import PasswordResetToken
+    from users.util.email import send_forgot_password_email
+
+    token = PasswordResetToken.objects.select_related('user').filter(token=payload['token']).first()
+    if token is None:
+        logger.info(f"Skipping password reset email for user {payload['user_id']}: token no longer exists")
+        return
+    send_forgot_password_email(token.user, payload['uidb64'], token.token)
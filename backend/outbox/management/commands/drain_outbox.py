@@ -0,0 +1,42 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from outbox.models import OutboxEvent
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver pending outbox events (emails and other side effects) in batches, "
+        "retrying failures with exponential backoff. Runs once by default; pass "
+        "--loop to keep polling as a long-running worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Events claimed per batch')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new events')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to sleep when idle with --loop')
+        parser.add_argument('--purge-sent-days', type=float, default=None,
+                            help='Also delete events sent more than this many days ago')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            counts = OutboxEvent.drain(batch_size=options['batch_size'])
+            elapsed = time.perf_counter() - started
+
+            if any(counts.values()) or not options['loop']:
+                self.stdout.write(
+                    f"sent: {counts['sent']}, retried: {counts['retried']}, failed: {counts['failed']} "
+                    f"in {elapsed:.2f}s"
+                )
+
+            if options['purge_sent_days'] is not None:
+                purged = OutboxEvent.purge_sent(timedelta(days=options['purge_sent_days']))
+                if purged:
+                    self.stdout.write(f"purged: {purged} sent event(s)")
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,138 @@
+from django.db import models, transaction
+from django.db.models import F
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxEvent(models.Model):
+    """
+    A side effect (email, webhook, ...) recorded in the same transaction as the
+    change that caused it, and carried out later by the drain_outbox worker.
+    If the transaction rolls back the event never existed; once it commits the
+    event is delivered at least once, so handlers must tolerate repeats.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    # When the event may next be claimed: now for new events, later for
+    # retries and for events a worker is currently handling
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='outbox_status_available_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.pk} ({self.get_status_display()})"
+
+    @classmethod
+    def publish(cls, topic, **payload):
+        """
+        Record an event. Call inside the transaction that makes the change the
+        event describes; payload must be JSON serializable.
+        """
+        return cls.objects.create(topic=topic, payload=payload)
+
+    @classmethod
+    def publish_many(cls, topic, payloads):
+        """Record one event per payload with a single insert"""
+        return cls.objects.bulk_create([cls(topic=topic, payload=payload) for payload in payloads])
+
+    @staticmethod
+    def get_backoff(attempts):
+        """Delay before retrying an event that has failed attempts times"""
+        base = getattr(settings, 'OUTBOX_RETRY_BASE_SECONDS', 30)
+        cap = getattr(settings, 'OUTBOX_RETRY_MAX_SECONDS', 3600)
+        return timedelta(seconds=min(base * 2 ** (attempts - 1), cap))
+
+    @classmethod
+    def claim_batch(cls, batch_size=100, now=None):
+        """
+        Claim up to batch_size due events for this worker. Claimed events are
+        hidden from other workers for OUTBOX_LEASE_SECONDS; if this worker dies
+        they become due again after that and are retried.
+        """
+        now = now or timezone.now()
+        lease = timedelta(seconds=getattr(settings, 'OUTBOX_LEASE_SECONDS', 300))
+
+        with transaction.atomic():
+            ids = list(
+                cls.objects.select_for_update(skip_locked=True)
+                .filter(status='pending', available_at__lte=now)
+                .order_by('available_at', 'id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return []
+            cls.objects.filter(id__in=ids).update(available_at=now + lease, attempts=F('attempts') + 1)
+
+        return list(cls.objects.filter(id__in=ids).order_by('available_at', 'id'))
+
+    def mark_sent(self):
+        self.status = 'sent'
+        self.sent_at = timezone.now()
+        self.last_error = ''
+        self.save(update_fields=['status', 'sent_at', 'last_error'])
+
+    def mark_failed(self, error):
+        """Schedule a retry with exponential backoff, or give up after OUTBOX_MAX_ATTEMPTS"""
+        self.last_error = error
+        if self.attempts >= getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 8):
+            self.status = 'failed'
+        else:
+            self.available_at = timezone.now() + self.get_backoff(self.attempts)
+        self.save(update_fields=['status', 'available_at', 'last_error'])
+
+    @classmethod
+    def drain(cls, batch_size=100, max_batches=None):
+        """
+        Deliver due events until none are left (or max_batches have been run).
+
+        Returns:
+            dict with the number of events 'sent', 'retried' and 'failed'
+        """
+        from .handlers import get_handler
+
+        counts = {'sent': 0, 'retried': 0, 'failed': 0}
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            events = cls.claim_batch(batch_size)
+            if not events:
+                break
+            batches += 1
+
+            for event in events:
+                handler = get_handler(event.topic)
+                try:
+                    if handler is not None:
+                        handler(event.payload)
+                except Exception as e:
+                    logger.warning(f"Outbox event {event.pk} ({event.topic}) failed: {e}", exc_info=True)
+                    event.mark_failed(f"{type(e).__name__}: {e}")
+                    counts['failed' if event.status == 'failed' else 'retried'] += 1
+                else:
+                    event.mark_sent()
+                    counts['sent'] += 1
+
+        return counts
+
+    @classmethod
+    def purge_sent(cls, older_than):
+        """Delete events delivered more than older_than ago. Returns the number deleted"""
+        deleted, _ = cls.objects.filter(status='sent', sent_at__lte=timezone.now() - older_than).delete()
+        return deleted
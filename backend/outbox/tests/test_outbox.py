@@ -0,0 +1,121 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import transaction
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from outbox import handlers
+from outbox.models import OutboxEvent
+from users.models import VerificationToken
+
+User = get_user_model()
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(email='driver@example.com', password='password123')
+
+
+@pytest.fixture
+def failing_handler():
+    calls = []
+
+    def fail(payload):
+        calls.append(payload)
+        raise ConnectionError('mail server down')
+
+    with patch.dict(handlers._handlers, {'test.fails': fail}):
+        yield calls
+
+
+@pytest.mark.django_db
+class TestOutbox:
+    def test_event_is_discarded_with_its_transaction(self, user):
+        with pytest.raises(RuntimeError), transaction.atomic():
+            OutboxEvent.publish('user.registered', user_id=user.id, token='x')
+            raise RuntimeError
+
+        assert not OutboxEvent.objects.exists()
+
+    def test_registration_email_is_sent_by_the_worker(self):
+        response = APIClient().post(reverse('register'), {
+            'email': 'new@example.com', 'password': 'StrongPassword123!', 'first_name': 'New', 'last_name': 'User'
+        }, format='json')
+
+        assert response.status_code == 201
+        assert len(mail.outbox) == 0
+
+        assert OutboxEvent.drain() == {'sent': 1, 'retried': 0, 'failed': 0}
+        assert mail.outbox[0].to == ['new@example.com']
+        assert OutboxEvent.objects.get().status == 'sent'
+
+    def test_used_token_is_skipped(self, user):
+        token = VerificationToken.objects.create(user=user)
+        OutboxEvent.publish('user.registered', user_id=user.id, token=str(token.token))
+        token.delete()
+
+        assert OutboxEvent.drain()['sent'] == 1
+        assert len(mail.outbox) == 0
+
+    def test_failures_back_off_then_give_up(self, failing_handler, settings):
+        settings.OUTBOX_MAX_ATTEMPTS = 2
+        event = OutboxEvent.publish('test.fails', n=1)
+
+        assert OutboxEvent.drain() == {'sent': 0, 'retried': 1, 'failed': 0}
+        event.refresh_from_db()
+        assert event.status == 'pending'
+        assert event.available_at > timezone.now() + timedelta(seconds=20)
+        assert 'mail server down' in event.last_error
+
+        # Not due yet
+        assert OutboxEvent.drain() == {'sent': 0, 'retried': 0, 'failed': 0}
+
+        OutboxEvent.objects.update(available_at=timezone.now())
+        assert OutboxEvent.drain() == {'sent': 0, 'retried': 0, 'failed': 1}
+        assert OutboxEvent.objects.get().status == 'failed'
+        assert len(failing_handler) == 2
+
+    def test_backoff_is_exponential_and_capped(self):
+        with override_settings(OUTBOX_RETRY_BASE_SECONDS=10, OUTBOX_RETRY_MAX_SECONDS=60):
+            delays = [OutboxEvent.get_backoff(attempts).total_seconds() for attempts in range(1, 6)]
+
+        assert delays == [10, 20, 40, 60, 60]
+
+    def test_claimed_events_are_hidden_until_lease_expires(self, user):
+        OutboxEvent.publish('booking.created', booking_id=1)
+
+        assert len(OutboxEvent.claim_batch()) == 1
+        assert OutboxEvent.claim_batch() == []
+        assert len(OutboxEvent.claim_batch(now=timezone.now() + timedelta(hours=1))) == 1
+
+    def test_booking_events_are_recorded(self, user):
+        from places.place.models import Place
+
+        place = Place.objects.create(owner=user, name='Driveway', address='1 Main St', city='Springfield',
+                                     state='IL', zip_code='62701', price_per_hour='5.00')
+        start = timezone.now() + timedelta(days=3)
+        booking, _, _ = place.create_booking(user, start, start + timedelta(hours=1))
+        booking.cancel()
+
+        assert list(OutboxEvent.objects.order_by('id').values_list('topic', 'payload')) == [
+            ('booking.created', {'booking_id': booking.id, 'place_id': place.id, 'user_id': user.id}),
+            ('booking.cancelled', {'booking_id': booking.id, 'place_id': place.id, 'user_id': user.id}),
+        ]
+
+
+@pytest.mark.django_db
+def test_drain_command_reports_counts(user):
+    OutboxEvent.publish('booking.created', booking_id=1)
+    out = StringIO()
+
+    call_command('drain_outbox', stdout=out)
+
+    assert 'sent: 1, retried: 0, failed: 0' in out.getvalue()
@@ -0,0 +1,130 @@
+from django.db import models, connection, transaction
+from django.utils import timezone
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from places.pricing.engine import to_cents
+
+
+class BookingRollup(models.Model):
+    """
+    Booked time and revenue per place per calendar day, kept current as
+    bookings are created and cancelled so host analytics never scan bookings.
+    A booking spanning midnight is split across the days it covers, its
+    revenue pro rata by time; it counts towards bookings_count on its first day.
+    """
+    place = models.ForeignKey('places.Place', on_delete=models.CASCADE, related_name='booking_rollups')
+    day = models.DateField()
+    booked_minutes = models.IntegerField(default=0)
+    revenue_cents = models.BigIntegerField(default=0)
+    bookings_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['place', 'day'], name='unique_booking_rollup_per_place_day'),
+        ]
+        app_label = 'places'
+
+    def __str__(self):
+        return f"Place {self.place_id} on {self.day}"
+
+    @staticmethod
+    def _contributions(bookings, sign=1, totals=None):
+        """
+        Split bookings into per-day amounts, accumulated into totals, a dict of
+        (place_id, day) -> [minutes, cents, count]
+        """
+        if totals is None:
+            totals = defaultdict(lambda: [0, 0, 0])
+
+        for booking in bookings:
+            start = timezone.localtime(booking.start_time)
+            end = timezone.localtime(booking.end_time)
+            total_seconds = int((end - start).total_seconds())
+            if total_seconds <= 0:
+                continue
+
+            cents = to_cents(booking.total_price)
+            allocated = 0
+            cursor = start
+            first = True
+            while cursor < end:
+                next_day = cursor.date() + timedelta(days=1)
+                midnight = timezone.make_aware(datetime.combine(next_day, time.min))
+                segment_end = min(end, midnight)
+                seconds = int((segment_end - cursor).total_seconds())
+
+                if segment_end >= end:
+                    share = cents - allocated
+                else:
+                    share = cents * seconds // total_seconds
+                allocated += share
+
+                row = totals[(booking.place_id, cursor.date())]
+                row[0] += sign * (seconds // 60)
+                row[1] += sign * share
+                row[2] += sign * int(first)
+
+                first = False
+                cursor = segment_end
+
+        return totals
+
+    @classmethod
+    def record(cls, bookings, sign=1):
+        """
+        Add bookings to (sign=1) or remove them from (sign=-1) the rollups with
+        a single INSERT ... ON CONFLICT DO UPDATE, which both SQLite and
+        Postgres support, so concurrent writers never lose an increment.
+        """
+        totals = cls._contributions(bookings, sign)
+        if not totals:
+            return
+
+        table = connection.ops.quote_name(cls._meta.db_table)
+        rows = [(place_id, day, *values) for (place_id, day), values in totals.items()]
+        placeholders = ', '.join(['(%s, %s, %s, %s, %s)'] * len(rows))
+        sql = (
+            f"INSERT INTO {table} (place_id, day, booked_minutes, revenue_cents, bookings_count) "
+            f"VALUES {placeholders} "
+            f"ON CONFLICT (place_id, day) DO UPDATE SET "
+            f"booked_minutes = {table}.booked_minutes + EXCLUDED.booked_minutes, "
+            f"revenue_cents = {table}.revenue_cents + EXCLUDED.revenue_cents, "
+            f"bookings_count = {table}.bookings_count + EXCLUDED.bookings_count"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [value for row in rows for value in row])
+
+    @classmethod
+    def rebuild(cls, place_ids=None, chunk_size=2000):
+        """
+        Recompute rollups from the bookings table, for all places or only the
+        given ones. Runs in one transaction so readers never see partial data.
+
+        Returns:
+            (bookings_scanned, rollup_rows_written)
+        """
+        from places.booking.models import Booking
+
+        bookings = Booking.objects.filter(status__in=Booking.REVENUE_STATUSES).only(
+            'place_id', 'start_time', 'end_time', 'total_price'
+        ).order_by()
+        rollups = cls.objects.all()
+        if place_ids is not None:
+            bookings = bookings.filter(place_id__in=place_ids)
+            rollups = rollups.filter(place_id__in=place_ids)
+
+        totals = defaultdict(lambda: [0, 0, 0])
+        scanned = 0
+        with transaction.atomic():
+            for booking in bookings.iterator(chunk_size=chunk_size):
+                cls._contributions([booking], totals=totals)
+                scanned += 1
+
+            rollups.delete()
+            cls.objects.bulk_create([
+                cls(place_id=place_id, day=day, booked_minutes=minutes, revenue_cents=cents, bookings_count=count)
+                for (place_id, day), (minutes, cents, count) in totals.items()
+            ], batch_size=chunk_size)
+
+        return scanned, len(totals)
@@ -0,0 +1,77 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from django.db.models import F, Sum
+from django.db.models.functions import TruncWeek
+from datetime import date, timedelta
+import logging
+
+from .models import BookingRollup
+from places.pricing.engine import from_cents
+
+logger = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def host_analytics(request):
+    """
+    Occupancy and revenue for the current user's listings, per listing per day
+    or week, between the start and end dates (inclusive). Optionally limited
+    to one listing with place_id.
+    """
+    group = request.query_params.get('group', 'day')
+    if group not in ('day', 'week'):
+        return Response({'error': 'group must be day or week'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        start = date.fromisoformat(request.query_params.get('start', ''))
+        end = date.fromisoformat(request.query_params.get('end', ''))
+    except ValueError:
+        return Response(
+            {'error': 'start and end are required, as YYYY-MM-DD'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    max_days = getattr(settings, 'HOST_ANALYTICS_MAX_DAYS', 366)
+    if end < start or (end - start).days >= max_days:
+        return Response(
+            {'error': f'end must be on or after start and at most {max_days} days later'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    rollups = BookingRollup.objects.filter(place__owner=request.user, day__range=(start, end))
+    
+    place_id = request.query_params.get('place_id')
+    if place_id:
+        try:
+            rollups = rollups.filter(place_id=int(place_id))
+        except ValueError:
+            return Response({'error': 'place_id must be a listing ID'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    period = TruncWeek('day') if group == 'week' else F('day')
+    rows = rollups.annotate(period=period).values('place_id', 'period').annotate(
+        booked_minutes=Sum('booked_minutes'),
+        revenue_cents=Sum('revenue_cents'),
+        bookings_count=Sum('bookings_count'),
+    ).order_by('place_id', 'period')
+    
+    results = []
+    for row in rows:
+        period_start = row['period']
+        period_end = period_start + timedelta(days=6 if group == 'week' else 0)
+        # Occupancy is measured over the part of the period inside the range
+        days = (min(period_end, end) - max(period_start, start)).days + 1
+        results.append({
+            'place_id': row['place_id'],
+            'period': period_start,
+            'booked_minutes': row['booked_minutes'],
+            'revenue': str(from_cents(row['revenue_cents'])),
+            'bookings_count': row['bookings_count'],
+            'occupancy': round(row['booked_minutes'] / (days * MINUTES_PER_DAY), 4),
+        })
+    
+    return Response({'start': start, 'end': end, 'group': group, 'results': results})
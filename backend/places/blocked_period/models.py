@@ -1,8 +1,11 @@
 from django.db import models
 from django.core.exceptions import ValidationError
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 
+from django.contrib.postgres.fields import DateTimeRangeField
+from places.util.range_utils import Overlaps, PeriodRange
+
 logger = logging.getLogger(__name__)
 
 class BlockedPeriod(models.Model):
@@ -14,6 +17,7 @@ class BlockedPeriod(models.Model):
         ('owner-block', 'Owner Block'),
         ('maintenance', 'Maintenance'),
         ('booking', 'Booking'),
+        ('external', 'External Calendar'),
     )
     
     RECURRING_PATTERNS = (
@@ -26,12 +30,21 @@ class BlockedPeriod(models.Model):
     place = models.ForeignKey('places.Place', on_delete=models.CASCADE, related_name='blocked_periods')
     start_datetime = models.DateTimeField()
     end_datetime = models.DateTimeField()
+    # Kept by the database; indexed with place for Overlaps on Postgres
+    period = models.GeneratedField(expression=PeriodRange('start_datetime', 'end_datetime'),
+                                   output_field=DateTimeRangeField(), db_persist=True)
     block_type = models.CharField(max_length=20, choices=BLOCK_TYPES)
     reason = models.CharField(max_length=255, blank=True)
     
     # If this is a booking, reference the booking
     booking = models.OneToOneField('places.Booking', on_delete=models.CASCADE, null=True, blank=True, related_name='blocked_period')
     
+    # If this comes from an external calendar, the import and the event's UID/SEQUENCE
+    calendar_import = models.ForeignKey('places.CalendarImport', on_delete=models.CASCADE, null=True, blank=True,
+                                        related_name='blocked_periods')
+    external_uid = models.CharField(max_length=255, blank=True)
+    external_sequence = models.IntegerField(default=0)
+    
     # For recurring blocks
     is_recurring = models.BooleanField(default=False)
     recurring_pattern = models.CharField(max_length=20, choices=RECURRING_PATTERNS, null=True, blank=True)
@@ -44,6 +57,16 @@ class BlockedPeriod(models.Model):
         indexes = [
             models.Index(fields=['place', 'start_datetime']),
             models.Index(fields=['place', 'end_datetime']),
+            # Recurring blocks are fetched alongside the overlapping ones
+            models.Index(fields=['place'], condition=models.Q(is_recurring=True),
+                         name='blocked_period_recurring_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['calendar_import', 'external_uid'],
+                condition=models.Q(calendar_import__isnull=False),
+                name='unique_external_uid_per_import',
+            ),
         ]
         app_label = 'places'
     
@@ -62,6 +85,22 @@ class BlockedPeriod(models.Model):
     def save(self, *args, **kwargs):
         self.clean()
         super().save(*args, **kwargs)
+        self.touch_calendars([self.place_id])
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.touch_calendars([self.place_id])
+        return result
+    
+    @staticmethod
+    def touch_calendars(place_ids):
+        """
+        Bump the calendar version of the given places. Writes that bypass
+        save() and delete() (queryset updates, deletes and bulk inserts) must
+        call this themselves.
+        """
+        from places.place.models import Place
+        Place.bump_calendar_version(place_ids)
     
     def is_booking_block(self):
         """Check if this is a booking-related block"""
@@ -82,36 +121,100 @@ class BlockedPeriod(models.Model):
         return (self.start_datetime <= start_datetime and 
                 self.end_datetime >= end_datetime)
     
+    @staticmethod
+    def overlapping(start_datetime, end_datetime, inclusive=False, place_id=None):
+        """
+        Filter for blocks whose stored period overlaps the given one (or also
+        touches it, with inclusive=True); served by the (place, period) GiST
+        index on Postgres. Pass place_id when filtering on one place.
+        """
+        return Overlaps(start_datetime, end_datetime, inclusive=inclusive, place_id=place_id)
+    
+    @staticmethod
+    def recurring_pattern_applies(pattern, day, anchor_day):
+        """
+        Check if a recurring pattern has an occurrence on the given date.
+        anchor_day is the date of the first occurrence (used by 'weekly').
+        """
+        day_of_week = day.weekday()  # 0=Monday, 6=Sunday
+        
+        if pattern == 'daily':
+            return True
+        elif pattern == 'weekly':
+            return day_of_week == anchor_day.weekday()
+        elif pattern == 'weekdays':
+            return day_of_week < 5  # Monday to Friday (0-4)
+        elif pattern == 'weekends':
+            return day_of_week >= 5  # Saturday and Sunday (5-6)
+        return False
+    
+    def occurrences_between(self, start_datetime, end_datetime):
+        """
+        Yield the concrete (start, end) periods of this block that overlap the
+        given time period. A non-recurring block has at most one; a recurring
+        block repeats its time of day on every date its pattern applies to,
+        from its first date up to recurring_end_date.
+        """
+        if not self.is_recurring:
+            if self.overlaps_with(start_datetime, end_datetime):
+                yield self.start_datetime, self.end_datetime
+            return
+        
+        start_time = self.start_datetime.timetz()
+        end_time = self.end_datetime.timetz()
+        # An occurrence whose end time is not after its start runs overnight
+        spans_midnight = end_time <= start_time
+        
+        # Walk the calendar in the block's own timezone, starting a day early to
+        # catch an overnight occurrence running into the period
+        block_tz = self.start_datetime.tzinfo
+        day = max(self.start_datetime.date(), start_datetime.astimezone(block_tz).date() - timedelta(days=1))
+        last_day = end_datetime.astimezone(block_tz).date()
+        if self.recurring_end_date and self.recurring_end_date < last_day:
+            last_day = self.recurring_end_date
+        
+        while day <= last_day:
+            if self.recurring_pattern_applies(self.recurring_pattern, day, self.start_datetime.date()):
+                occurrence_start = datetime.combine(day, start_time)
+                occurrence_end = datetime.combine(day + timedelta(days=1) if spans_midnight else day, end_time)
+                if occurrence_start < end_datetime and occurrence_end > start_datetime:
+                    yield occurrence_start, occurrence_end
+            day += timedelta(days=1)
+    
     @classmethod
-    def get_for_place(cls, place, start_date=None, end_date=None):
+    def get_for_place(cls, place, start_datetime, end_datetime):
         """
-        Get blocked periods for a place, optionally filtered by date range
+        Get the blocked periods of a place that can have an occurrence in the
+        given time period: overlapping one-off blocks, and recurring blocks
+        that have started by its end and not finished before its start.
         
-        Args:
-            place: The place to get blocked periods for
-            start_date: Optional start date for filtering
-            end_date: Optional end date for filtering
-            
         Returns:
             QuerySet of BlockedPeriod objects
         """
-        blocked_periods = cls.objects.filter(place=place)
-        
-        if start_date and end_date:
-            # Get non-recurring blocks that overlap with the date range
-            date_range_blocks = blocked_periods.filter(
-                is_recurring=False,
-                start_datetime__lt=end_date,
-                end_datetime__gt=start_date
-            )
-            
-            # Get recurring blocks
-            recurring_blocks = blocked_periods.filter(is_recurring=True)
-            
-            # Combine the querysets
-            return date_range_blocks | recurring_blocks
+        from django.db.models import Q
+        
+        return cls.objects.filter(place=place).filter(
+            Q(cls.overlapping(start_datetime, end_datetime, place_id=place.pk), is_recurring=False)
+            | Q(is_recurring=True, start_datetime__lt=end_datetime)
+            & (Q(recurring_end_date__isnull=True) | Q(recurring_end_date__gte=start_datetime.date() - timedelta(days=1)))
+        )
+    
+    @staticmethod
+    def expand_occurrences(blocks, start_datetime, end_datetime):
+        """
+        Expand blocks into their concrete occurrences within the given time
+        period, recurring blocks included.
         
-        return blocked_periods
+        Returns:
+            List of (start, end, block) sorted by start, then end
+        """
+        occurrences = [
+            (start, end, block)
+            for block in blocks
+            for start, end in block.occurrences_between(start_datetime, end_datetime)
+        ]
+        occurrences.sort(key=lambda occurrence: (occurrence[0], occurrence[1], occurrence[2].pk))
+        return occurrences
     
     @classmethod
     def parse_datetime(cls, datetime_str):
@@ -122,20 +225,15 @@ class BlockedPeriod(models.Model):
         if not datetime_str:
             return None
             
-        # Handle ISO format with timezone info
-        if 'Z' in datetime_str or '+' in datetime_str or '-' in datetime_str:
-            # Already has timezone info, just parse it
-            return datetime.fromisoformat(datetime_str.replace('Z', '+00:00'))
-        else:
-            # No timezone info, treat as UTC
-            from django.utils import timezone
-            import pytz
-            
-            # Parse as naive datetime then make timezone-aware
-            naive_dt = datetime.fromisoformat(datetime_str)
-            
-            # Make timezone-aware as UTC
-            return timezone.make_aware(naive_dt, timezone=pytz.UTC)
+        from django.utils import timezone
+        import pytz
+        
+        parsed = datetime.fromisoformat(datetime_str.replace('Z', '+00:00'))
+        if timezone.is_aware(parsed):
+            return parsed
+        
+        # No timezone info (including plain dates), treat as UTC
+        return timezone.make_aware(parsed, timezone=pytz.UTC)
     
     @classmethod
     def check_booking_conflicts(cls, place, start_datetime, end_datetime):
@@ -148,9 +246,8 @@ class BlockedPeriod(models.Model):
         from places.booking.models import Booking
         
         overlapping_bookings = Booking.objects.filter(
-            place=place,
-            start_time__lt=end_datetime,
-            end_time__gt=start_datetime
+            Booking.overlapping(start_datetime, end_datetime, place_id=place.pk),
+            place=place
         )
         
         if overlapping_bookings.exists():
@@ -173,9 +270,8 @@ class BlockedPeriod(models.Model):
             QuerySet of overlapping BlockedPeriod objects
         """
         query = cls.objects.filter(
-            place=place,
-            start_datetime__lte=end_datetime,
-            end_datetime__gte=start_datetime
+            cls.overlapping(start_datetime, end_datetime, inclusive=True, place_id=place.pk),
+            place=place
         )
         
         if exclude_booking_blocks:
@@ -183,95 +279,293 @@ class BlockedPeriod(models.Model):
             
         return query
     
+    @staticmethod
+    def union_intervals(intervals):
+        """
+        Merge (start, end, item) triples whose ranges overlap or touch.
+        Returns a list of (start, end, items) in start order, where items are
+        the items that were merged into each range
+        """
+        merged = []
+        for start, end, item in sorted(intervals, key=lambda interval: interval[0]):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+                merged[-1][2].append(item)
+            else:
+                merged.append([start, end, [item]])
+        return [tuple(interval) for interval in merged]
+    
+    @classmethod
+    def _merge_reasons(cls, reasons):
+        """Join the distinct non-empty reasons of merged blocks, cut to fit the column"""
+        distinct = list(dict.fromkeys(reason for reason in reasons if reason))
+        return "; ".join(distinct)[:cls._meta.get_field('reason').max_length]
+    
     @classmethod
     def create_block(cls, place, start_datetime, end_datetime, block_type='owner-block', 
                     reason='', is_recurring=False, recurring_pattern=None, recurring_end_date=None):
         """
-        Create a new blocked period, handling overlaps and merges
+        Create a new blocked period, merging it with any owner or maintenance
+        blocks it overlaps or touches. Recurring blocks are never merged.
+        
+        Runs in one transaction holding the place's row lock: a single fetch of
+        the nearby blocks (booking blocks included, which stand in for active
+        bookings), an in-memory union, then one delete and one insert.
         
         Returns:
             (blocked_period, result_info) - The created/found block and info about the operation
         """
-        # Check for booking conflicts
-        has_conflicts, conflict_message = cls.check_booking_conflicts(place, start_datetime, end_datetime)
-        if has_conflicts:
-            raise ValidationError(conflict_message)
-        
-        # Check for overlapping blocks
-        overlapping_blocks = cls.find_overlapping_blocks(place, start_datetime, end_datetime)
-        
-        # Check if the new block is completely contained within an existing block
-        fully_contained_blocks = [
-            block for block in overlapping_blocks 
-            if block.contains(start_datetime, end_datetime)
-        ]
-        
-        # If the new block is fully contained within existing blocks, don't create a new one
-        if fully_contained_blocks:
-            # Return the first containing block
-            containing_block = fully_contained_blocks[0]
-            return containing_block, {
-                'merged': False,
-                'contained': True,
-                'message': 'This time period is already blocked'
-            }
+        from django.db import transaction
         
-        # If there are overlapping blocks, merge them
-        if overlapping_blocks.exists():
-            # Store the IDs of blocks that will be deleted
-            deleted_block_ids = list(overlapping_blocks.values_list('id', flat=True))
+        with transaction.atomic():
+            place.lock_for_update()
             
-            # Find the earliest start and latest end times
-            earliest_start = start_datetime
-            latest_end = end_datetime
+            nearby = list(cls.objects.filter(
+                cls.overlapping(start_datetime, end_datetime, inclusive=True, place_id=place.pk),
+                place=place,
+                is_recurring=False
+            ))
             
-            for block in overlapping_blocks:
-                if block.start_datetime < earliest_start:
-                    earliest_start = block.start_datetime
-                if block.end_datetime > latest_end:
-                    latest_end = block.end_datetime
+            if any(block.block_type == 'booking' and block.overlaps_with(start_datetime, end_datetime)
+                   for block in nearby):
+                raise ValidationError("This time period overlaps with existing bookings")
             
-            # Create a combined reason if needed
-            reasons = [block.reason for block in overlapping_blocks if block.reason]
-            if reason:
-                reasons.append(reason)
+            mergeable = [] if is_recurring else [
+                block for block in nearby if block.block_type in ('owner-block', 'maintenance')
+            ]
             
-            combined_reason = "; ".join(filter(None, reasons)) or reason
+            # If the new block is fully contained within an existing block, don't create a new one
+            containing_block = next(
+                (block for block in mergeable if block.contains(start_datetime, end_datetime)), None
+            )
+            if containing_block:
+                return containing_block, {
+                    'merged': False,
+                    'contained': True,
+                    'message': 'This time period is already blocked'
+                }
             
-            # Delete all overlapping blocks
-            overlapping_blocks.delete()
+            # Every mergeable block overlaps or touches the new one, so the union is a single range
+            [(merged_start, merged_end, _)] = cls.union_intervals(
+                [(start_datetime, end_datetime, None)]
+                + [(block.start_datetime, block.end_datetime, block) for block in mergeable]
+            )
+            merged_reason = cls._merge_reasons([block.reason for block in mergeable] + [reason])
+            
+            deleted_block_ids = [block.id for block in mergeable]
+            if deleted_block_ids:
+                cls.objects.filter(id__in=deleted_block_ids).delete()
             
-            # Create a new merged block
             blocked_period = cls.objects.create(
                 place=place,
-                start_datetime=earliest_start,
-                end_datetime=latest_end,
+                start_datetime=merged_start,
+                end_datetime=merged_end,
                 block_type=block_type,
-                reason=combined_reason,
+                reason=merged_reason,
                 is_recurring=is_recurring,
                 recurring_pattern=recurring_pattern,
                 recurring_end_date=recurring_end_date
             )
-            
+        
+        if deleted_block_ids:
             return blocked_period, {
                 'merged': True,
                 'deleted_block_ids': deleted_block_ids,
                 'message': f'Merged with {len(deleted_block_ids)} existing block(s)'
             }
         
-        # No overlaps, create the blocked period normally
-        blocked_period = cls.objects.create(
-            place=place,
-            start_datetime=start_datetime,
-            end_datetime=end_datetime,
-            block_type=block_type,
-            reason=reason,
-            is_recurring=is_recurring,
-            recurring_pattern=recurring_pattern,
-            recurring_end_date=recurring_end_date
-        )
-        
         return blocked_period, {
             'merged': False,
             'message': 'Block created successfully'
-        }
\ No newline at end of file
+        }
+    
+    @classmethod
+    def apply_bulk(cls, place, intervals=(), delete_ids=(), block_type='owner-block', reason=''):
+        """
+        Create many one-off blocks and delete others in one go, e.g. for a
+        drag-selection on the availability calendar.
+        
+        Deletions are applied first. The new intervals are then merged with
+        each other and with the owner or maintenance blocks they overlap or
+        touch, the same way create_block merges a single block. Intervals that
+        overlap a booking are skipped and reported rather than failing the
+        whole batch.
+        
+        Runs in one transaction holding the place's row lock: a single fetch of
+        the affected blocks, an in-memory union, then one delete and one bulk
+        insert however many intervals were sent.
+        
+        Args:
+            place: The place to change
+            intervals: Iterable of (start_datetime, end_datetime) pairs to block
+            delete_ids: IDs of this place's owner or maintenance blocks to delete
+            block_type: Type of the blocks created
+            reason: Reason recorded on the blocks created
+            
+        Raises:
+            ValidationError: If a block in delete_ids is missing, a booking block
+                or imported from an external calendar
+            
+        Returns:
+            dict with the 'created' blocks, 'deleted_block_ids' and the
+            'conflicts', the (start, end) intervals skipped for overlapping a booking
+        """
+        from django.db import transaction
+        from django.db.models import Q
+        
+        intervals = list(intervals)
+        delete_ids = set(delete_ids)
+        
+        with transaction.atomic():
+            place.lock_for_update()
+            
+            nearby_filter = Q(id__in=delete_ids)
+            if intervals:
+                nearby_filter |= Q(cls.overlapping(
+                    min(start for start, _ in intervals), max(end for _, end in intervals),
+                    inclusive=True, place_id=place.pk
+                ), is_recurring=False)
+            nearby = list(cls.objects.filter(nearby_filter, place=place))
+            
+            found = {block.id: block for block in nearby if block.id in delete_ids}
+            missing = sorted(delete_ids - set(found))
+            if missing:
+                raise ValidationError(f"Blocked period(s) not found: {', '.join(map(str, missing))}")
+            if any(block.block_type == 'booking' for block in found.values()):
+                raise ValidationError("Blocked periods associated with a booking cannot be deleted directly")
+            if any(block.block_type == 'external' for block in found.values()):
+                # The next sync would only bring them back; remove them from the imported calendar
+                raise ValidationError("Blocked periods imported from another calendar cannot be deleted directly")
+            
+            remaining = [block for block in nearby if block.id not in delete_ids]
+            booking_blocks = [block for block in remaining if block.block_type == 'booking']
+            
+            accepted = []
+            conflicts = []
+            for start_datetime, end_datetime in intervals:
+                if any(block.overlaps_with(start_datetime, end_datetime) for block in booking_blocks):
+                    conflicts.append((start_datetime, end_datetime))
+                else:
+                    accepted.append((start_datetime, end_datetime, None))
+            
+            mergeable = [
+                (block.start_datetime, block.end_datetime, block) for block in remaining
+                if not block.is_recurring and block.block_type in ('owner-block', 'maintenance')
+            ]
+            
+            replaced = []
+            new_blocks = []
+            for merged_start, merged_end, items in cls.union_intervals(accepted + mergeable):
+                existing = [item for item in items if item is not None]
+                if len(existing) == len(items):
+                    # No new interval landed in this range
+                    continue
+                if len(existing) == 1 and existing[0].contains(merged_start, merged_end):
+                    # Every new interval here is already blocked
+                    continue
+                
+                replaced.extend(existing)
+                new_blocks.append(cls(
+                    place=place,
+                    start_datetime=merged_start,
+                    end_datetime=merged_end,
+                    block_type=block_type,
+                    reason=cls._merge_reasons([block.reason for block in existing] + [reason])
+                ))
+            
+            deleted_block_ids = sorted(delete_ids | {block.id for block in replaced})
+            if deleted_block_ids:
+                cls.objects.filter(id__in=deleted_block_ids).delete()
+            created = cls.objects.bulk_create(new_blocks)
+            if deleted_block_ids or created:
+                cls.touch_calendars([place.pk])
+        
+        return {
+            'created': created,
+            'deleted_block_ids': deleted_block_ids,
+            'conflicts': conflicts,
+        }
+    
+    @classmethod
+    def compact(cls, place_ids=None, chunk_size=100):
+        """
+        Merge owner blocks that overlap or touch into one block per run, and
+        the same for maintenance blocks, so overlap scans see fewer rows.
+        Works through places chunk_size at a time, each place in its own short
+        transaction under its row lock. Recurring, booking and external blocks
+        are left as they are.
+        
+        Returns:
+            (blocks_before, blocks_after) for the blocks that were merged
+        """
+        from django.db import transaction
+        from places.place.models import Place
+        
+        compactable = cls.objects.filter(is_recurring=False, block_type__in=['owner-block', 'maintenance'])
+        if place_ids is not None:
+            compactable = compactable.filter(place_id__in=place_ids)
+        candidates = list(compactable.values_list('place_id', flat=True).distinct().order_by('place_id'))
+        
+        before = after = 0
+        for offset in range(0, len(candidates), chunk_size):
+            for place in Place.objects.filter(pk__in=candidates[offset:offset + chunk_size]).only('id'):
+                with transaction.atomic():
+                    place.lock_for_update()
+                    blocks = list(compactable.filter(place=place).only(
+                        'id', 'place_id', 'start_datetime', 'end_datetime', 'block_type', 'reason'
+                    ))
+                    
+                    replaced = []
+                    merged_blocks = []
+                    for block_type in ('owner-block', 'maintenance'):
+                        for start, end, group in cls.union_intervals(
+                            (block.start_datetime, block.end_datetime, block)
+                            for block in blocks if block.block_type == block_type
+                        ):
+                            if len(group) == 1:
+                                continue
+                            replaced.extend(group)
+                            merged_blocks.append(cls(
+                                place=place, start_datetime=start, end_datetime=end,
+                                block_type=block_type, reason=cls._merge_reasons(block.reason for block in group)
+                            ))
+                    
+                    if replaced:
+                        cls.objects.filter(id__in=[block.id for block in replaced]).delete()
+                        cls.objects.bulk_create(merged_blocks)
+                        cls.touch_calendars([place.pk])
+                        before += len(replaced)
+                        after += len(merged_blocks)
+        
+        return before, after
+    
+    @classmethod
+    def purge_ended(cls, before, chunk_size=1000):
+        """
+        Delete blocks that were over before the given datetime: one-off blocks
+        that ended before it and recurring blocks whose last date is before
+        it. Bookings keep their own history, so their blocks go too. Deletes
+        chunk_size rows per transaction.
+        
+        Returns:
+            Number of blocks deleted
+        """
+        from django.db import transaction
+        from django.db.models import Q
+        
+        ended = cls.objects.filter(
+            Q(is_recurring=False, end_datetime__lt=before)
+            | Q(is_recurring=True, recurring_end_date__lt=before.date())
+        )
+        
+        deleted = 0
+        while True:
+            with transaction.atomic():
+                rows = list(ended.order_by('id').values_list('id', 'place_id')[:chunk_size])
+                if not rows:
+                    break
+                cls.objects.filter(id__in=[block_id for block_id, _ in rows]).delete()
+                cls.touch_calendars({place_id for _, place_id in rows})
+                deleted += len(rows)
+        
+        return deleted
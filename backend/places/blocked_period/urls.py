@@ -3,5 +3,6 @@ from . import views
 
 urlpatterns = [
     path('', views.blocked_periods, name='blocked-periods'),
+    path('bulk/', views.bulk_blocked_periods, name='blocked-periods-bulk'),
     path('<int:blocked_period_id>/', views.blocked_period_detail, name='blocked-period-detail'),
 ]
\ No newline at end of file
@@ -2,6 +2,9 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
 import logging
 
 from .models import BlockedPeriod
@@ -15,11 +18,13 @@ logger = logging.getLogger(__name__)
 @permission_classes([IsAuthenticated])
 def blocked_periods(request):
     """
-    GET: Get all blocked periods for a specific parking space
+    GET: Get the blocked time of a parking space within a window, by default
+    from BLOCKED_PERIODS_PAST_DAYS ago to BLOCKED_PERIODS_WINDOW_DAYS after
+    that. Returns the window, 'intervals': every occurrence in it (recurring
+    blocks expanded) sorted by start, and 'blocks': the blocks they come from.
     POST: Create a new blocked period for a parking space
     """
     if request.method == 'GET':
-        # Get all blocked periods for a specific parking space
         place_id = request.query_params.get('place_id')
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
@@ -34,28 +39,54 @@ def blocked_periods(request):
             place = Place.objects.get(id=place_id)
             
             # Check if user is the owner
-            if place.owner != request.user:
+            if place.owner_id != request.user.id:
                 return Response(
                     {'error': 'You do not have permission to view blocked periods for this space'},
                     status=status.HTTP_403_FORBIDDEN
                 )
             
-            # Parse dates if provided
-            if start_date and end_date:
-                try:
-                    start_date = BlockedPeriod.parse_datetime(start_date)
-                    end_date = BlockedPeriod.parse_datetime(end_date)
-                except ValueError:
-                    return Response(
-                        {'error': 'Invalid date format'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
+            window = timedelta(days=getattr(settings, 'BLOCKED_PERIODS_WINDOW_DAYS', 90))
+            max_window = timedelta(days=getattr(settings, 'BLOCKED_PERIODS_MAX_WINDOW_DAYS', 366))
+            try:
+                start_date = BlockedPeriod.parse_datetime(start_date)
+                end_date = BlockedPeriod.parse_datetime(end_date)
+            except ValueError:
+                return Response(
+                    {'error': 'Invalid date format'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             
-            # Use model method to get filtered blocked periods
-            blocked_periods = BlockedPeriod.get_for_place(place, start_date, end_date)
+            if start_date is None:
+                start_date = end_date - window if end_date else timezone.now() - timedelta(
+                    days=getattr(settings, 'BLOCKED_PERIODS_PAST_DAYS', 7)
+                )
+            if end_date is None:
+                end_date = start_date + window
+            if not timedelta(0) < end_date - start_date <= max_window:
+                return Response(
+                    {'error': f'end_date must be after start_date and at most {max_window.days} days later'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             
-            serializer = BlockedPeriodSerializer(blocked_periods, many=True)
-            return Response(serializer.data)
+            occurrences = BlockedPeriod.expand_occurrences(
+                BlockedPeriod.get_for_place(place, start_date, end_date), start_date, end_date
+            )
+            blocks = list({block.pk: block for _, _, block in occurrences}.values())
+            
+            return Response({
+                'start': start_date,
+                'end': end_date,
+                'intervals': [
+                    {
+                        'block_id': block.pk,
+                        'start_datetime': start,
+                        'end_datetime': end,
+                        'block_type': block.block_type,
+                    }
+                    for start, end, block in occurrences
+                ],
+                'blocks': BlockedPeriodSerializer(sorted(blocks, key=lambda block: block.pk), many=True).data,
+            })
         
         except Place.DoesNotExist:
             return Response(
@@ -129,6 +160,83 @@ def blocked_periods(request):
             logger.error(f"Error creating blocked period: {str(e)}", exc_info=True)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_blocked_periods(request):
+    """
+    Create and delete many blocked periods for a parking space at once.
+    Request body: place_id, 'create': a list of {start_datetime, end_datetime},
+    'delete': a list of blocked period IDs, and optionally block_type and reason
+    for the created blocks. Applied all together or not at all; intervals that
+    overlap a booking are skipped and listed under 'conflicts'.
+    """
+    try:
+        place = Place.objects.get(id=request.data.get('place_id'), owner=request.user)
+    except (Place.DoesNotExist, ValueError, TypeError):
+        return Response(
+            {'error': 'Parking space not found or you do not have permission'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    block_type = request.data.get('block_type', 'owner-block')
+    if block_type not in ('owner-block', 'maintenance'):
+        return Response(
+            {'error': 'block_type must be owner-block or maintenance'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        intervals = [
+            (BlockedPeriod.parse_datetime(item['start_datetime']), BlockedPeriod.parse_datetime(item['end_datetime']))
+            for item in request.data.get('create', [])
+        ]
+        delete_ids = [int(block_id) for block_id in request.data.get('delete', [])]
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return Response(
+            {'error': 'Invalid create or delete list. Use ISO format (YYYY-MM-DDTHH:MM:SS) for datetimes'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    if any(end_datetime <= start_datetime for start_datetime, end_datetime in intervals):
+        return Response(
+            {'error': 'End time must be after start time'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    max_changes = getattr(settings, 'BLOCKED_PERIODS_MAX_BULK', 500)
+    if not 0 < len(intervals) + len(delete_ids) <= max_changes:
+        return Response(
+            {'error': f'Between 1 and {max_changes} blocks can be created or deleted at once'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        result = BlockedPeriod.apply_bulk(
+            place=place,
+            intervals=intervals,
+            delete_ids=delete_ids,
+            block_type=block_type,
+            reason=request.data.get('reason', '')
+        )
+    except ValidationError as e:
+        return Response({'error': ' '.join(e.messages)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logger.error(f"Error applying bulk blocked periods: {str(e)}", exc_info=True)
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    return Response({
+        'created': BlockedPeriodSerializer(result['created'], many=True).data,
+        'deleted_block_ids': result['deleted_block_ids'],
+        'conflicts': [
+            {
+                'start_datetime': start_datetime.isoformat(),
+                'end_datetime': end_datetime.isoformat(),
+                'message': 'This time period overlaps with existing bookings',
+            }
+            for start_datetime, end_datetime in result['conflicts']
+        ],
+    })
+
 @api_view(['GET', 'PATCH', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def blocked_period_detail(request, blocked_period_id):
@@ -2,9 +2,15 @@ from django.db import models
 from django.conf import settings
 from django.utils import timezone
 from django.core.exceptions import ValidationError
-from decimal import Decimal
 from datetime import timedelta, datetime
 
+from django.contrib.postgres.fields import DateTimeRangeField
+from places.util.range_utils import Overlaps, PeriodRange
+
+class BookingConflict(Exception):
+    """Raised when a booking changed between being loaded and being updated"""
+    pass
+
 class Booking(models.Model):
     """Model for representing bookings of parking spaces."""
     STATUS_CHOICES = (
@@ -14,65 +20,159 @@ class Booking(models.Model):
         ('completed', 'Completed'),
     )
     
+    # Bookings in these states hold the space; on Postgres no two of them may
+    # overlap for the same place (see migration 0002)
+    ACTIVE_STATUSES = ('pending', 'confirmed')
+    
+    # Bookings in these states count towards host analytics (see BookingRollup)
+    REVENUE_STATUSES = ('pending', 'confirmed', 'completed')
+    
     place = models.ForeignKey('places.Place', related_name='bookings', on_delete=models.CASCADE)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='bookings')
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
+    # Kept by the database; indexed with place for Overlaps on Postgres
+    period = models.GeneratedField(expression=PeriodRange('start_time', 'end_time'),
+                                   output_field=DateTimeRangeField(), db_persist=True)
     booking_time = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
     payment_id = models.CharField(max_length=255, blank=True, null=True)
     payment_status = models.CharField(max_length=50, blank=True, null=True)
+    # Bumped by every status transition; updates only apply to the version they read
+    version = models.PositiveIntegerField(default=1)
 
     class Meta:
         ordering = ['-booking_time']
+        indexes = [
+            # Keyset pagination of a user's bookings
+            models.Index(fields=['user', 'start_time', 'id'], name='booking_user_start_idx'),
+            # Host dashboards: a host's places joined to their bookings by status and time
+            models.Index(fields=['place', 'status', 'start_time'], name='booking_place_status_start_idx'),
+        ]
         app_label = 'places'
 
     def __str__(self):
         return f"{self.user.email} booked {self.place.name} from {self.start_time} to {self.end_time}"
     
-    def clean(self):
+    def clean(self, check_availability=True):
         """Validate booking data"""
         if self.end_time <= self.start_time:
             raise ValidationError("End time must be after start time")
             
         # Only check availability for new bookings or when changing dates
-        if not self.pk or self._state.adding:
+        if check_availability and (not self.pk or self._state.adding):
             is_available, reason = self.place.is_available(self.start_time, self.end_time)
             if not is_available:
                 raise ValidationError(reason)
     
-    def save(self, *args, **kwargs):
-        """Save the booking and create/update the corresponding BlockedPeriod"""
-        self.clean()
+    def save(self, *args, availability_checked=False, **kwargs):
+        """
+        Save the booking and create/update the corresponding BlockedPeriod.
+        Pass availability_checked=True when the caller has already checked the
+        window (under the place lock) so it is not evaluated a second time.
+        """
+        self.clean(check_availability=not availability_checked)
         
         # Calculate total price if not set
         if not self.total_price:
             self.total_price = self.calculate_price()
-            
+        
+        created = self._state.adding
         super().save(*args, **kwargs)
         
         # Create or update the corresponding BlockedPeriod
-        self._update_blocked_period()
+        self._update_blocked_period(created)
+        
+        if created and self.status in self.REVENUE_STATUSES:
+            from places.analytics.models import BookingRollup
+            BookingRollup.record([self])
+        
+        if created:
+            from outbox.models import OutboxEvent
+            OutboxEvent.publish('booking.created', **self.get_event_payload())
     
-    def _update_blocked_period(self):
-        """Update or create the blocked period for this booking"""
+    def _update_blocked_period(self, created=False):
+        """
+        Create, move or remove the blocked period for this booking.
+        A new booking inserts its block outright; an existing one updates or
+        deletes it in place, without loading the block or the booking's user.
+        """
         from places.blocked_period.models import BlockedPeriod
-        if self.status in ['pending', 'confirmed']:
-            BlockedPeriod.objects.update_or_create(
-                booking=self,
-                defaults={
-                    'place': self.place,
-                    'start_datetime': self.start_time,
-                    'end_datetime': self.end_time,
-                    'block_type': 'booking',
-                    'reason': f"Booked by {self.user.email}",
-                    'is_recurring': False,
-                }
-            )
-        else:
+        if self.status not in self.ACTIVE_STATUSES:
             # If cancelled or completed, remove the block
-            BlockedPeriod.objects.filter(booking=self).delete()
+            deleted, _ = BlockedPeriod.objects.filter(booking_id=self.pk).delete()
+            if deleted:
+                BlockedPeriod.touch_calendars([self.place_id])
+            return
+        
+        if not created:
+            updated = BlockedPeriod.objects.filter(booking_id=self.pk).update(
+                place_id=self.place_id,
+                start_datetime=self.start_time,
+                end_datetime=self.end_time,
+                updated_at=timezone.now()
+            )
+            if updated:
+                BlockedPeriod.touch_calendars([self.place_id])
+                return
+        
+        BlockedPeriod.objects.create(
+            place_id=self.place_id,
+            booking=self,
+            start_datetime=self.start_time,
+            end_datetime=self.end_time,
+            block_type='booking',
+            reason=f"Booked by {self.user.email}",
+            is_recurring=False,
+        )
+    
+    def _transition(self, new_status):
+        """
+        Move this booking to a new status with a single conditional UPDATE on
+        its version, dropping its blocked period when it stops holding the
+        space and taking it out of the analytics rollups when it stops counting
+        as revenue. Cancelling also records a booking.cancelled outbox event.
+        
+        Raises BookingConflict, leaving this instance untouched, if the booking
+        was changed since it was loaded.
+        """
+        from django.db import transaction
+        from outbox.models import OutboxEvent
+        from places.analytics.models import BookingRollup
+        from places.blocked_period.models import BlockedPeriod
+        
+        releases_space = self.status in self.ACTIVE_STATUSES and new_status not in self.ACTIVE_STATUSES
+        leaves_rollup = self.status in self.REVENUE_STATUSES and new_status not in self.REVENUE_STATUSES
+        
+        if not releases_space and not leaves_rollup:
+            self._set_status_if_unchanged(new_status)
+            return
+        
+        with transaction.atomic():
+            self._set_status_if_unchanged(new_status)
+            if releases_space:
+                BlockedPeriod.objects.filter(booking_id=self.pk).delete()
+                BlockedPeriod.touch_calendars([self.place_id])
+            if leaves_rollup:
+                BookingRollup.record([self], sign=-1)
+            if new_status == 'cancelled':
+                OutboxEvent.publish('booking.cancelled', **self.get_event_payload())
+    
+    def _set_status_if_unchanged(self, new_status):
+        """UPDATE the status only if the row still has the version this instance read"""
+        updated = type(self).objects.filter(pk=self.pk, version=self.version).update(
+            status=new_status, version=models.F('version') + 1
+        )
+        if not updated:
+            raise BookingConflict(f"Booking {self.pk} was changed by another request")
+        
+        self.status = new_status
+        self.version += 1
+    
+    def get_event_payload(self):
+        """Identify this booking in outbox events"""
+        return {'booking_id': self.pk, 'place_id': self.place_id, 'user_id': self.user_id}
     
     def cancel(self):
         """Cancel this booking"""
@@ -82,8 +182,7 @@ class Booking(models.Model):
         if not self.can_be_cancelled():
             return False, "Booking cannot be cancelled at this time"
             
-        self.status = 'cancelled'
-        self.save()
+        self._transition('cancelled')
         return True, "Booking cancelled successfully"
     
     def complete(self):
@@ -94,8 +193,7 @@ class Booking(models.Model):
         if self.status == 'cancelled':
             return False, "Cannot complete a cancelled booking"
             
-        self.status = 'completed'
-        self.save()
+        self._transition('completed')
         return True, "Booking marked as completed"
     
     def confirm(self):
@@ -103,17 +201,16 @@ class Booking(models.Model):
         if self.status != 'pending':
             return False, f"Cannot confirm booking with status '{self.get_status_display()}'"
             
-        self.status = 'confirmed'
-        self.save()
+        self._transition('confirmed')
         return True, "Booking confirmed successfully"
     
-    def can_be_cancelled(self):
+    def can_be_cancelled(self, now=None):
         """Check if this booking can be cancelled"""
         # Example: Allow cancellation up to 24 hours before start time
         if self.status in ['cancelled', 'completed']:
             return False
             
-        return timezone.now() < (self.start_time - timedelta(hours=24))
+        return (now or timezone.now()) < (self.start_time - timedelta(hours=24))
     
     def get_duration_hours(self):
         """Get the duration of the booking in hours"""
@@ -125,40 +222,52 @@ class Booking(models.Model):
     
     def calculate_price(self):
         """Calculate the total price for this booking"""
-        duration_hours = self.get_duration_hours()
-        return self.place.price_per_hour * Decimal(duration_hours)
+        return self.place.quote_price(self.start_time, self.end_time)
     
     def is_active(self):
         """Check if this booking is active (not cancelled or completed)"""
-        return self.status in ['pending', 'confirmed']
+        return self.status in self.ACTIVE_STATUSES
     
-    def is_upcoming(self):
+    def is_upcoming(self, now=None):
         """Check if this booking is in the future"""
-        return self.start_time > timezone.now()
+        return self.start_time > (now or timezone.now())
     
-    def is_in_progress(self):
+    def is_in_progress(self, now=None):
         """Check if this booking is currently in progress"""
-        now = timezone.now()
+        now = now or timezone.now()
         return self.start_time <= now and self.end_time > now
     
-    def is_past(self):
+    def is_past(self, now=None):
         """Check if this booking is in the past"""
-        return self.end_time <= timezone.now()
+        return self.end_time <= (now or timezone.now())
     
-    def get_status_info(self):
-        """Get detailed status information about this booking"""
+    def get_status_info(self, now=None):
+        """
+        Get detailed status information about this booking.
+        Pass now when building this for many bookings so they agree on the time.
+        """
+        now = now or timezone.now()
         status_info = {
             'status': self.status,
             'status_display': self.get_status_display(),
             'is_active': self.is_active(),
-            'is_upcoming': self.is_upcoming(),
-            'is_in_progress': self.is_in_progress(),
-            'is_past': self.is_past(),
-            'can_be_cancelled': self.can_be_cancelled(),
+            'is_upcoming': self.is_upcoming(now),
+            'is_in_progress': self.is_in_progress(now),
+            'is_past': self.is_past(now),
+            'can_be_cancelled': self.can_be_cancelled(now),
             'cancellation_deadline': self.get_cancellation_deadline(),
         }
         return status_info
     
+    @classmethod
+    def get_status_infos(cls, bookings, now=None):
+        """
+        Get status information for many bookings against a single now.
+        Returns a dict mapping booking id to its get_status_info()
+        """
+        now = now or timezone.now()
+        return {booking.id: booking.get_status_info(now) for booking in bookings}
+    
     def update_status(self, new_status):
         """Update the booking status"""
         if new_status not in dict(self.STATUS_CHOICES):
@@ -173,11 +282,98 @@ class Booking(models.Model):
             return self.complete()
         elif new_status == 'confirmed':
             return self.confirm()
+        elif not self.is_active():
+            # Reactivating would need a fresh availability check; book again instead
+            return False, f"Cannot change a {self.get_status_display().lower()} booking back to {dict(self.STATUS_CHOICES)[new_status]}"
         else:
-            self.status = new_status
-            self.save()
+            self._transition(new_status)
             return True, f"Booking status updated to {self.get_status_display()}"
     
+    @classmethod
+    def complete_finished(cls, now=None, chunk_size=500):
+        """
+        Mark confirmed bookings whose end time has passed as completed
+        
+        Returns:
+            Number of bookings completed
+        """
+        now = now or timezone.now()
+        finished = cls.objects.filter(status='confirmed', end_time__lte=now)
+        return cls._bulk_transition(finished, 'completed', chunk_size)
+    
+    @classmethod
+    def expire_pending(cls, pending_ttl, now=None, chunk_size=500):
+        """
+        Cancel pending bookings that were never confirmed, either because they
+        have waited longer than pending_ttl or because their start time has passed
+        
+        Returns:
+            Number of bookings cancelled
+        """
+        from django.db.models import Q
+        
+        now = now or timezone.now()
+        stale = cls.objects.filter(status='pending').filter(
+            Q(booking_time__lte=now - pending_ttl) | Q(start_time__lte=now)
+        )
+        return cls._bulk_transition(stale, 'cancelled', chunk_size)
+    
+    @classmethod
+    def _bulk_transition(cls, queryset, new_status, chunk_size):
+        """
+        Move every booking in queryset to new_status with set-based UPDATEs and
+        matching bulk deletes of their blocked periods. Works through the rows
+        in chunks, one short transaction each, to bound how long locks are held;
+        rows locked by in-flight requests are skipped and picked up next run.
+        queryset must only hold bookings that count towards the rollups, and
+        new_status must not move them back in.
+        """
+        from django.db import transaction
+        from outbox.models import OutboxEvent
+        from places.analytics.models import BookingRollup
+        from places.blocked_period.models import BlockedPeriod
+        
+        total = 0
+        while True:
+            with transaction.atomic():
+                ids = list(
+                    queryset.select_for_update(skip_locked=True)
+                    .order_by('pk')
+                    .values_list('pk', flat=True)[:chunk_size]
+                )
+                if not ids:
+                    break
+                
+                if new_status not in cls.REVENUE_STATUSES:
+                    bookings = list(cls.objects.filter(pk__in=ids).only(
+                        'place_id', 'user_id', 'start_time', 'end_time', 'total_price'
+                    ))
+                    BookingRollup.record(bookings, sign=-1)
+                    OutboxEvent.publish_many(
+                        f'booking.{new_status}', [booking.get_event_payload() for booking in bookings]
+                    )
+                
+                total += cls.objects.filter(pk__in=ids).update(
+                    status=new_status, version=models.F('version') + 1
+                )
+                if new_status not in cls.ACTIVE_STATUSES:
+                    BlockedPeriod.objects.filter(booking_id__in=ids).delete()
+                    BlockedPeriod.touch_calendars(
+                        cls.objects.filter(pk__in=ids).values('place_id').distinct()
+                    )
+        
+        return total
+    
+    @staticmethod
+    def overlapping(start_datetime, end_datetime, place_id=None):
+        """
+        Filter for bookings overlapping the given time period; served by the
+        (place, period) GiST index on Postgres. Pass place_id when filtering on
+        one place.
+        """
+        return Overlaps(start_datetime, end_datetime, place_id=place_id,
+                        start_field='start_time', end_field='end_time')
+    
     @classmethod
     def get_user_bookings(cls, user, status=None, upcoming_only=False, past_only=False):
         """
@@ -205,6 +401,37 @@ class Booking(models.Model):
             
         return bookings
     
+    @classmethod
+    def get_host_bookings(cls, owner, status=None, start=None, end=None, place_id=None):
+        """
+        Get bookings across every place owned by a host, in one query
+        
+        Args:
+            owner: The user whose places' bookings to retrieve
+            status: Optional status filter
+            start: If given, only bookings ending after this datetime
+            end: If given, only bookings starting before this datetime
+            place_id: Optional filter to one of the host's places
+            
+        Returns:
+            QuerySet of Booking objects with place and user loaded
+        """
+        bookings = cls.objects.filter(place__owner=owner).select_related('place', 'user')
+        
+        if status:
+            bookings = bookings.filter(status=status)
+        
+        if start:
+            bookings = bookings.filter(end_time__gt=start)
+        
+        if end:
+            bookings = bookings.filter(start_time__lt=end)
+        
+        if place_id:
+            bookings = bookings.filter(place_id=place_id)
+        
+        return bookings
+    
     @classmethod
     def get_place_bookings(cls, place, status=None, upcoming_only=False, past_only=False):
         """
@@ -232,6 +459,34 @@ class Booking(models.Model):
             
         return bookings
     
+    @classmethod
+    def expand_recurrence(cls, start_time, end_time, pattern, until):
+        """
+        Expand a recurring booking request into concrete windows
+        
+        Args:
+            start_time: Start of the first window
+            end_time: End of the first window
+            pattern: One of BlockedPeriod.RECURRING_PATTERNS ('daily', 'weekdays', ...)
+            until: Last date (inclusive) a window may start on
+            
+        Returns:
+            List of (start_datetime, end_datetime) tuples
+        """
+        from places.blocked_period.models import BlockedPeriod
+        
+        duration = end_time - start_time
+        windows = []
+        day_offset = 0
+        while True:
+            window_start = start_time + timedelta(days=day_offset)
+            if window_start.date() > until:
+                break
+            if BlockedPeriod.recurring_pattern_applies(pattern, window_start.date(), start_time.date()):
+                windows.append((window_start, window_start + duration))
+            day_offset += 1
+        return windows
+    
     @classmethod
     def parse_datetime(cls, datetime_str):
         """
@@ -241,17 +496,12 @@ class Booking(models.Model):
         if not datetime_str:
             return None
             
-        # Handle ISO format with timezone info
-        if 'Z' in datetime_str or '+' in datetime_str or '-' in datetime_str:
-            # Already has timezone info, just parse it
-            return datetime.fromisoformat(datetime_str.replace('Z', '+00:00'))
-        else:
-            # No timezone info, treat as UTC
-            from django.utils import timezone
-            import pytz
-            
-            # Parse as naive datetime then make timezone-aware
-            naive_dt = datetime.fromisoformat(datetime_str)
-            
-            # Make timezone-aware as UTC
-            return timezone.make_aware(naive_dt, timezone=pytz.UTC)
\ No newline at end of file
+        from django.utils import timezone
+        import pytz
+        
+        parsed = datetime.fromisoformat(datetime_str.replace('Z', '+00:00'))
+        if timezone.is_aware(parsed):
+            return parsed
+        
+        # No timezone info (including plain dates), treat as UTC
+        return timezone.make_aware(parsed, timezone=pytz.UTC)
\ No newline at end of file
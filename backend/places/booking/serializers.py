@@ -4,5 +4,58 @@ from .models import Booking
 class BookingSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
-        fields = ['id', 'place', 'user', 'start_time', 'end_time', 'booking_time']
-        read_only_fields = ['booking_time']
\ No newline at end of file
+        fields = ['id', 'place', 'user', 'start_time', 'end_time', 'booking_time', 'status', 'version']
+        read_only_fields = ['booking_time', 'status', 'version']
+
+class UserBookingSerializer(serializers.ModelSerializer):
+    """
+    A booking with a summary of its place and status flags, for the my-bookings
+    list. Expects bookings loaded with select_related('place') and the place's
+    primary image prefetched into primary_images, and a 'status_infos' dict
+    from Booking.get_status_infos in the context.
+    """
+    place = serializers.SerializerMethodField()
+    status_info = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Booking
+        fields = ['id', 'place', 'start_time', 'end_time', 'booking_time', 'status', 'version', 'total_price',
+                  'status_info']
+        read_only_fields = fields
+
+    def get_place(self, obj):
+        place = obj.place
+        primary_images = getattr(place, 'primary_images', [])
+        return {
+            'id': place.id,
+            'name': place.name,
+            'address': place.address,
+            'city': place.city,
+            'state': place.state,
+            'price_per_hour': str(place.price_per_hour),
+            'primary_image_url': primary_images[0].url if primary_images else None,
+            'primary_image_srcset': primary_images[0].srcset if primary_images else {},
+        }
+
+    def get_status_info(self, obj):
+        return self.context['status_infos'][obj.id]
+
+
+class HostBookingSerializer(serializers.ModelSerializer):
+    """
+    A booking on one of the host's places, with who booked it. Expects
+    bookings loaded with select_related('place', 'user').
+    """
+    place = serializers.SerializerMethodField()
+    user = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Booking
+        fields = ['id', 'place', 'user', 'start_time', 'end_time', 'booking_time', 'status', 'version', 'total_price']
+        read_only_fields = fields
+
+    def get_place(self, obj):
+        return {'id': obj.place.id, 'name': obj.place.name, 'address': obj.place.address}
+
+    def get_user(self, obj):
+        return {'id': obj.user.id, 'name': obj.user.name, 'email': obj.user.email}
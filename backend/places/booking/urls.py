@@ -3,6 +3,8 @@ from . import views
 
 urlpatterns = [
     path('', views.create_booking, name='create-booking'),
+    path('bulk/', views.create_bulk_bookings, name='create-bulk-bookings'),
     path('my-bookings/', views.get_user_bookings, name='my-bookings'),
+    path('host/', views.get_host_bookings, name='host-bookings'),
     path('<int:booking_id>/', views.booking_detail, name='booking-detail'),
 ]
\ No newline at end of file
@@ -2,15 +2,22 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from django.db.models import Prefetch
+from datetime import date
 import logging
 
-from .models import Booking
-from .serializers import BookingSerializer
+from .models import Booking, BookingConflict
+from .serializers import BookingSerializer, UserBookingSerializer, HostBookingSerializer
+from places.idempotency.decorators import idempotent
+from places.place_image.models import PlaceImage
+from places.util.pagination_utils import KeysetPaginator
 
 logger = logging.getLogger(__name__)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def create_booking(request):
     """Create a new booking"""
     place_id = request.data.get('place_id')
@@ -25,7 +32,7 @@ def create_booking(request):
     
     try:
         from places.place.models import Place
-        place = Place.objects.get(id=place_id)
+        place = Place.objects.select_related('rate_table').get(id=place_id)
         
         # Parse datetimes using the model method
         try:
@@ -59,34 +66,210 @@ def create_booking(request):
         logger.error(f"Error creating booking: {str(e)}", exc_info=True)
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@idempotent
+def create_bulk_bookings(request):
+    """
+    Create many bookings for one parking space in a single transaction.
+    Accepts either an explicit list of windows or a recurrence to expand:
+    
+        {"place_id": 1, "windows": [{"start_time": ..., "end_time": ...}, ...]}
+        {"place_id": 1, "recurrence": {"start_time": ..., "end_time": ...,
+                                       "pattern": "weekdays", "until": "2025-06-30"}}
+    
+    Each window succeeds or fails on its own; the response reports both.
+    """
+    from places.place.models import Place
+    from places.blocked_period.models import BlockedPeriod
+    
+    place_id = request.data.get('place_id')
+    raw_windows = request.data.get('windows')
+    recurrence = request.data.get('recurrence')
+    
+    if not place_id or not (raw_windows or recurrence):
+        return Response(
+            {'error': 'place_id and either windows or recurrence are required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        place = Place.objects.select_related('rate_table').get(id=place_id)
+    except Place.DoesNotExist:
+        return Response(
+            {'error': 'Parking space not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    try:
+        if raw_windows:
+            windows = [
+                (Booking.parse_datetime(window['start_time']), Booking.parse_datetime(window['end_time']))
+                for window in raw_windows
+            ]
+        else:
+            if recurrence.get('pattern') not in dict(BlockedPeriod.RECURRING_PATTERNS):
+                return Response(
+                    {'error': f"pattern must be one of: {', '.join(dict(BlockedPeriod.RECURRING_PATTERNS))}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            windows = Booking.expand_recurrence(
+                Booking.parse_datetime(recurrence['start_time']),
+                Booking.parse_datetime(recurrence['end_time']),
+                recurrence['pattern'],
+                date.fromisoformat(recurrence['until'])
+            )
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return Response(
+            {'error': 'Invalid windows or recurrence'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    max_windows = getattr(settings, 'BULK_BOOKING_MAX_WINDOWS', 100)
+    if not windows or len(windows) > max_windows:
+        return Response(
+            {'error': f'Between 1 and {max_windows} windows can be booked at once'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        results = place.create_bookings(user=request.user, windows=windows)
+    except Exception as e:
+        logger.error(f"Error creating bulk bookings: {str(e)}", exc_info=True)
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    created = sum(1 for result in results if result['success'])
+    response_data = {
+        'created': created,
+        'failed': len(results) - created,
+        'results': [
+            {
+                'start_time': result['start_time'],
+                'end_time': result['end_time'],
+                'success': result['success'],
+                'message': result['message'],
+                'booking': BookingSerializer(result['booking']).data if result['booking'] else None,
+            }
+            for result in results
+        ],
+    }
+    
+    return Response(
+        response_data,
+        status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+    )
+
+def parse_page_limit(request):
+    """
+    Read the limit query parameter for a paginated list.
+    Returns (limit, None), or (None, error_response) if it is out of range
+    """
+    max_page_size = getattr(settings, 'BOOKINGS_MAX_PAGE_SIZE', 100)
+    try:
+        limit = int(request.query_params.get('limit', 20))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= max_page_size:
+        return None, Response(
+            {'error': f'limit must be between 1 and {max_page_size}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return limit, None
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_user_bookings(request):
-    """Get all bookings for the current user with optional filtering"""
+    """
+    Get the current user's bookings with optional filtering, one page at a time.
+    Pages are ordered by start time and continue from the cursor given in the
+    previous page's next_cursor.
+    """
     status_filter = request.query_params.get('status')
     upcoming_only = request.query_params.get('upcoming', 'false').lower() == 'true'
     past_only = request.query_params.get('past', 'false').lower() == 'true'
     
+    limit, error = parse_page_limit(request)
+    if error:
+        return error
+    
     # Use the model class method to get filtered bookings
     bookings = Booking.get_user_bookings(
         user=request.user,
         status=status_filter,
         upcoming_only=upcoming_only,
         past_only=past_only
+    ).select_related('place').prefetch_related(
+        Prefetch('place__images', queryset=PlaceImage.objects.filter(is_primary=True), to_attr='primary_images')
     )
     
-    serializer = BookingSerializer(bookings, many=True)
-    return Response(serializer.data)
+    try:
+        page, next_cursor = KeysetPaginator('start_time', limit).paginate(
+            bookings, request.query_params.get('cursor')
+        )
+    except ValueError:
+        return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer = UserBookingSerializer(page, many=True, context={
+        'status_infos': Booking.get_status_infos(page),
+    })
+    return Response({'results': serializer.data, 'next_cursor': next_cursor})
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_host_bookings(request):
+    """
+    Get bookings across all of the current user's listings, optionally by
+    status, place_id and a start/end time range, one page at a time ordered
+    by start time (see get_user_bookings for the cursor)
+    """
+    limit, error = parse_page_limit(request)
+    if error:
+        return error
+    
+    try:
+        start = Booking.parse_datetime(request.query_params.get('start'))
+        end = Booking.parse_datetime(request.query_params.get('end'))
+    except ValueError:
+        return Response({'error': 'Invalid datetime format'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        place_id = int(request.query_params['place_id']) if request.query_params.get('place_id') else None
+    except ValueError:
+        return Response({'error': 'place_id must be a listing ID'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    bookings = Booking.get_host_bookings(
+        owner=request.user,
+        status=request.query_params.get('status'),
+        start=start,
+        end=end,
+        place_id=place_id
+    )
+    
+    try:
+        page, next_cursor = KeysetPaginator('start_time', limit).paginate(
+            bookings, request.query_params.get('cursor')
+        )
+    except ValueError:
+        return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer = HostBookingSerializer(page, many=True)
+    return Response({'results': serializer.data, 'next_cursor': next_cursor})
+
+def conflict_response():
+    return Response(
+        {'error': 'This booking was changed by another request. Reload it and try again.'},
+        status=status.HTTP_409_CONFLICT
+    )
 
 @api_view(['GET', 'PATCH', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def booking_detail(request, booking_id):
     """Get, update, or delete a specific booking"""
     try:
-        booking = Booking.objects.get(id=booking_id)
+        booking = Booking.objects.select_related('place').get(id=booking_id)
         
         # Check if user is authorized (either the booker or the place owner)
-        if booking.user != request.user and booking.place.owner != request.user:
+        if booking.user_id != request.user.id and booking.place.owner_id != request.user.id:
             return Response(
                 {'error': 'You do not have permission to access this booking'},
                 status=status.HTTP_403_FORBIDDEN
@@ -105,8 +288,17 @@ def booking_detail(request, booking_id):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
+            # Clients may send the version they last saw to make sure they are
+            # not acting on stale data
+            expected_version = request.data.get('version', request.headers.get('If-Match'))
+            if expected_version is not None and str(expected_version).strip('"') != str(booking.version):
+                return conflict_response()
+            
             # Use the model method to update status
-            success, message = booking.update_status(new_status)
+            try:
+                success, message = booking.update_status(new_status)
+            except BookingConflict:
+                return conflict_response()
             
             if success:
                 serializer = BookingSerializer(booking)
@@ -116,7 +308,10 @@ def booking_detail(request, booking_id):
         
         elif request.method == 'DELETE':
             # Only allow cancellation, not actual deletion
-            success, message = booking.cancel()
+            try:
+                success, message = booking.cancel()
+            except BookingConflict:
+                return conflict_response()
             if success:
                 return Response({'message': message}, status=status.HTTP_200_OK)
             else:
@@ -0,0 +1,103 @@
+from django.db import models
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BookingHoldQuerySet(models.QuerySet):
+    def active(self, now=None):
+        """Holds that have not yet expired"""
+        return self.filter(expires_at__gt=now or timezone.now())
+
+    def expired(self, now=None):
+        """Holds whose reservation window has lapsed"""
+        return self.filter(expires_at__lte=now or timezone.now())
+
+
+class BookingHold(models.Model):
+    """
+    A short-lived reservation of a time window taken during checkout.
+
+    While a hold is active, availability checks treat its window as taken.
+    Holds are never swept: expired rows are simply ignored by queries and are
+    deleted lazily, per place, the next time that place takes a new hold.
+    """
+    place = models.ForeignKey('places.Place', on_delete=models.CASCADE, related_name='holds')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='booking_holds')
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = BookingHoldQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['place', 'expires_at']),
+        ]
+        app_label = 'places'
+
+    def __str__(self):
+        return f"Hold on {self.place_id} from {self.start_time} to {self.end_time} until {self.expires_at}"
+
+    @classmethod
+    def get_duration(cls):
+        """How long a new hold lasts"""
+        return timedelta(minutes=getattr(settings, 'BOOKING_HOLD_MINUTES', 10))
+
+    def is_expired(self, now=None):
+        """Check if this hold has lapsed"""
+        return self.expires_at <= (now or timezone.now())
+
+    @classmethod
+    def place_hold(cls, place, user, start_time, end_time):
+        """
+        Reserve a window on a place for the checkout flow.
+        Returns (hold_obj, success, message)
+        """
+        from django.db import transaction
+
+        if end_time <= start_time:
+            return None, False, "End time must be after start time"
+
+        with transaction.atomic():
+            place.lock_for_update()
+
+            now = timezone.now()
+
+            # Clear out this place's lapsed holds while we hold its lock
+            cls.objects.filter(place=place).expired(now).delete()
+
+            is_available, reason = place.is_available(start_time, end_time, user=user)
+            if not is_available:
+                return None, False, reason
+
+            hold = cls.objects.create(
+                place=place,
+                user=user,
+                start_time=start_time,
+                end_time=end_time,
+                expires_at=now + cls.get_duration()
+            )
+
+        logger.info(f"User {user.id} placed hold {hold.id} on place {place.id}")
+
+        return hold, True, "Hold placed successfully"
+
+    def convert_to_booking(self):
+        """
+        Turn this hold into a booking in a single step.
+        Returns (booking_obj, success, message)
+        """
+        if self.is_expired():
+            return None, False, "Hold has expired"
+
+        return self.place.create_booking(
+            user=self.user,
+            start_datetime=self.start_time,
+            end_datetime=self.end_time,
+            hold=self
+        )
@@ -0,0 +1,8 @@
+from rest_framework import serializers
+from .models import BookingHold
+
+class BookingHoldSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BookingHold
+        fields = ['id', 'place', 'user', 'start_time', 'end_time', 'expires_at', 'created_at']
+        read_only_fields = ['id', 'user', 'expires_at', 'created_at']
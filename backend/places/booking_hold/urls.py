@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.create_hold, name='create-hold'),
+    path('<int:hold_id>/', views.hold_detail, name='hold-detail'),
+    path('<int:hold_id>/book/', views.book_hold, name='book-hold'),
+]
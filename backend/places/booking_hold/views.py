@@ -0,0 +1,100 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+import logging
+
+from .models import BookingHold
+from .serializers import BookingHoldSerializer
+from places.booking.models import Booking
+from places.booking.serializers import BookingSerializer
+from places.place.models import Place
+
+logger = logging.getLogger(__name__)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_hold(request):
+    """Reserve a time window on a parking space for a few minutes during checkout"""
+    place_id = request.data.get('place_id')
+    start_time_str = request.data.get('start_time')
+    end_time_str = request.data.get('end_time')
+
+    if not all([place_id, start_time_str, end_time_str]):
+        return Response(
+            {'error': 'place_id, start_time, and end_time are required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        place = Place.objects.get(id=place_id)
+
+        try:
+            start_time = Booking.parse_datetime(start_time_str)
+            end_time = Booking.parse_datetime(end_time_str)
+        except ValueError:
+            return Response(
+                {'error': 'Invalid datetime format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        hold, success, message = BookingHold.place_hold(place, request.user, start_time, end_time)
+
+        if success:
+            serializer = BookingHoldSerializer(hold)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        else:
+            return Response({'error': message}, status=status.HTTP_400_BAD_REQUEST)
+
+    except Place.DoesNotExist:
+        return Response(
+            {'error': 'Parking space not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        logger.error(f"Error creating hold: {str(e)}", exc_info=True)
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def hold_detail(request, hold_id):
+    """Get or release one of the current user's holds"""
+    try:
+        hold = BookingHold.objects.active().get(id=hold_id, user=request.user)
+    except BookingHold.DoesNotExist:
+        return Response(
+            {'error': 'Hold not found or has expired'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    if request.method == 'GET':
+        serializer = BookingHoldSerializer(hold)
+        return Response(serializer.data)
+
+    elif request.method == 'DELETE':
+        hold.delete()
+        return Response({'message': 'Hold released successfully'}, status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def book_hold(request, hold_id):
+    """Convert one of the current user's holds into a booking"""
+    try:
+        hold = BookingHold.objects.select_related('place__rate_table', 'user').get(id=hold_id, user=request.user)
+
+        booking, success, message = hold.convert_to_booking()
+
+        if success:
+            serializer = BookingSerializer(booking)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        else:
+            return Response({'error': message}, status=status.HTTP_400_BAD_REQUEST)
+
+    except BookingHold.DoesNotExist:
+        return Response(
+            {'error': 'Hold not found or has expired'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        logger.error(f"Error booking hold {hold_id}: {str(e)}", exc_info=True)
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
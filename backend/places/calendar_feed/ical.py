@@ -0,0 +1,367 @@
+"""
+Render a place's blocked periods as an iCalendar (RFC 5545) feed, one
+event at a time so the response can be streamed, and read the events of
+calendars kept elsewhere so they can be imported as blocked periods.
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import re
+
+from dateutil import rrule as dateutil_rrule
+
+PRODID = '-//Parkr//Availability//EN'
+
+# RRULE for each BlockedPeriod.RECURRING_PATTERNS entry
+RRULES = {
+    'daily': 'FREQ=DAILY',
+    'weekly': 'FREQ=WEEKLY',
+    'weekdays': 'FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR',
+    'weekends': 'FREQ=WEEKLY;BYDAY=SA,SU',
+}
+
+SUMMARIES = {
+    'owner-block': 'Blocked',
+    'maintenance': 'Maintenance',
+    'booking': 'Booked',
+}
+
+
+def escape_text(value):
+    """Escape a TEXT property value"""
+    return (
+        value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold(line):
+    """
+    Fold a content line into chunks of at most 75 octets, continuation lines
+    starting with a space, without splitting a UTF-8 character.
+    """
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + '\r\n'
+
+    chunks = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Back off to the start of a UTF-8 character
+        while cut < len(encoded) and encoded[cut] & 0xC0 == 0x80:
+            cut -= 1
+        chunks.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+        limit = 74  # Leave room for the leading space
+    return '\r\n '.join(chunks) + '\r\n'
+
+
+def format_datetime(moment):
+    """Format an aware datetime as a UTC DATE-TIME"""
+    return moment.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def first_occurrence(block):
+    """
+    The start of a recurring block's first occurrence. DTSTART must itself be
+    an occurrence of the RRULE, but a 'weekdays' or 'weekends' block may have
+    been created on a day its pattern skips.
+    """
+    start = block.start_datetime
+    for _ in range(7):
+        if block.recurring_pattern_applies(block.recurring_pattern, start.date(), block.start_datetime.date()):
+            return start
+        start += timedelta(days=1)
+    return start
+
+
+def event_lines(block, domain):
+    duration = block.end_datetime - block.start_datetime
+    if block.is_recurring and duration <= timedelta(0):
+        # The block's time of day runs past midnight
+        duration += timedelta(days=1)
+    start = first_occurrence(block) if block.is_recurring else block.start_datetime
+
+    yield 'BEGIN:VEVENT'
+    yield f'UID:blocked-period-{block.pk}@{domain}'
+    yield f'DTSTAMP:{format_datetime(block.updated_at)}'
+    yield f'LAST-MODIFIED:{format_datetime(block.updated_at)}'
+    yield f'DTSTART:{format_datetime(start)}'
+    yield f'DTEND:{format_datetime(start + duration)}'
+    if block.is_recurring:
+        rrule = RRULES[block.recurring_pattern]
+        if block.recurring_end_date:
+            # Occurrences run through recurring_end_date, in the block's timezone
+            until = datetime.combine(block.recurring_end_date, block.start_datetime.timetz())
+            rrule += f';UNTIL={format_datetime(until)}'
+        yield f'RRULE:{rrule}'
+    yield f'SUMMARY:{SUMMARIES.get(block.block_type, "Unavailable")}'
+    if block.reason and block.block_type != 'booking':
+        yield f'DESCRIPTION:{escape_text(block.reason)}'
+    yield 'TRANSP:OPAQUE'
+    yield 'END:VEVENT'
+
+
+def render_calendar(place, blocks, domain):
+    """
+    Yield the feed for place in chunks of folded CRLF-terminated lines, one
+    chunk per event. blocks is an iterable of the place's BlockedPeriods.
+    """
+    header = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(place.name)}',
+    ]
+    yield ''.join(fold(line) for line in header)
+
+    for block in blocks:
+        yield ''.join(fold(line) for line in event_lines(block, domain))
+
+    yield fold('END:VCALENDAR')
+
+
+# Recurrence rules that map onto a BlockedPeriod.RECURRING_PATTERNS entry,
+# keyed by (FREQ, BYDAY)
+NATIVE_PATTERNS = {
+    ('DAILY', None): 'daily',
+    ('WEEKLY', None): 'weekly',
+    ('WEEKLY', 'MO,TU,WE,TH,FR'): 'weekdays',
+    ('DAILY', 'MO,TU,WE,TH,FR'): 'weekdays',
+    ('WEEKLY', 'SA,SU'): 'weekends',
+    ('DAILY', 'SA,SU'): 'weekends',
+}
+
+DURATION_PATTERN = re.compile(
+    r'^(?P<sign>[+-])?P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?'
+    r'(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$'
+)
+
+
+def unescape_text(value):
+    """Undo escape_text"""
+    return re.sub(r'\\([\\;,nN])', lambda match: '\n' if match.group(1) in 'nN' else match.group(1), value)
+
+
+def parse_content_line(line):
+    """
+    Split a content line into (name, params, value). A colon inside a quoted
+    parameter value does not end the parameters.
+    """
+    quoted = False
+    for index, char in enumerate(line):
+        if char == '"':
+            quoted = not quoted
+        elif char == ':' and not quoted:
+            head, value = line[:index], line[index + 1:]
+            break
+    else:
+        raise ValueError(f"Invalid content line: {line[:50]}")
+
+    name, *raw_params = head.split(';')
+    params = {}
+    for param in raw_params:
+        key, _, param_value = param.partition('=')
+        params[key.upper()] = param_value.strip('"')
+    return name.upper(), params, value
+
+
+def parse_date_value(value, params):
+    """
+    Parse a DATE or DATE-TIME value into an aware datetime. Dates (all-day
+    events) start at midnight UTC; floating times are taken as UTC.
+    """
+    value = value.strip()
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        return datetime.combine(datetime.strptime(value, '%Y%m%d').date(), time.min, tzinfo=dt_timezone.utc)
+
+    if value.endswith('Z'):
+        return datetime.strptime(value, '%Y%m%dT%H%M%SZ').replace(tzinfo=dt_timezone.utc)
+
+    moment = datetime.strptime(value, '%Y%m%dT%H%M%S')
+    try:
+        tz = ZoneInfo(params['TZID']) if 'TZID' in params else dt_timezone.utc
+    except (ZoneInfoNotFoundError, ValueError):
+        tz = dt_timezone.utc
+    return moment.replace(tzinfo=tz)
+
+
+def parse_duration(value):
+    match = DURATION_PATTERN.match(value.strip())
+    if not match:
+        raise ValueError(f"Invalid duration: {value}")
+    duration = timedelta(**{
+        unit: int(match.group(unit) or 0) for unit in ('weeks', 'days', 'hours', 'minutes', 'seconds')
+    })
+    return -duration if match.group('sign') == '-' else duration
+
+
+def read_vevents(text):
+    """
+    Yield each VEVENT in text as a dict of property name -> list of
+    (params, value), skipping nested components such as VALARM.
+    """
+    lines = re.sub(r'\r?\n[ \t]', '', text).splitlines()
+    event = None
+    depth = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            name, params, value = parse_content_line(line)
+        except ValueError:
+            continue
+
+        if name == 'BEGIN':
+            if event is not None:
+                depth += 1
+            elif value.upper() == 'VEVENT':
+                event = {}
+        elif name == 'END':
+            if depth:
+                depth -= 1
+            elif event is not None and value.upper() == 'VEVENT':
+                yield event
+                event = None
+        elif event is not None and not depth:
+            event.setdefault(name, []).append((params, value))
+
+
+def native_recurrence(rule, start, end):
+    """
+    Get (recurring_pattern, recurring_end_date) if an RRULE can be stored as
+    a recurring BlockedPeriod, else None. Recurring blocks repeat at a fixed
+    UTC time of day for less than a day, so rules in other timezones (whose
+    UTC time shifts with daylight saving) or with intervals, counts or other
+    filters are expanded into single events instead.
+    """
+    if start.utcoffset() != timedelta(0) or end - start >= timedelta(days=1):
+        return None
+
+    parts = dict(part.split('=', 1) for part in rule.upper().split(';') if '=' in part)
+    until = parts.pop('UNTIL', None)
+    freq = parts.pop('FREQ', None)
+    byday = parts.pop('BYDAY', None)
+    parts.pop('WKST', None)
+    if parts.pop('INTERVAL', '1') != '1' or parts:
+        return None
+
+    pattern = NATIVE_PATTERNS.get((freq, byday))
+    if pattern is None:
+        return None
+
+    recurring_end_date = None
+    if until:
+        recurring_end_date = parse_date_value(until, {}).astimezone(dt_timezone.utc).date()
+    return pattern, recurring_end_date
+
+
+def expand_recurrence(props, start, duration, window_start, window_end):
+    """Get the starts of a recurring event's occurrences that overlap the window"""
+    ruleset = dateutil_rrule.rruleset()
+    for _, value in props.get('RRULE', []):
+        ruleset.rrule(dateutil_rrule.rrulestr(value, dtstart=start))
+    for params, value in props.get('RDATE', []):
+        for item in value.split(','):
+            ruleset.rdate(parse_date_value(item, params))
+    for params, value in props.get('EXDATE', []):
+        for item in value.split(','):
+            ruleset.exdate(parse_date_value(item, params))
+    return ruleset.between(window_start - duration, window_end, inc=True)
+
+
+def parse_events(text, now, horizon):
+    """
+    Read the busy time in an iCalendar body as blocked period fields.
+    Recurring events become one recurring entry when their rule maps onto a
+    BlockedPeriod pattern, and otherwise one entry per occurrence between now
+    and now + horizon, keyed "<UID>/<occurrence start>" so that a modified
+    occurrence (RECURRENCE-ID) replaces the one it overrides. Cancelled and
+    free (TRANSP:TRANSPARENT) events are skipped, as is anything over by now.
+
+    Returns:
+        dict of key -> dict with 'sequence', 'start_datetime', 'end_datetime',
+        'reason', 'is_recurring', 'recurring_pattern' and 'recurring_end_date'
+    """
+    masters = []
+    overrides = []
+    for props in read_vevents(text):
+        if 'UID' not in props or 'DTSTART' not in props:
+            continue
+        (overrides if 'RECURRENCE-ID' in props else masters).append(props)
+
+    overridden_uids = {props['UID'][0][1] for props in overrides}
+    window_end = now + horizon
+    events = {}
+
+    for props in masters + overrides:
+        uid = props['UID'][0][1].strip()
+        try:
+            params, value = props['DTSTART'][0]
+            start = parse_date_value(value, params)
+            if 'DTEND' in props:
+                end = parse_date_value(props['DTEND'][0][1], props['DTEND'][0][0])
+            elif 'DURATION' in props:
+                end = start + parse_duration(props['DURATION'][0][1])
+            elif params.get('VALUE') == 'DATE' or len(value.strip()) == 8:
+                end = start + timedelta(days=1)
+            else:
+                end = start
+            sequence = int(props.get('SEQUENCE', [({}, '0')])[0][1])
+        except (ValueError, KeyError):
+            continue
+
+        fields = {
+            'sequence': sequence,
+            'reason': unescape_text(props.get('SUMMARY', [({}, '')])[0][1]).strip()[:255],
+            'is_recurring': False,
+            'recurring_pattern': None,
+            'recurring_end_date': None,
+        }
+        cancelled = props.get('STATUS', [({}, '')])[0][1].upper() == 'CANCELLED'
+        free = props.get('TRANSP', [({}, '')])[0][1].upper() == 'TRANSPARENT'
+
+        if 'RECURRENCE-ID' in props:
+            try:
+                recurrence_id = parse_date_value(props['RECURRENCE-ID'][0][1], props['RECURRENCE-ID'][0][0])
+            except ValueError:
+                continue
+            key = f'{uid}/{format_datetime(recurrence_id)}'
+            events.pop(key, None)
+            if not (cancelled or free) and start < end and end > now and start < window_end:
+                events[key] = {**fields, 'start_datetime': start, 'end_datetime': end}
+            continue
+
+        if cancelled or free or end <= start:
+            continue
+
+        if 'RRULE' not in props and 'RDATE' not in props:
+            if end > now:
+                events[uid] = {**fields, 'start_datetime': start, 'end_datetime': end}
+            continue
+
+        native = None
+        if 'RRULE' in props and len(props['RRULE']) == 1 and uid not in overridden_uids \
+                and not any(name in props for name in ('RDATE', 'EXDATE')):
+            native = native_recurrence(props['RRULE'][0][1], start, end)
+        if native:
+            pattern, recurring_end_date = native
+            if recurring_end_date is None or recurring_end_date >= now.date():
+                events[uid] = {
+                    **fields, 'start_datetime': start, 'end_datetime': end, 'is_recurring': True,
+                    'recurring_pattern': pattern, 'recurring_end_date': recurring_end_date,
+                }
+            continue
+
+        try:
+            starts = expand_recurrence(props, start, end - start, now, window_end)
+        except (ValueError, TypeError):
+            continue
+        for occurrence in starts:
+            events[f'{uid}/{format_datetime(occurrence)}'] = {
+                **fields, 'start_datetime': occurrence, 'end_datetime': occurrence + (end - start),
+            }
+
+    return events
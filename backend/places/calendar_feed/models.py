@@ -0,0 +1,213 @@
+from django.db import models, transaction
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+from urllib.parse import urljoin, urlsplit
+import ipaddress
+import logging
+import socket
+
+import requests
+
+from .ical import parse_events
+
+logger = logging.getLogger(__name__)
+
+# BlockedPeriod fields an import keeps in step with the external calendar
+SYNCED_FIELDS = ('start_datetime', 'end_datetime', 'reason', 'is_recurring', 'recurring_pattern', 'recurring_end_date')
+
+
+class UnsafeCalendarURL(requests.RequestException):
+    """The calendar URL is not http(s) or points at a non-public address"""
+
+
+class CalendarTooLarge(requests.RequestException):
+    """The calendar body is larger than CALENDAR_IMPORT_MAX_BYTES"""
+
+
+def check_public_url(url):
+    """
+    Make sure url is http(s) and its host resolves only to public addresses,
+    so imports cannot be pointed at internal services or cloud metadata.
+    Raises UnsafeCalendarURL otherwise
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise UnsafeCalendarURL(f"Unsupported calendar URL: {url}")
+    try:
+        addresses = socket.getaddrinfo(parts.hostname, parts.port or 0, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError) as e:
+        raise UnsafeCalendarURL(f"Could not resolve {parts.hostname}: {e}")
+    for *_, sockaddr in addresses:
+        address = ipaddress.ip_address(sockaddr[0].split('%')[0])
+        if not address.is_global or address.is_multicast:
+            raise UnsafeCalendarURL(f"{parts.hostname} resolves to a non-public address")
+
+
+def fetch_calendar(url, headers, timeout, max_bytes, max_redirects=5):
+    """
+    GET a calendar from a public URL, checking every redirect target the
+    same way and reading at most max_bytes of body.
+    Returns (response, text), with text None for a 304
+    """
+    with requests.Session() as session:
+        for _ in range(max_redirects + 1):
+            check_public_url(url)
+            response = session.get(url, headers=headers, timeout=timeout, stream=True, allow_redirects=False)
+            if not response.is_redirect:
+                break
+            url = urljoin(url, response.headers['Location'])
+            response.close()
+        else:
+            raise requests.TooManyRedirects(f"More than {max_redirects} redirects")
+
+        with response:
+            if response.status_code == 304:
+                return response, None
+            response.raise_for_status()
+            chunks, size = [], 0
+            for chunk in response.iter_content(64 * 1024):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise CalendarTooLarge(f"Calendar is larger than {max_bytes} bytes")
+                chunks.append(chunk)
+
+    # iCalendar is UTF-8 unless the server says otherwise
+    charset = response.encoding if 'charset' in response.headers.get('Content-Type', '') else 'utf-8-sig'
+    return response, b''.join(chunks).decode(charset or 'utf-8-sig', errors='replace')
+
+
+class CalendarImport(models.Model):
+    """
+    An external calendar (Airbnb, Google, another parking site, ...) whose
+    busy time blocks a place. Each of its events is kept as an 'external'
+    BlockedPeriod identified by the event's UID, and every sync applies only
+    the differences since the last one.
+    """
+    place = models.ForeignKey('places.Place', on_delete=models.CASCADE, related_name='calendar_imports')
+    name = models.CharField(max_length=100, blank=True)
+    # Where the calendar is fetched from; blank for calendars uploaded as files
+    url = models.URLField(max_length=1000, blank=True)
+    # The ETag of the last fetched body, for conditional requests
+    etag = models.CharField(max_length=255, blank=True)
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        app_label = 'places'
+
+    def __str__(self):
+        return f"{self.name or self.url or 'Calendar'} for place {self.place_id}"
+
+    def delete(self, *args, **kwargs):
+        from places.blocked_period.models import BlockedPeriod
+        place_id = self.place_id
+        result = super().delete(*args, **kwargs)
+        BlockedPeriod.touch_calendars([place_id])
+        return result
+
+    def sync(self, body, now=None):
+        """
+        Bring this import's blocked periods in line with an iCalendar body.
+        Events are matched to blocks by UID; an event whose SEQUENCE is lower
+        than its block's is a stale copy and is ignored. Only new, changed and
+        removed events are written, with one bulk insert, update and delete, so
+        re-importing an unchanged calendar costs a single read.
+
+        Returns:
+            dict with the number of blocks 'created', 'updated' and 'deleted'
+        """
+        from places.blocked_period.models import BlockedPeriod
+
+        now = now or timezone.now()
+        horizon = timedelta(days=getattr(settings, 'CALENDAR_IMPORT_HORIZON_DAYS', 365))
+        batch_size = getattr(settings, 'CALENDAR_IMPORT_BATCH_SIZE', 500)
+        events = parse_events(body, now, horizon)
+
+        with transaction.atomic():
+            self.place.lock_for_update()
+
+            existing = {
+                row[1]: row for row in BlockedPeriod.objects.filter(calendar_import=self).values_list(
+                    'id', 'external_uid', 'external_sequence', *SYNCED_FIELDS
+                )
+            }
+
+            to_create = []
+            to_update = []
+            for uid, event in events.items():
+                fields = {field: event[field] for field in SYNCED_FIELDS}
+                row = existing.get(uid)
+                if row is None:
+                    to_create.append(BlockedPeriod(
+                        place_id=self.place_id, calendar_import=self, block_type='external',
+                        external_uid=uid, external_sequence=event['sequence'], **fields
+                    ))
+                    continue
+
+                block_id, _, sequence, *values = row
+                if event['sequence'] < sequence:
+                    continue
+                if event['sequence'] != sequence or tuple(fields.values()) != tuple(values):
+                    to_update.append(BlockedPeriod(id=block_id, external_sequence=event['sequence'], **fields))
+
+            deleted_ids = [row[0] for uid, row in existing.items() if uid not in events]
+
+            if deleted_ids:
+                BlockedPeriod.objects.filter(id__in=deleted_ids).delete()
+            if to_update:
+                BlockedPeriod.objects.bulk_update(
+                    to_update, ['external_sequence', *SYNCED_FIELDS], batch_size=batch_size
+                )
+            if to_create:
+                BlockedPeriod.objects.bulk_create(to_create, batch_size=batch_size)
+            if deleted_ids or to_update or to_create:
+                BlockedPeriod.touch_calendars([self.place_id])
+
+            self.last_synced_at = now
+            self.last_error = ''
+            self.save(update_fields=['last_synced_at', 'last_error'])
+
+        return {'created': len(to_create), 'updated': len(to_update), 'deleted': len(deleted_ids)}
+
+    def fetch_and_sync(self, now=None):
+        """
+        Download the calendar from url (public addresses only, see
+        fetch_calendar) and sync it. The request carries the
+        last ETag, and a 304 skips the sync, unless the last full sync is more
+        than a day old: recurring events are expanded only so far ahead, so
+        the window has to move forward even when the calendar does not change.
+
+        Returns:
+            sync() counts, or None if the calendar was not modified
+        """
+        now = now or timezone.now()
+        headers = {}
+        if self.etag and self.last_synced_at and now - self.last_synced_at < timedelta(days=1):
+            headers['If-None-Match'] = self.etag
+
+        try:
+            response, text = fetch_calendar(
+                self.url, headers,
+                timeout=getattr(settings, 'CALENDAR_IMPORT_TIMEOUT_SECONDS', 30),
+                max_bytes=getattr(settings, 'CALENDAR_IMPORT_MAX_BYTES', 5 * 1024 * 1024),
+            )
+        except requests.RequestException as e:
+            logger.warning(f"Fetching calendar import {self.pk} failed: {e}")
+            # Only a generic reason is shown to the host, not what the fetch ran into
+            if isinstance(e, UnsafeCalendarURL):
+                self.last_error = "The calendar URL must be a public http(s) address"
+            elif isinstance(e, CalendarTooLarge):
+                self.last_error = "The calendar is too large to import"
+            else:
+                self.last_error = "The calendar could not be fetched"
+            self.save(update_fields=['last_error'])
+            raise
+        if text is None:
+            return None
+
+        result = self.sync(text, now=now)
+        self.etag = response.headers.get('ETag', '')
+        self.save(update_fields=['etag'])
+        return result
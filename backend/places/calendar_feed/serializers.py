@@ -0,0 +1,13 @@
+from rest_framework import serializers
+from .models import CalendarImport
+
+class CalendarImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CalendarImport
+        fields = ['id', 'place', 'name', 'url', 'last_synced_at', 'last_error', 'created_at']
+        read_only_fields = ['id', 'place', 'last_synced_at', 'last_error', 'created_at']
+
+    def validate_url(self, value):
+        if value and not value.lower().startswith(('http://', 'https://')):
+            raise serializers.ValidationError("Calendar URL must use http or https")
+        return value
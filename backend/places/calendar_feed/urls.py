@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('<int:place_id>/', views.calendar_feed_url, name='calendar-feed-url'),
+    path('<int:place_id>/imports/', views.calendar_imports, name='calendar-imports'),
+    path('imports/<int:import_id>/', views.calendar_import_detail, name='calendar-import-detail'),
+    path('<str:token>.ics', views.calendar_feed, name='calendar-feed'),
+]
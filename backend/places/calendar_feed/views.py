@@ -0,0 +1,162 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from django.http import HttpResponseNotFound, HttpResponseNotModified, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_GET
+import logging
+
+import requests
+
+from .ical import render_calendar
+from .models import CalendarImport, UnsafeCalendarURL
+from .serializers import CalendarImportSerializer
+from places.blocked_period.models import BlockedPeriod
+from places.place.models import Place
+
+logger = logging.getLogger(__name__)
+
+@require_GET
+def calendar_feed(request, token):
+    """
+    iCalendar feed of a place's blocked periods and bookings, for calendar
+    apps that poll it. The secret token in the URL stands in for a login.
+    Supports If-None-Match: a poll with the current ETag costs one query and
+    gets a 304 back.
+    """
+    place = Place.objects.filter(calendar_token=token).only('id', 'name', 'calendar_version').first()
+    if place is None:
+        return HttpResponseNotFound()
+    
+    etag = f'"{place.pk}-{place.calendar_version}"'
+    if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+    if etag in if_none_match or '*' in if_none_match:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+    
+    # Read after the version, so a change made in between shows up here and
+    # the stale ETag just costs the client one extra download
+    blocks = BlockedPeriod.objects.filter(place=place).order_by('start_datetime', 'id').only(
+        'id', 'start_datetime', 'end_datetime', 'block_type', 'reason',
+        'is_recurring', 'recurring_pattern', 'recurring_end_date', 'updated_at'
+    ).iterator(chunk_size=getattr(settings, 'CALENDAR_FEED_CHUNK_SIZE', 500))
+    domain = getattr(settings, 'CALENDAR_FEED_UID_DOMAIN', 'parkr')
+    
+    response = StreamingHttpResponse(
+        render_calendar(place, blocks, domain), content_type='text/calendar; charset=utf-8'
+    )
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    response['Content-Disposition'] = f'inline; filename="place-{place.pk}.ics"'
+    return response
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def calendar_feed_url(request, place_id):
+    """
+    GET: Get the calendar feed URL for one of the current user's listings
+    POST: Replace the feed URL, cutting off everyone using the old one
+    """
+    try:
+        place = Place.objects.get(id=place_id)
+    except Place.DoesNotExist:
+        return Response({"error": "Listing not found"}, status=status.HTTP_404_NOT_FOUND)
+    
+    if place.owner_id != request.user.id:
+        return Response({"error": "You don't have permission to access this listing"},
+                        status=status.HTTP_403_FORBIDDEN)
+    
+    token = place.get_calendar_token(rotate=request.method == 'POST')
+    return Response({
+        'url': request.build_absolute_uri(reverse('calendar-feed', args=[token])),
+    })
+
+def sync_import(request, calendar_import):
+    """
+    Sync an import from the uploaded 'file' if there is one, else from its
+    URL. Returns (counts, None), or (None, error_response)
+    """
+    upload = request.FILES.get('file')
+    try:
+        if upload is not None:
+            return calendar_import.sync(upload.read().decode('utf-8-sig')), None
+        if calendar_import.url:
+            return calendar_import.fetch_and_sync(), None
+    except UnicodeDecodeError:
+        return None, Response({'error': 'Calendar file must be UTF-8 text'}, status=status.HTTP_400_BAD_REQUEST)
+    except UnsafeCalendarURL:
+        return None, Response({'error': calendar_import.last_error}, status=status.HTTP_400_BAD_REQUEST)
+    except requests.RequestException:
+        return None, Response({'error': calendar_import.last_error}, status=status.HTTP_502_BAD_GATEWAY)
+    return None, Response({'error': 'Provide a calendar url or file'}, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def calendar_imports(request, place_id):
+    """
+    GET: List the external calendars imported into one of the current user's listings
+    POST: Import an external calendar, from a url (synced periodically) or an uploaded file
+    """
+    try:
+        place = Place.objects.get(id=place_id)
+    except Place.DoesNotExist:
+        return Response({"error": "Listing not found"}, status=status.HTTP_404_NOT_FOUND)
+    
+    if place.owner_id != request.user.id:
+        return Response({"error": "You don't have permission to access this listing"},
+                        status=status.HTTP_403_FORBIDDEN)
+    
+    if request.method == 'GET':
+        serializer = CalendarImportSerializer(place.calendar_imports.order_by('id'), many=True)
+        return Response(serializer.data)
+    
+    serializer = CalendarImportSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    if not serializer.validated_data.get('url') and 'file' not in request.FILES:
+        return Response({'error': 'Provide a calendar url or file'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    calendar_import = serializer.save(place=place)
+    counts, error_response = sync_import(request, calendar_import)
+    if error_response is not None:
+        calendar_import.delete()
+        return error_response
+    
+    return Response(
+        {**CalendarImportSerializer(calendar_import).data, **counts},
+        status=status.HTTP_201_CREATED
+    )
+
+@api_view(['POST', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def calendar_import_detail(request, import_id):
+    """
+    POST: Sync an import now, from its url or an uploaded file
+    DELETE: Stop importing a calendar and remove its blocked periods
+    """
+    try:
+        calendar_import = CalendarImport.objects.select_related('place').get(id=import_id)
+    except CalendarImport.DoesNotExist:
+        return Response({"error": "Calendar import not found"}, status=status.HTTP_404_NOT_FOUND)
+    
+    if calendar_import.place.owner_id != request.user.id:
+        return Response({"error": "You don't have permission to access this listing"},
+                        status=status.HTTP_403_FORBIDDEN)
+    
+    if request.method == 'DELETE':
+        calendar_import.delete()
+        return Response({'message': 'Calendar import deleted successfully'}, status=status.HTTP_200_OK)
+    
+    counts, error_response = sync_import(request, calendar_import)
+    if error_response is not None:
+        return error_response
+    
+    return Response({
+        **CalendarImportSerializer(calendar_import).data,
+        **(counts or {'created': 0, 'updated': 0, 'deleted': 0}),
+        'not_modified': counts is None,
+    })
@@ -0,0 +1,69 @@
+from functools import wraps
+from rest_framework import status
+from rest_framework.response import Response
+import logging
+
+from .models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'Idempotency-Key'
+
+
+def idempotent(view_func):
+    """
+    Make a POST view safe to retry with an Idempotency-Key header.
+
+    The first request with a key runs the view and stores its response; later
+    requests with the same key and payload get that response back without the
+    view running again. Duplicates that arrive while the first is still running
+    get a 409 straight away, and take the key over once its lease runs out if
+    the first never finished. Server errors release the key so the client can
+    retry.
+
+    Apply below @api_view/@permission_classes so request is a DRF Request.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or request.method != 'POST':
+            return view_func(request, *args, **kwargs)
+
+        if len(key) > 255:
+            return Response(
+                {'error': f'{HEADER} must be at most 255 characters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fingerprint = IdempotencyKey.fingerprint_request(request)
+        record, created = IdempotencyKey.claim(request.user, key, fingerprint)
+
+        if not created:
+            if record.fingerprint != fingerprint:
+                return Response(
+                    {'error': f'{HEADER} has already been used for a different request'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if record.status != 'completed':
+                return Response(
+                    {'error': f'A request with this {HEADER} is still in progress'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            response = Response(record.response_body, status=record.response_status)
+            response['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = view_func(request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+
+        if response.status_code >= 500:
+            record.delete()
+        else:
+            record.complete(response)
+
+        return response
+
+    return wrapper
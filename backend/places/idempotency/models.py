@@ -0,0 +1,117 @@
+from django.db import models, IntegrityError, transaction
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyKey(models.Model):
+    """
+    A client-supplied Idempotency-Key together with the fingerprint of the
+    request that first used it and, once that request finishes, its response.
+    Keys expire after IDEMPOTENCY_KEY_TTL_HOURS and are then free for reuse.
+    An in-progress key is leased for IDEMPOTENCY_LOCK_SECONDS, after which a
+    retry may take it over from a request that died without releasing it.
+    """
+    STATUS_CHOICES = (
+        ('in_progress', 'In Progress'),
+        ('completed', 'Completed'),
+    )
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='in_progress')
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    locked_until = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key_per_user'),
+        ]
+        app_label = 'places'
+
+    def __str__(self):
+        return f"{self.key} ({self.get_status_display()})"
+
+    @staticmethod
+    def fingerprint_request(request):
+        """
+        Hash the method, path and payload of a DRF request. Uploaded files are
+        represented by name and size so large bodies are never hashed.
+        """
+        def normalize(value):
+            if hasattr(value, 'read'):
+                return f"<file {getattr(value, 'name', '')} {getattr(value, 'size', '')}>"
+            return value
+
+        data = request.data
+        if hasattr(data, 'lists'):
+            payload = sorted([key, [normalize(value) for value in values]] for key, values in data.lists())
+        else:
+            payload = data
+
+        serialized = json.dumps([request.method, request.path, payload], sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode()).hexdigest()
+
+    @classmethod
+    def claim(cls, user, key, fingerprint):
+        """
+        Register a key before running the request it guards. The row is
+        committed straight away so concurrent duplicates can see it. A
+        matching in-progress key whose lease has run out is taken over.
+
+        Returns:
+            (record, created) - created is False if the key was already in use
+        """
+        now = timezone.now()
+        ttl = timedelta(hours=getattr(settings, 'IDEMPOTENCY_KEY_TTL_HOURS', 24))
+        locked_until = now + timedelta(seconds=getattr(settings, 'IDEMPOTENCY_LOCK_SECONDS', 60))
+
+        while True:
+            try:
+                with transaction.atomic():
+                    record = cls.objects.create(user=user, key=key, fingerprint=fingerprint,
+                                                expires_at=now + ttl, locked_until=locked_until)
+                return record, True
+            except IntegrityError:
+                existing = cls.objects.filter(user=user, key=key).first()
+                if existing is None:
+                    # Released between the insert and the lookup; try again
+                    continue
+                if existing.expires_at <= now:
+                    # The old use of this key has expired; free it and try again
+                    cls.objects.filter(pk=existing.pk, expires_at__lte=now).delete()
+                    continue
+                if existing.status != 'in_progress' or existing.fingerprint != fingerprint or (
+                        existing.locked_until and existing.locked_until > now):
+                    return existing, False
+                # The request holding the key stopped without finishing; only
+                # one retry wins the takeover
+                taken = cls.objects.filter(
+                    pk=existing.pk, status='in_progress', locked_until=existing.locked_until
+                ).update(locked_until=locked_until)
+                if taken:
+                    existing.locked_until = locked_until
+                    return existing, True
+
+    def complete(self, response):
+        """Store the response so replays can return it"""
+        self.status = 'completed'
+        self.response_status = response.status_code
+        self.response_body = json.loads(json.dumps(response.data, default=str))
+        self.locked_until = None
+        self.save(update_fields=['status', 'response_status', 'response_body', 'locked_until'])
+
+    @classmethod
+    def purge_expired(cls, now=None):
+        """Delete keys past their TTL. Returns the number deleted"""
+        deleted, _ = cls.objects.filter(expires_at__lte=now or timezone.now()).delete()
+        return deleted
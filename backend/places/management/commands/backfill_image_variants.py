@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from places.place_image.models import PlaceImage
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the resized WebP/JPEG copies of listing photos that do not "
+        "have them yet, such as those uploaded before variants existed. Queues "
+        "background jobs by default; --inline generates them here instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--place', type=int, action='append', dest='places',
+                            help='Only this place (may be repeated)')
+        parser.add_argument('--batch-size', type=int, default=20, help='Images per queued job')
+        parser.add_argument('--all', action='store_true', help='Regenerate images that already have variants')
+        parser.add_argument('--inline', action='store_true', help='Generate the variants in this process')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        images = PlaceImage.objects.exclude(image_key='')
+        if options['places']:
+            images = images.filter(place_id__in=options['places'])
+        if not options['all']:
+            images = images.filter(variants={})
+
+        image_ids = list(images.order_by('id').values_list('id', flat=True))
+        batch_size = options['batch_size']
+        for i in range(0, len(image_ids), batch_size):
+            batch = image_ids[i:i + batch_size]
+            if options['inline']:
+                PlaceImage.generate_variants_for(batch)
+            else:
+                PlaceImage.queue_variants(batch)
+
+        elapsed = time.perf_counter() - started
+        action = 'generated variants for' if options['inline'] else 'queued'
+        self.stdout.write(f"{action} {len(image_ids)} image(s) in {elapsed:.2f}s")
@@ -0,0 +1,130 @@
+import threading
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from places.booking.models import Booking
+from places.place.models import Place
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer Place.create_booking from parallel threads, once against a single "
+        "place and once spread across many places, and report successful "
+        "bookings/sec and the number of double bookings (which must be zero)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Number of concurrent booking threads')
+        parser.add_argument('--attempts', type=int, default=25, help='Booking attempts per thread')
+        parser.add_argument('--places', type=int, default=None,
+                            help='Places used by the many-places run (default: one per thread)')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated users, places and bookings')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.settings_dict['NAME'] in (':memory:', ''):
+            raise CommandError("Threads cannot share an in-memory SQLite database; run against Postgres")
+
+        threads = options['threads']
+        attempts = options['attempts']
+        place_count = options['places'] or threads
+
+        run_id = uuid.uuid4().hex[:8]
+        owner = User.objects.create_user(email=f"bench-owner-{run_id}@example.com", password=None)
+        bookers = [
+            User.objects.create_user(email=f"bench-booker-{run_id}-{i}@example.com", password=None)
+            for i in range(threads)
+        ]
+        places = [
+            Place.objects.create(
+                owner=owner,
+                name=f"Bench place {run_id}-{i}",
+                address='1 Bench St',
+                city='Bench City',
+                state='BC',
+                zip_code='00000',
+                price_per_hour=Decimal('5.00'),
+            )
+            for i in range(max(place_count, 1))
+        ]
+
+        try:
+            # Every thread asks for the same windows on one place: at most one
+            # booking per window can win
+            self._run('single place', bookers, lambda i: places[0], attempts)
+            # Threads are spread across places, so they should rarely contend
+            self._run('many places', bookers, lambda i: places[i % len(places)], attempts)
+        finally:
+            if not options['keep']:
+                Place.objects.filter(pk__in=[p.pk for p in places]).delete()
+                User.objects.filter(pk__in=[u.pk for u in bookers + [owner]]).delete()
+
+    def _run(self, label, bookers, place_for_thread, attempts):
+        # Start far enough out that the windows never collide with other runs
+        base = timezone.now().replace(microsecond=0) + timedelta(days=365 + uuid.uuid4().int % 3650)
+        counts = {'success': 0, 'rejected': 0, 'errors': 0}
+        lock = threading.Lock()
+        barrier = threading.Barrier(len(bookers))
+
+        def worker(index):
+            place = Place.objects.get(pk=place_for_thread(index).pk)
+            local = {'success': 0, 'rejected': 0, 'errors': 0}
+            barrier.wait()
+            try:
+                for attempt in range(attempts):
+                    start = base + timedelta(hours=attempt)
+                    try:
+                        _, success, _ = place.create_booking(
+                            user=bookers[index],
+                            start_datetime=start,
+                            end_datetime=start + timedelta(hours=1),
+                        )
+                        local['success' if success else 'rejected'] += 1
+                    except Exception:
+                        local['errors'] += 1
+            finally:
+                connections.close_all()
+                with lock:
+                    for key, value in local.items():
+                        counts[key] += value
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(len(bookers))]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        place_ids = {place_for_thread(i).pk for i in range(len(bookers))}
+        double_bookings = self._count_double_bookings(place_ids)
+
+        self.stdout.write(
+            f"{label}: {len(bookers)} threads x {attempts} attempts across {len(place_ids)} place(s) "
+            f"in {elapsed:.2f}s"
+        )
+        self.stdout.write(
+            f"  successful: {counts['success']} ({counts['success'] / elapsed:.1f} bookings/sec), "
+            f"rejected: {counts['rejected']}, errors: {counts['errors']}"
+        )
+        style = self.style.SUCCESS if double_bookings == 0 else self.style.ERROR
+        self.stdout.write(style(f"  double bookings: {double_bookings}"))
+
+    def _count_double_bookings(self, place_ids):
+        """Count active bookings that overlap another active booking for the same place"""
+        active = Booking.objects.filter(place_id__in=place_ids, status__in=Booking.ACTIVE_STATUSES)
+        overlapping = active.filter(
+            place_id=OuterRef('place_id'),
+            start_time__lt=OuterRef('end_time'),
+            end_time__gt=OuterRef('start_time'),
+        ).exclude(pk=OuterRef('pk'))
+        return active.filter(Exists(overlapping)).count()
@@ -0,0 +1,103 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from places.blocked_period.models import BlockedPeriod
+from places.place.models import Place
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Grow one place's blocked periods through increasing sizes and time the "
+        "availability overlap query at each, using the range filter (GiST-backed "
+        "on Postgres) and the plain start/end comparisons it replaced. Prints the "
+        "query plan on Postgres."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,50000',
+                            help='Comma-separated block counts to measure at')
+        parser.add_argument('--queries', type=int, default=200, help='Queries timed per size and variant')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated user, place and blocks')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted(int(size) for size in options['sizes'].split(','))
+        except ValueError:
+            raise CommandError("--sizes must be a comma-separated list of integers")
+
+        run_id = uuid.uuid4().hex[:8]
+        owner = User.objects.create_user(email=f"bench-owner-{run_id}@example.com", password=None)
+        place = Place.objects.create(
+            owner=owner,
+            name=f"Bench place {run_id}",
+            address='1 Bench St',
+            city='Bench City',
+            state='BC',
+            zip_code='00000',
+            price_per_hour=Decimal('5.00'),
+        )
+        base = timezone.now().replace(microsecond=0, second=0, minute=0) + timedelta(days=365)
+
+        try:
+            created = 0
+            for size in sizes:
+                # One-hour blocks every two hours, appended to the ones already there
+                BlockedPeriod.objects.bulk_create([
+                    BlockedPeriod(
+                        place=place,
+                        start_datetime=base + timedelta(hours=2 * n),
+                        end_datetime=base + timedelta(hours=2 * n + 1),
+                        block_type='owner-block',
+                    )
+                    for n in range(created, size)
+                ], batch_size=5000)
+                created = size
+                if connection.vendor == 'postgresql':
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"ANALYZE {BlockedPeriod._meta.db_table}")
+
+                span_hours = 2 * size
+                windows = []
+                for _ in range(options['queries']):
+                    start = base + timedelta(hours=random.uniform(0, span_hours))
+                    windows.append((start, start + timedelta(hours=3)))
+
+                ranged = self._time(windows, lambda start, end: BlockedPeriod.objects.filter(place=place).filter(
+                    BlockedPeriod.overlapping(start, end, place_id=place.pk) | Q(is_recurring=True)
+                ))
+                bounds = self._time(windows, lambda start, end: BlockedPeriod.objects.filter(place=place).filter(
+                    Q(start_datetime__lt=end, end_datetime__gt=start) | Q(is_recurring=True)
+                ))
+                self.stdout.write(
+                    f"{size:>8} blocks: range filter {ranged:.3f} ms/query, start/end comparisons {bounds:.3f} ms/query"
+                )
+
+                if connection.vendor == 'postgresql':
+                    start, end = windows[0]
+                    plan = BlockedPeriod.objects.filter(place=place).filter(
+                        BlockedPeriod.overlapping(start, end, place_id=place.pk) | Q(is_recurring=True)
+                    ).explain()
+                    for line in plan.splitlines():
+                        self.stdout.write(f"    {line}")
+        finally:
+            if not options['keep']:
+                place.delete()
+                owner.delete()
+
+    def _time(self, windows, make_queryset):
+        """Average milliseconds to fetch each window's blocks"""
+        started = time.perf_counter()
+        for start, end in windows:
+            list(make_queryset(start, end))
+        return (time.perf_counter() - started) * 1000 / len(windows)
@@ -0,0 +1,60 @@
+import os
+import time
+import tracemalloc
+import uuid
+
+import boto3
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+
+from places.s3_service import S3Service
+from places.util.local_s3 import LocalS3
+
+MB = 1024 * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Upload files of increasing size through S3Service.upload_file and report "
+        "the peak Python memory allocated during each upload. Runs against an "
+        "in-process S3 stand-in unless --bucket is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1,16,64,256', help='Comma-separated file sizes in MB')
+        parser.add_argument('--bucket', help='Upload to this bucket (with the configured credentials) instead')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError("--sizes must be a comma-separated list of integers")
+
+        service = S3Service(bucket_name=options['bucket'] or 'bench-bucket')
+        if not options['bucket']:
+            service.client = boto3.client('s3', region_name=service.region,
+                                          aws_access_key_id='bench', aws_secret_access_key='bench')
+            LocalS3(service.client)
+
+        directory = f"bench/{uuid.uuid4().hex[:8]}"
+        for size in sizes:
+            upload = TemporaryUploadedFile(f'bench-{size}mb.bin', 'application/octet-stream', size * MB, None)
+            try:
+                block = os.urandom(MB)
+                for _ in range(size):
+                    upload.write(block)
+                upload.seek(0)
+
+                tracemalloc.start()
+                started = time.perf_counter()
+                key = service.upload_file(upload, directory=directory)
+                elapsed = time.perf_counter() - started
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                self.stdout.write(
+                    f"{size:>6} MB file: peak {peak / MB:.1f} MB allocated, {elapsed:.2f}s"
+                )
+                service.delete_file(key)
+            finally:
+                upload.close()
@@ -0,0 +1,72 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from places.blocked_period.models import BlockedPeriod
+
+
+def get_table_size():
+    """
+    Rows in the blocked periods table and, on Postgres, the bytes taken by
+    the table and by its indexes (None elsewhere)
+    """
+    table = BlockedPeriod._meta.db_table
+    size = {'rows': BlockedPeriod.objects.count(), 'table_bytes': None, 'index_bytes': None}
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_table_size(%s), pg_indexes_size(%s)", [table, table])
+            size['table_bytes'], size['index_bytes'] = cursor.fetchone()
+    return size
+
+
+def format_bytes(value):
+    return 'n/a' if value is None else f"{value / 1024:.0f} KiB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete blocked periods that ended before the retention horizon and merge "
+        "overlapping or adjacent owner and maintenance blocks, in chunks. Reports "
+        "the rows and (on Postgres) the table and index space reclaimed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days', type=float,
+            default=getattr(settings, 'BLOCKED_PERIOD_RETENTION_DAYS', 90),
+            help='Delete blocks that ended more than this many days ago'
+        )
+        parser.add_argument('--place', type=int, action='append', dest='places',
+                            help='Only compact this place (may be repeated); the purge always covers every place')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Blocks deleted per transaction')
+        parser.add_argument('--reindex', action='store_true',
+                            help='Rebuild the indexes afterwards to return their space (Postgres only)')
+
+    def handle(self, *args, **options):
+        size_before = get_table_size()
+
+        started = time.perf_counter()
+        horizon = timezone.now() - timedelta(days=options['retention_days'])
+        purged = BlockedPeriod.purge_ended(horizon, chunk_size=options['chunk_size'])
+        self.stdout.write(f"purged: {purged} block(s) ended before {horizon:%Y-%m-%d} "
+                          f"in {time.perf_counter() - started:.2f}s")
+
+        started = time.perf_counter()
+        merged, into = BlockedPeriod.compact(place_ids=options['places'])
+        self.stdout.write(f"compacted: {merged} block(s) into {into} in {time.perf_counter() - started:.2f}s")
+
+        if options['reindex'] and connection.vendor == 'postgresql':
+            # Deleted entries only free index pages for reuse; a rebuild gives them back
+            with connection.cursor() as cursor:
+                cursor.execute(f"REINDEX TABLE CONCURRENTLY {connection.ops.quote_name(BlockedPeriod._meta.db_table)}")
+
+        size_after = get_table_size()
+        self.stdout.write(
+            f"rows: {size_before['rows']} -> {size_after['rows']}, "
+            f"table: {format_bytes(size_before['table_bytes'])} -> {format_bytes(size_after['table_bytes'])}, "
+            f"indexes: {format_bytes(size_before['index_bytes'])} -> {format_bytes(size_after['index_bytes'])}"
+        )
@@ -0,0 +1,37 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from places.booking.models import Booking
+
+
+class Command(BaseCommand):
+    help = (
+        "Complete confirmed bookings that have ended and cancel pending bookings "
+        "that were never confirmed, in chunked set-based updates. Meant to be run "
+        "periodically (e.g. from cron every few minutes)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pending-hours', type=float,
+            default=getattr(settings, 'PENDING_BOOKING_EXPIRY_HOURS', 24),
+            help='Cancel pending bookings older than this many hours'
+        )
+        parser.add_argument('--chunk-size', type=int, default=500, help='Bookings updated per transaction')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        pending_ttl = timedelta(hours=options['pending_hours'])
+
+        self._report('completed', lambda: Booking.complete_finished(chunk_size=chunk_size))
+        self._report('cancelled', lambda: Booking.expire_pending(pending_ttl, chunk_size=chunk_size))
+
+    def _report(self, label, transition):
+        started = time.perf_counter()
+        count = transition()
+        elapsed = time.perf_counter() - started
+        rate = count / elapsed if elapsed > 0 else 0
+        self.stdout.write(f"{label}: {count} booking(s) in {elapsed:.2f}s ({rate:.0f} rows/sec)")
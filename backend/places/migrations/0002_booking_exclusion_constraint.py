@@ -0,0 +1,40 @@
+from django.db import migrations
+
+
+# GiST over an int8range of the place id avoids needing the btree_gist
+# extension for the equality part of the constraint.
+CREATE_CONSTRAINT = """
+ALTER TABLE places_booking
+ADD CONSTRAINT places_booking_no_overlapping_active
+EXCLUDE USING gist (
+    int8range(place_id, place_id, '[]') WITH &&,
+    tstzrange(start_time, end_time, '[)') WITH &&
+)
+WHERE (status IN ('pending', 'confirmed'))
+"""
+
+DROP_CONSTRAINT = """
+ALTER TABLE places_booking
+DROP CONSTRAINT IF EXISTS places_booking_no_overlapping_active
+"""
+
+
+def add_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_CONSTRAINT)
+
+
+def remove_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_CONSTRAINT)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_exclusion_constraint, remove_exclusion_constraint),
+    ]
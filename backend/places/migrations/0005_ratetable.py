@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:58
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0004_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateTable',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('daily_cap', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('weekend_multiplier', models.DecimalField(decimal_places=2, default=Decimal('1.00'), max_digits=5)),
+                ('night_multiplier', models.DecimalField(decimal_places=2, default=Decimal('1.00'), max_digits=5)),
+                ('night_start_hour', models.PositiveSmallIntegerField(default=22)),
+                ('night_end_hour', models.PositiveSmallIntegerField(default=6)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('place', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rate_table', to='places.place')),
+            ],
+        ),
+    ]
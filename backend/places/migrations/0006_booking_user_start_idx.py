@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0005_ratetable'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'start_time', 'id'], name='booking_user_start_idx'),
+        ),
+    ]
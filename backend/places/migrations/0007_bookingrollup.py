@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0006_booking_user_start_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('booked_minutes', models.IntegerField(default=0)),
+                ('revenue_cents', models.BigIntegerField(default=0)),
+                ('bookings_count', models.IntegerField(default=0)),
+                ('place', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_rollups', to='places.place')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('place', 'day'), name='unique_booking_rollup_per_place_day')],
+            },
+        ),
+    ]
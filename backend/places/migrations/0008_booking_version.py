@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0007_bookingrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
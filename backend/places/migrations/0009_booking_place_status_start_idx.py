@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0008_booking_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['place', 'status', 'start_time'], name='booking_place_status_start_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0009_booking_place_status_start_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='calendar_token',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='place',
+            name='calendar_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0010_place_calendar_feed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blockedperiod',
+            name='external_sequence',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='blockedperiod',
+            name='external_uid',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='blockedperiod',
+            name='block_type',
+            field=models.CharField(choices=[('owner-block', 'Owner Block'), ('maintenance', 'Maintenance'), ('booking', 'Booking'), ('external', 'External Calendar')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='CalendarImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=100)),
+                ('url', models.URLField(blank=True, max_length=1000)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('place', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='calendar_imports', to='places.place')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='blockedperiod',
+            name='calendar_import',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='blocked_periods', to='places.calendarimport'),
+        ),
+        migrations.AddConstraint(
+            model_name='blockedperiod',
+            constraint=models.UniqueConstraint(condition=models.Q(('calendar_import__isnull', False)), fields=('calendar_import', 'external_uid'), name='unique_external_uid_per_import'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:24
+
+import django.contrib.postgres.fields.ranges
+import places.util.range_utils
+from django.db import migrations, models
+
+
+# Each table gets a stored range of its period, kept up to date by the
+# database itself (a tstzrange on Postgres), and on Postgres a GiST index over
+# (place, period) so overlap queries (period && tstzrange(...)) find one
+# place's rows without scanning the rest. As in 0002, int8range(place_id)
+# stands in for btree_gist.
+TABLES = ['places_blockedperiod', 'places_booking']
+
+
+def add_range_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in TABLES:
+        schema_editor.execute(
+            f"CREATE INDEX {table}_place_period_gist ON {table} "
+            f"USING gist (int8range(place_id, place_id, '[]'), period)"
+        )
+
+
+def remove_range_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in TABLES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {table}_place_period_gist")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0011_calendarimport'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blockedperiod',
+            index=models.Index(condition=models.Q(('is_recurring', True)), fields=['place'], name='blocked_period_recurring_idx'),
+        ),
+        migrations.AddField(
+            model_name='blockedperiod',
+            name='period',
+            field=models.GeneratedField(db_persist=True, expression=places.util.range_utils.PeriodRange('start_datetime', 'end_datetime'), output_field=django.contrib.postgres.fields.ranges.DateTimeRangeField()),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='period',
+            field=models.GeneratedField(db_persist=True, expression=places.util.range_utils.PeriodRange('start_time', 'end_time'), output_field=django.contrib.postgres.fields.ranges.DateTimeRangeField()),
+        ),
+        migrations.RunPython(add_range_indexes, remove_range_indexes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0012_range_overlap_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='placeimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
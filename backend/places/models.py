@@ -0,0 +1,11 @@
+# The app's models live in per-feature packages. Import them all here so
+# Django registers every one when the app loads, whatever is imported first.
+from places.place.models import Place  # noqa: F401
+from places.booking.models import Booking  # noqa: F401
+from places.blocked_period.models import BlockedPeriod  # noqa: F401
+from places.place_image.models import PlaceImage  # noqa: F401
+from places.booking_hold.models import BookingHold  # noqa: F401
+from places.pricing.models import RateTable  # noqa: F401
+from places.analytics.models import BookingRollup  # noqa: F401
+from places.idempotency.models import IdempotencyKey  # noqa: F401
+from places.calendar_feed.models import CalendarImport  # noqa: F401
@@ -1,12 +1,16 @@
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
-from decimal import Decimal
+from django.db import transaction, IntegrityError
 from datetime import datetime, timedelta
 import logging
+import secrets
 
 logger = logging.getLogger(__name__)
 
+# Postgres exclusion constraint on overlapping active bookings (migration 0002)
+BOOKING_OVERLAP_CONSTRAINT = 'places_booking_no_overlapping_active'
+
 class Place(models.Model):
     """Model for driveway/parking space listings"""
     # Using default AutoField for id (Django will create this automatically)
@@ -22,6 +26,10 @@ class Place(models.Model):
     price_per_hour = models.DecimalField(max_digits=10, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Bumped whenever this place's blocked periods change; the calendar feed's ETag
+    calendar_version = models.PositiveIntegerField(default=0)
+    # Secret in the calendar feed URL, issued on first use
+    calendar_token = models.CharField(max_length=64, unique=True, null=True, blank=True)
 
     class Meta:
         ordering = ['-created_at']
@@ -30,6 +38,25 @@ class Place(models.Model):
     def __str__(self):
         return self.name
     
+    @classmethod
+    def bump_calendar_version(cls, place_ids):
+        """
+        Mark the calendars of the given places (IDs or a values queryset of
+        IDs) as changed, so feed clients holding the old ETag fetch them again.
+        """
+        cls.objects.filter(pk__in=place_ids).update(calendar_version=models.F('calendar_version') + 1)
+    
+    def get_calendar_token(self, rotate=False):
+        """
+        Get the secret that authenticates this place's calendar feed, issuing
+        one if it has none yet. rotate=True replaces it, cutting off every
+        client using the old feed URL.
+        """
+        if rotate or not self.calendar_token:
+            self.calendar_token = secrets.token_urlsafe(32)
+            self.save(update_fields=['calendar_token'])
+        return self.calendar_token
+    
     @classmethod
     def find_by_location(cls, latitude, longitude, latitude_range, longitude_range):
         """Find places within a geographic bounding box"""
@@ -43,99 +70,270 @@ class Place(models.Model):
             longitude__range=(min_longitude, max_longitude)
         )
     
-    def is_available(self, start_datetime, end_datetime):
+    def is_available(self, start_datetime, end_datetime, ignore_hold=None, user=None):
         """
         Check if this place is available during the specified time period.
+        Active checkout holds count as unavailable, except ignore_hold; when
+        user holds the window, the reason points them at their hold.
         Returns (bool, str) - (is_available, reason_if_not_available)
         """
         # Validate input
         if end_datetime <= start_datetime:
             return False, "End time must be after start time"
-            
-        # Check for any overlapping blocked periods
+        
+        blocks, holds = self.get_blocking_periods(start_datetime, end_datetime, ignore_hold=ignore_hold)
+        reason = self.find_conflict(blocks, holds, start_datetime, end_datetime, user=user)
+        
+        if reason:
+            return False, reason
+        
+        return True, "Space is available"
+    
+    def get_blocking_periods(self, start_datetime, end_datetime, ignore_hold=None):
+        """
+        Load everything that can make part of the given time period unavailable:
+        overlapping and recurring blocked periods plus active checkout holds.
+        Returns (blocks, holds) as lists, for use with find_conflict
+        """
+        from django.db.models import Q
         from places.blocked_period.models import BlockedPeriod
-        overlapping_blocks = BlockedPeriod.objects.filter(
+        from places.booking_hold.models import BookingHold
+        
+        blocks = list(BlockedPeriod.objects.filter(place=self).filter(
+            BlockedPeriod.overlapping(start_datetime, end_datetime, place_id=self.pk) | Q(is_recurring=True)
+        ))
+        
+        holds = BookingHold.objects.active().filter(
             place=self,
-            start_datetime__lt=end_datetime,
-            end_datetime__gt=start_datetime
+            start_time__lt=end_datetime,
+            end_time__gt=start_datetime
         )
+        if ignore_hold is not None:
+            holds = holds.exclude(pk=ignore_hold.pk)
         
-        if overlapping_blocks.exists():
-            block = overlapping_blocks.first()
-            return False, f"Space is unavailable: {block.reason or block.get_block_type_display()}"
+        return blocks, list(holds)
+    
+    @staticmethod
+    def find_conflict(blocks, holds, start_datetime, end_datetime, user=None):
+        """
+        Check a time period against preloaded blocks and holds without querying.
+        Returns the reason the period is unavailable, or None if it is free
+        """
+        for block in blocks:
+            if not block.is_recurring and block.overlaps_with(start_datetime, end_datetime):
+                return f"Space is unavailable: {block.reason or block.get_block_type_display()}"
         
         # Check for recurring blocks that apply to this time period
-        recurring_blocks = BlockedPeriod.objects.filter(place=self, is_recurring=True)
+        for block in blocks:
+            if block.is_recurring and next(block.occurrences_between(start_datetime, end_datetime), None):
+                return f"Space is unavailable due to recurring block: {block.reason or block.get_block_type_display()}"
         
-        for block in recurring_blocks:
-            if self._recurring_block_applies(block, start_datetime, end_datetime):
-                return False, f"Space is unavailable due to recurring block: {block.reason or block.get_block_type_display()}"
+        # Check for checkout holds; the user's own hold is booked through the hold
+        for hold in holds:
+            if hold.start_time < end_datetime and hold.end_time > start_datetime:
+                if user is not None and hold.user_id == user.pk:
+                    return f"You are holding this time; book hold {hold.pk} to confirm it"
+                return "Space is temporarily held by another customer"
         
-        return True, "Space is available"
+        return None
     
-    def _recurring_block_applies(self, block, start_datetime, end_datetime):
-        """Helper method to check if a recurring block applies to a time period"""
-        # Skip if the recurring block has ended
-        if block.recurring_end_date and start_datetime.date() > block.recurring_end_date:
-            return False
-            
-        # Check if the pattern applies to this day
-        applies = False
-        day_of_week = start_datetime.weekday()  # 0=Monday, 6=Sunday
-        
-        if block.recurring_pattern == 'daily':
-            applies = True
-        elif block.recurring_pattern == 'weekly':
-            block_day = block.start_datetime.weekday()
-            applies = (day_of_week == block_day)
-        elif block.recurring_pattern == 'weekdays':
-            applies = (day_of_week < 5)  # Monday to Friday (0-4)
-        elif block.recurring_pattern == 'weekends':
-            applies = (day_of_week >= 5)  # Saturday and Sunday (5-6)
-        
-        if not applies:
-            return False
-            
-        # Check time overlap
-        block_start_time = block.start_datetime.time()
-        block_end_time = block.end_datetime.time()
-        
-        # Create datetime objects for the block times on the requested date
-        block_start = datetime.combine(start_datetime.date(), block_start_time)
-        block_end = datetime.combine(start_datetime.date(), block_end_time)
-        
-        # Check for overlap with the requested time range
-        return (block_start < end_datetime and block_end > start_datetime)
-    
-    def create_booking(self, user, start_datetime, end_datetime, status='pending'):
+    def create_booking(self, user, start_datetime, end_datetime, status='pending', hold=None):
         """
         Create a booking if the place is available.
         Returns (booking_obj, success, message)
+        
+        The availability check and the insert run in one transaction holding a
+        row lock on this place, so concurrent requests for the same space are
+        serialized while bookings for other spaces proceed in parallel.
+        If hold is given, its window is booked and the hold is consumed.
         """
-        # First check if the place is available
-        is_available, reason = self.is_available(start_datetime, end_datetime)
+        from places.booking.models import Booking
+        from places.booking_hold.models import BookingHold
         
-        if not is_available:
-            return None, False, reason
+        try:
+            with transaction.atomic():
+                self.lock_for_update()
+                
+                # First check if the place is available
+                is_available, reason = self.is_available(start_datetime, end_datetime, ignore_hold=hold, user=user)
+                
+                if not is_available:
+                    return None, False, reason
+                
+                # Consume the hold so it stops blocking the window it reserved
+                if hold is not None:
+                    deleted, _ = BookingHold.objects.active().filter(pk=hold.pk, place=self).delete()
+                    if not deleted:
+                        return None, False, "Hold has expired or was released"
+                
+                total_price = self.quote_price(start_datetime, end_datetime)
+                
+                # Create the booking; availability was checked above under the lock
+                booking = Booking(
+                    place=self,
+                    user=user,
+                    start_time=start_datetime,
+                    end_time=end_datetime,
+                    total_price=total_price,
+                    status=status
+                )
+                booking.save(availability_checked=True)
+                
+                # The Booking.save() method automatically creates a BlockedPeriod
+        except IntegrityError as e:
+            # On Postgres the booking exclusion constraint is the last line of
+            # defence against overlapping active bookings; anything else is a bug
+            constraint = getattr(getattr(e.__cause__, 'diag', None), 'constraint_name', None)
+            if constraint != BOOKING_OVERLAP_CONSTRAINT:
+                raise
+            logger.warning(f"Rejected overlapping booking for place {self.id}", exc_info=True)
+            return None, False, "Space is unavailable: this time period was just booked"
         
-        # Calculate price based on duration and hourly rate
-        duration_hours = (end_datetime - start_datetime).total_seconds() / 3600
-        total_price = self.price_per_hour * Decimal(duration_hours)
+        return booking, True, "Booking created successfully"
+    
+    def create_bookings(self, user, windows, status='pending'):
+        """
+        Book many time windows in one transaction, e.g. every weekday for a month.
+        All windows are checked against a single load of this place's blocks and
+        holds (and against each other), then the accepted bookings and their
+        blocked periods are written with bulk inserts.
         
-        # Create the booking
+        Args:
+            user: The user making the bookings
+            windows: Iterable of (start_datetime, end_datetime) tuples; naive
+                datetimes are taken as UTC
+            status: Status for the created bookings
+            
+        Returns:
+            List of dicts, one per window in the order given, with
+            'start_time', 'end_time', 'success', 'message' and 'booking'
+        """
+        from outbox.models import OutboxEvent
+        from places.analytics.models import BookingRollup
         from places.booking.models import Booking
-        booking = Booking.objects.create(
-            place=self,
-            user=user,
-            start_time=start_datetime,
-            end_time=end_datetime,
-            total_price=total_price,
-            status=status
-        )
+        from places.blocked_period.models import BlockedPeriod
+        from places.pricing.engine import from_cents
+        import pytz
         
-        # The Booking.save() method automatically creates a BlockedPeriod
+        def aware(value):
+            # Windows without timezone info are taken as UTC, like parse_datetime
+            return timezone.make_aware(value, timezone=pytz.UTC) if timezone.is_naive(value) else value
         
-        return booking, True, "Booking created successfully"
+        results = [
+            {'start_time': aware(start), 'end_time': aware(end), 'success': False, 'message': None, 'booking': None}
+            for start, end in windows
+        ]
+        
+        valid = []
+        for result in results:
+            if result['end_time'] <= result['start_time']:
+                result['message'] = "End time must be after start time"
+            else:
+                valid.append(result)
+        
+        if not valid:
+            return results
+        
+        with transaction.atomic():
+            self.lock_for_update()
+            
+            blocks, holds = self.get_blocking_periods(
+                min(result['start_time'] for result in valid),
+                max(result['end_time'] for result in valid)
+            )
+            
+            # Walk the windows by start time; an accepted window overlaps a later
+            # one exactly when its end is past that window's start
+            accepted = []
+            accepted_until = None
+            for result in sorted(valid, key=lambda r: r['start_time']):
+                start, end = result['start_time'], result['end_time']
+                
+                reason = self.find_conflict(blocks, holds, start, end, user=user)
+                if not reason and accepted_until and accepted_until > start:
+                    reason = "Overlaps another window in this request"
+                
+                if reason:
+                    result['message'] = reason
+                    continue
+                
+                accepted.append(result)
+                accepted_until = max(accepted_until, end) if accepted_until else end
+            
+            schedule = self.get_price_schedule()
+            prices = [
+                from_cents(cents) for cents in schedule.quote_many_cents(
+                    (result['start_time'], result['end_time']) for result in accepted
+                )
+            ]
+            
+            bookings = Booking.objects.bulk_create([
+                Booking(
+                    place=self,
+                    user=user,
+                    start_time=result['start_time'],
+                    end_time=result['end_time'],
+                    total_price=price,
+                    status=status
+                )
+                for result, price in zip(accepted, prices)
+            ])
+            
+            if status in Booking.REVENUE_STATUSES:
+                BookingRollup.record(bookings)
+            
+            OutboxEvent.publish_many('booking.created', [booking.get_event_payload() for booking in bookings])
+            
+            if status in Booking.ACTIVE_STATUSES:
+                BlockedPeriod.objects.bulk_create([
+                    BlockedPeriod(
+                        place=self,
+                        booking=booking,
+                        start_datetime=booking.start_time,
+                        end_datetime=booking.end_time,
+                        block_type='booking',
+                        reason=f"Booked by {user.email}",
+                        is_recurring=False,
+                    )
+                    for booking in bookings
+                ])
+                if bookings:
+                    self.bump_calendar_version([self.pk])
+        
+        for result, booking in zip(accepted, bookings):
+            result['success'] = True
+            result['message'] = "Booking created successfully"
+            result['booking'] = booking
+        
+        return results
+    
+    def get_price_schedule(self):
+        """
+        Get this place's compiled PriceSchedule: price_per_hour adjusted by its
+        RateTable, if it has one. Use select_related('rate_table') when pricing
+        many places.
+        """
+        from places.pricing.engine import PriceSchedule
+        from places.pricing.models import RateTable
+        
+        try:
+            rate_table = self.rate_table
+        except RateTable.DoesNotExist:
+            rate_table = None
+        
+        return PriceSchedule.compile(self.price_per_hour, rate_table)
+    
+    def quote_price(self, start_datetime, end_datetime):
+        """Get the exact price of booking this place for a time period"""
+        return self.get_price_schedule().quote(start_datetime, end_datetime)
+    
+    def lock_for_update(self):
+        """
+        Take a row lock on this place for the rest of the current transaction.
+        Must be called inside transaction.atomic(); a no-op on SQLite, which
+        already serializes writers.
+        """
+        type(self).objects.select_for_update().filter(pk=self.pk).values_list('pk', flat=True).get()
     
     def get_available_times(self, date):
         """
@@ -190,74 +388,53 @@ class Place(models.Model):
     
     def add_images(self, files, photo_count):
         """
-        Add images to this place from uploaded files
+        Add images to this place from uploaded files. The files are uploaded
+        to S3 concurrently, then the PlaceImage rows are inserted in one query;
+        if either step fails the uploaded files are removed again.
+        Call outside a transaction so it is not held open for the uploads.
         Returns a list of created PlaceImage objects
         """
         from places.place_image.models import PlaceImage
         from places.s3_service import s3_service
         
-        images = []
+        numbers = [i for i in range(1, photo_count + 1) if f'photo_{i}' in files]
         
-        for i in range(1, photo_count + 1):
-            photo_key = f'photo_{i}'
-            if photo_key in files:
-                image = files[photo_key]
-                # Set the first image as primary
-                is_primary = i == 1
-
-                # Upload the image to S3
-                directory = f"listings/{self.id}"
-                image_key = s3_service.upload_file(image, directory=directory)
-
-                # Create the PlaceImage with the S3 key
-                place_image = PlaceImage.objects.create(
-                    place=self,
-                    image_key=image_key,
-                    is_primary=is_primary
-                )
-
-                logger.info(f"Uploaded image to S3: {image_key}")
-                logger.info(f"Image URL: {place_image.url}")
-
-                images.append(place_image)
+        # Upload the images to S3
+        directory = f"listings/{self.id}"
+        image_keys = s3_service.upload_files([files[f'photo_{i}'] for i in numbers], directory=directory)
+        
+        # Create the PlaceImages with the S3 keys, photo_1 as primary
+        try:
+            images = PlaceImage.objects.bulk_create([
+                PlaceImage(place=self, image_key=image_key, is_primary=i == 1)
+                for i, image_key in zip(numbers, image_keys)
+            ])
+        except Exception:
+            s3_service.delete_files(image_keys)
+            raise
+        PlaceImage.queue_variants([image.id for image in images])
+        
+        for image_key in image_keys:
+            logger.info(f"Uploaded image to S3: {image_key}")
                 
         return images
     
-    def delete_with_images(self):
-        """Delete this place and all associated images"""
+    def delete_with_images(self, background=None):
+        """
+        Delete this place and all associated images, removing the images'
+        files from S3 in batches after the deletion commits or, with
+        background, from a queued job (see PlaceImage.delete_storage)
+        Returns (number of images deleted, S3 keys that could not be deleted)
+        """
         from places.place_image.models import PlaceImage
-        from places.s3_service import s3_service
-        
-        # Get all images for this place
-        images = PlaceImage.objects.filter(place=self)
         
-        success_count = 0
-        failed_images = []
-        
-        # Delete each image and its S3 file
-        for image in images:
-            image_id = image.id
-            image_key = getattr(image, 'image_key', None)
-            
-            try:
-                # Delete from S3 if it has an image_key
-                if image_key:
-                    try:
-                        s3_service.delete_file(image_key)
-                    except Exception as e:
-                        logger.error(f"Error deleting image from S3: {str(e)}", exc_info=True)
-                
-                # Delete the database record
-                image.delete()
-                success_count += 1
-            except Exception as e:
-                logger.error(f"Error deleting image {image_id}: {str(e)}", exc_info=True)
-                failed_images.append(image_id)
+        with transaction.atomic():
+            keys = PlaceImage.storage_keys(PlaceImage.objects.filter(place=self))
+            # The image rows cascade with the place, in one query
+            _, deleted = self.delete()
+            failed_keys = PlaceImage.delete_storage(keys, background)
         
-        # Delete the place itself
-        self.delete()
-        
-        return success_count, failed_images
+        return deleted.get(PlaceImage._meta.label, 0), failed_keys
     
     @classmethod
     def prepare_listing_data(cls, request_data):
@@ -291,17 +468,12 @@ class Place(models.Model):
         if not datetime_str:
             return None
             
-        # Handle ISO format with timezone info
-        if 'Z' in datetime_str or '+' in datetime_str or '-' in datetime_str:
-            # Already has timezone info, just parse it
-            return datetime.fromisoformat(datetime_str.replace('Z', '+00:00'))
-        else:
-            # No timezone info, treat as UTC
-            from django.utils import timezone
-            import pytz
-            
-            # Parse as naive datetime then make timezone-aware
-            naive_dt = datetime.fromisoformat(datetime_str)
-            
-            # Make timezone-aware as UTC
-            return timezone.make_aware(naive_dt, timezone=pytz.UTC)
\ No newline at end of file
+        from django.utils import timezone
+        import pytz
+        
+        parsed = datetime.fromisoformat(datetime_str.replace('Z', '+00:00'))
+        if timezone.is_aware(parsed):
+            return parsed
+        
+        # No timezone info (including plain dates), treat as UTC
+        return timezone.make_aware(parsed, timezone=pytz.UTC)
\ No newline at end of file
@@ -9,6 +9,7 @@ import traceback
 
 from .models import Place
 from .serializers import PlaceSerializer
+from places.idempotency.decorators import idempotent
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +45,7 @@ def get_places_by_location(request):
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 @parser_classes([MultiPartParser, FormParser])
+@idempotent
 def list_driveway(request):
     """Endpoint for listing a driveway"""
     try:
@@ -52,17 +54,23 @@ def list_driveway(request):
         serializer = PlaceSerializer(data=data, context={'request': request})
 
         if serializer.is_valid():
+            photo_count = int(request.data.get('photo_count', 0))
+
+            # Save the place with the owner
             with transaction.atomic():
-                # Save the place with the owner
                 place = serializer.save(owner=request.user)
 
-                # Use the model method to handle image uploads
-                photo_count = int(request.data.get('photo_count', 0))
+            # Upload the images outside the transaction; without them the
+            # listing is removed again
+            try:
                 place.add_images(request.FILES, photo_count)
+            except Exception:
+                place.delete()
+                raise
 
-                # Return the created place with images
-                place_serializer = PlaceSerializer(place, context={'request': request})
-                return Response(place_serializer.data, status=status.HTTP_201_CREATED)
+            # Return the created place with images
+            place_serializer = PlaceSerializer(place, context={'request': request})
+            return Response(place_serializer.data, status=status.HTTP_201_CREATED)
         else:
             logger.error("Serializer errors: %s", serializer.errors)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -101,20 +109,13 @@ def listing(request, listing_id):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
         elif request.method == 'DELETE':
-            with transaction.atomic():
-                # Use the model method to delete the place and its images
-                success_count, failed_images = listing_obj.delete_with_images()
-                
-                if failed_images:
-                    logger.warning(f"Listing {listing_id} deleted but failed to delete some images: {failed_images}")
-                    return Response({
-                        "message": f"Listing deleted successfully. Deleted {success_count} images, but failed to delete {len(failed_images)} images from storage.",
-                        "failed_images": failed_images
-                    }, status=status.HTTP_200_OK)
-                else:
-                    return Response({
-                        "message": f"Listing deleted successfully with {success_count} images."
-                    }, status=status.HTTP_200_OK)
+            # Delete the place and its images; a queued job removes the files
+            # from S3, so the request doesn't wait on the bucket
+            success_count, _ = listing_obj.delete_with_images(background=True)
+            
+            return Response({
+                "message": f"Listing deleted successfully with {success_count} images."
+            }, status=status.HTTP_200_OK)
                 
     except Place.DoesNotExist:  
         return Response({"error": "Listing not found"}, 
@@ -1,4 +1,9 @@
-from django.db import models
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import models, transaction
+from django.utils.text import get_valid_filename
+import io
+import os
 import uuid
 import logging
 from places.s3_service import s3_service
@@ -13,9 +18,16 @@ def listing_image_path(instance, filename):
 
 class PlaceImage(models.Model):
     """Model for storing images associated with a place"""
+    # Photos clients may upload straight to S3
+    UPLOAD_CONTENT_TYPES = ('image/jpeg', 'image/png', 'image/gif', 'image/webp')
+    # Formats generate_variants writes each resized copy in, with their Pillow names
+    VARIANT_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+    
     place = models.ForeignKey('places.Place', on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to=listing_image_path, null=True, blank=True)
     image_key = models.CharField(max_length=255, blank=True)  # For S3 storage
+    # Resized copies of the S3 image: {format: {width: key}}, filled in by generate_variants
+    variants = models.JSONField(default=dict, blank=True)
     is_primary = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -34,14 +46,100 @@ class PlaceImage(models.Model):
             return self.image.url
         return None
 
+    @property
+    def variant_keys(self):
+        """The S3 keys of all of the image's resized copies"""
+        return [key for widths in self.variants.values() for key in widths.values()]
+
+    @property
+    def srcset(self):
+        """A srcset string per format for the resized copies, narrowest first"""
+        return {
+            image_format: ', '.join(
+                f"{s3_service.get_url(key)} {width}w"
+                for width, key in sorted(widths.items(), key=lambda item: int(item[0]))
+            )
+            for image_format, widths in self.variants.items()
+        }
+
     def delete(self, *args, **kwargs):
-        """Override delete to also remove the image from S3"""
-        if self.image_key:
+        """Override delete to also remove the image and its resized copies from S3"""
+        s3_service.delete_files(([self.image_key] if self.image_key else []) + self.variant_keys)
+        super().delete(*args, **kwargs)
+    
+    def generate_variants(self):
+        """
+        Make resized copies of the S3 image in each VARIANT_FORMATS format, one
+        per PLACE_IMAGE_VARIANT_WIDTHS width narrower than the original (or one
+        at the original width if it is narrower than all of them), upload them
+        next to it and record their keys. Regenerating overwrites the same keys.
+        Returns the variants
+        """
+        from PIL import Image, ImageOps
+        
+        widths = sorted(getattr(settings, 'PLACE_IMAGE_VARIANT_WIDTHS', (320, 640, 1280)))
+        quality = getattr(settings, 'PLACE_IMAGE_VARIANT_QUALITY', 80)
+        directory, _, filename = self.image_key.rpartition('/')
+        stem = os.path.splitext(filename)[0]
+        
+        variants = {image_format: {} for image_format in self.VARIANT_FORMATS}
+        uploaded = []
+        try:
+            with s3_service.download_file(self.image_key) as original, Image.open(original) as image:
+                # Let JPEGs decode at a reduced scale that still covers the widest variant
+                image.draft('RGB', (widths[-1], widths[-1]))
+                image = ImageOps.exif_transpose(image)
+                has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+                image = image.convert('RGBA' if has_alpha else 'RGB')
+                
+                for width in [width for width in widths if width < image.width] or [image.width]:
+                    resized = image.resize((width, max(1, round(image.height * width / image.width))),
+                                           Image.Resampling.LANCZOS)
+                    for image_format, pil_format in self.VARIANT_FORMATS.items():
+                        frame = resized
+                        if pil_format == 'JPEG' and has_alpha:
+                            # JPEG has no transparency, so flatten onto white
+                            frame = Image.new('RGB', resized.size, 'white')
+                            frame.paste(resized, mask=resized.getchannel('A'))
+                        buffer = io.BytesIO()
+                        frame.save(buffer, pil_format, quality=quality)
+                        key = s3_service.upload_file(buffer.getvalue(), directory=directory,
+                                                     filename=f"{stem}_{width}w.{image_format}")
+                        uploaded.append(key)
+                        variants[image_format][str(width)] = key
+        except Exception:
+            s3_service.delete_files(uploaded)
+            raise
+        
+        if not type(self).objects.filter(pk=self.pk).update(variants=variants):
+            # The image was deleted while its copies were being made
+            s3_service.delete_files(uploaded)
+        self.variants = variants
+        return variants
+    
+    @classmethod
+    def generate_variants_for(cls, image_ids):
+        """
+        Generate the resized copies of several S3 images, carrying on past
+        failures and raising the first one at the end
+        """
+        error = None
+        for image in cls.objects.filter(id__in=image_ids).exclude(image_key=''):
             try:
-                s3_service.delete_file(self.image_key)
+                image.generate_variants()
             except Exception as e:
-                logger.error(f"Error deleting image from S3: {str(e)}", exc_info=True)
-        super().delete(*args, **kwargs)
+                logger.error(f"Error generating variants of image {image.id}: {str(e)}", exc_info=True)
+                error = error or e
+        if error is not None:
+            raise error
+    
+    @staticmethod
+    def queue_variants(image_ids):
+        """Queue a background job to generate the resized copies of the given images"""
+        from jobs.models import Job
+        
+        if image_ids:
+            Job.enqueue('place_images.generate_variants', image_ids=list(image_ids))
     
     def set_as_primary(self):
         """Set this image as the primary image for its place"""
@@ -82,39 +180,175 @@ class PlaceImage(models.Model):
             is_primary=is_primary
         )
         
+        cls.queue_variants([place_image.id])
+        
         logger.info(f"Added image to place {place.id}: {image_key}")
         
         return place_image
     
+    @staticmethod
+    def upload_directory(place):
+        """The S3 directory a place's photos are stored under"""
+        return f"listings/{place.id}/"
+    
     @classmethod
-    def delete_all_for_place(cls, place):
+    def presign_uploads(cls, place, files, method='post'):
         """
-        Delete all images associated with a place and clean up S3
+        Issue presigned URLs for uploading new photos of a place straight to
+        S3, so the bytes never pass through the app. Each photo gets its own
+        key under the place's directory; once uploaded, the client registers
+        the keys with confirm_uploads.
         
         Args:
-            place: The Place object whose images should be deleted
+            place: The Place object the photos are for
+            files: A list of {'filename', 'content_type'} for the photos
+            method: 'post' for browser form uploads, 'put' for raw PUTs
+            
+        Returns:
+            list: {'key', 'method', 'url', and 'fields' or 'headers'} per photo
+            
+        Raises:
+            ValueError: If a content type is not an accepted image type
+        """
+        max_bytes = getattr(settings, 'PLACE_IMAGE_MAX_BYTES', 10 * 1024 * 1024)
+        expires_in = getattr(settings, 'PLACE_IMAGE_UPLOAD_EXPIRY_SECONDS', 900)
+        
+        uploads = []
+        for file in files:
+            content_type = file.get('content_type')
+            if content_type not in cls.UPLOAD_CONTENT_TYPES:
+                raise ValueError(f"content_type must be one of: {', '.join(cls.UPLOAD_CONTENT_TYPES)}")
+            try:
+                name = get_valid_filename(os.path.basename(str(file.get('filename') or '')))
+            except SuspiciousFileOperation:
+                name = None
+            
+            key = cls.upload_directory(place) + s3_service.unique_filename(name)
+            presigned = s3_service.presign_upload(key, content_type, max_bytes, method, expires_in)
+            uploads.append({'key': key, 'method': method, **presigned})
+        
+        return uploads
+    
+    @classmethod
+    def confirm_uploads(cls, place, keys, primary_key=None):
+        """
+        Register photos uploaded with presign_uploads as images of a place.
+        A HEAD request checks that each one is in S3, is an accepted image
+        type and is not too large; rejected uploads are deleted. Keys that are
+        already registered are left as they are, so confirming twice is safe.
+        
+        Args:
+            place: The Place object the photos are for
+            keys: The S3 keys the photos were uploaded to
+            primary_key: The key of the photo to make primary; otherwise the
+                         first new photo is, if the place has no primary image
             
         Returns:
-            tuple: (success_count, failed_images) where failed_images is a list of failed image IDs
+            tuple: (images, errors) where images are the PlaceImages for the
+            accepted keys and errors maps each rejected key to the reason
         """
-        images = cls.objects.filter(place=place)
-        logger.info(f"Found {images.count()} images to delete for listing {place.id}")
+        max_bytes = getattr(settings, 'PLACE_IMAGE_MAX_BYTES', 10 * 1024 * 1024)
+        directory = cls.upload_directory(place)
+        keys = list(dict.fromkeys(keys))
+        
+        errors = {}
+        for key in keys:
+            name = key[len(directory):] if key.startswith(directory) else ''
+            if not name or '/' in name or name in ('.', '..'):
+                errors[key] = "Not an upload for this listing"
+        
+        registered = set(cls.objects.filter(place=place, image_key__in=keys).values_list('image_key', flat=True))
+        pending = [key for key in keys if key not in errors and key not in registered]
         
-        success_count = 0
-        failed_images = []
+        rejected = []
+        for key, found in s3_service.head_files(pending).items():
+            if found is None:
+                errors[key] = "Upload not found"
+            elif found['content_type'] not in cls.UPLOAD_CONTENT_TYPES:
+                errors[key] = "Upload is not an accepted image type"
+                rejected.append(key)
+            elif found['size'] > max_bytes:
+                errors[key] = f"Upload is larger than {max_bytes} bytes"
+                rejected.append(key)
+        s3_service.delete_files(rejected)
         
-        for image in images:
-            image_id = image.id
-            image_key = getattr(image, 'image_key', None)
+        new_keys = [key for key in pending if key not in errors]
+        if primary_key not in new_keys and primary_key not in registered:
+            primary_key = None
+        
+        with transaction.atomic():
+            if primary_key is not None:
+                cls.objects.filter(place=place, is_primary=True).exclude(image_key=primary_key).update(is_primary=False)
+                cls.objects.filter(place=place, image_key=primary_key).update(is_primary=True)
+            elif new_keys and not cls.objects.filter(place=place, is_primary=True).exists():
+                primary_key = new_keys[0]
             
-            logger.info(f"Deleting image {image_id} with key: {image_key}")
+            created = cls.objects.bulk_create([
+                cls(place=place, image_key=key, is_primary=key == primary_key)
+                for key in new_keys
+            ])
+            cls.queue_variants([image.id for image in created])
+        
+        logger.info(f"Registered {len(new_keys)} uploaded images for place {place.id}")
+        
+        images = cls.objects.filter(place=place, image_key__in=[key for key in keys if key not in errors])
+        return list(images.order_by('id')), errors
+    
+    @staticmethod
+    def storage_keys(images):
+        """The S3 keys of a queryset of images and of all their resized copies"""
+        keys = []
+        for image_key, variants in images.values_list('image_key', 'variants'):
+            if image_key:
+                keys.append(image_key)
+            keys.extend(key for widths in variants.values() for key in widths.values())
+        return keys
+    
+    @staticmethod
+    def delete_storage(keys, background=None):
+        """
+        Delete S3 objects in batches of up to 1000 keys per request, once the
+        surrounding transaction commits so a rollback never loses files. With
+        background (STORAGE_DELETES_IN_BACKGROUND by default), queue one job
+        per batch instead, committed with the surrounding transaction.
+        
+        Returns:
+            list: The keys that could not be deleted, filled in when the
+            deletes run; failures of deletes run later are only logged
+        """
+        from jobs.models import Job
+        
+        if background is None:
+            background = getattr(settings, 'STORAGE_DELETES_IN_BACKGROUND', False)
+        if not background:
+            failed = []
+            # Runs straight away outside a transaction
+            transaction.on_commit(lambda: failed.extend(s3_service.delete_files(keys)))
+            return failed
+        
+        for i in range(0, len(keys), 1000):
+            Job.enqueue('storage.delete_keys', keys=keys[i:i + 1000])
+        return []
+    
+    @classmethod
+    def delete_all_for_place(cls, place, background=None):
+        """
+        Delete all images associated with a place and clean up S3: the rows
+        in one query, then their files in batches (see delete_storage)
+        
+        Args:
+            place: The Place object whose images should be deleted
+            background: Whether to leave the S3 deletes to a background job
             
-            try:
-                image.delete() 
-                logger.info(f"Successfully deleted image {image_id}")
-                success_count += 1
-            except Exception as e:
-                logger.error(f"Error deleting image {image_id}: {str(e)}", exc_info=True)
-                failed_images.append(image_id)
+        Returns:
+            tuple: (success_count, failed_keys) where failed_keys are the S3 keys that could not be deleted
+        """
+        with transaction.atomic():
+            images = cls.objects.filter(place=place)
+            keys = cls.storage_keys(images)
+            success_count, _ = images.delete()
+            failed_keys = cls.delete_storage(keys, background)
+        
+        logger.info(f"Deleted {success_count} images ({len(keys)} files) for listing {place.id}")
         
-        return success_count, failed_images
\ No newline at end of file
+        return success_count, failed_keys
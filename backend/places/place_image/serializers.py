@@ -3,10 +3,11 @@ from .models import PlaceImage
 
 class PlaceImageSerializer(serializers.ModelSerializer):
     url = serializers.SerializerMethodField()
+    srcset = serializers.ReadOnlyField()
 
     class Meta:
         model = PlaceImage
-        fields = ['id', 'image_key', 'is_primary', 'url', 'created_at']
+        fields = ['id', 'image_key', 'is_primary', 'url', 'srcset', 'created_at']
         
     def get_url(self, obj):
         if obj.image_key:
@@ -3,6 +3,8 @@ from . import views
 
 urlpatterns = [
     path('', views.add_image, name='add_image'),
+    path('presign/', views.presign_images, name='presign_images'),
+    path('confirm/', views.confirm_images, name='confirm_images'),
     path('<int:image_id>/', views.delete_image, name='delete_image'),
     path('<int:image_id>/set-primary/', views.set_primary_image, name='set_primary_image'),
 ]
\ No newline at end of file
@@ -3,6 +3,7 @@ from rest_framework.decorators import api_view, permission_classes, parser_class
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
+from django.conf import settings
 import logging
 
 from .models import PlaceImage
@@ -35,6 +36,79 @@ def add_image(request):
     serializer = PlaceImageSerializer(place_image)
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def presign_images(request):
+    """
+    Issue presigned URLs for uploading listing photos straight to storage.
+    
+        {"place_id": 1, "method": "post",
+         "files": [{"filename": "front.jpg", "content_type": "image/jpeg"}, ...]}
+    
+    Upload each photo to its URL, then register the keys with confirm_images.
+    """
+    place_id = request.data.get('place_id')
+    files = request.data.get('files')
+    method = request.data.get('method', 'post')
+    
+    try:
+        place = Place.objects.get(id=place_id, owner=request.user)
+    except (Place.DoesNotExist, ValueError, TypeError):
+        return Response({"error": "Listing not found or you don't have permission"}, 
+                       status=status.HTTP_404_NOT_FOUND)
+    
+    max_uploads = getattr(settings, 'PLACE_IMAGE_MAX_UPLOADS', 10)
+    if not isinstance(files, list) or not 1 <= len(files) <= max_uploads \
+            or not all(isinstance(file, dict) for file in files):
+        return Response({"error": f"files must list between 1 and {max_uploads} photos"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if method not in ('post', 'put'):
+        return Response({"error": "method must be post or put"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        uploads = PlaceImage.presign_uploads(place, files, method)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({'uploads': uploads}, status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def confirm_images(request):
+    """
+    Register photos uploaded through presign_images as listing images.
+    
+        {"place_id": 1, "keys": ["listings/1/front_1a2b3c4d.jpg", ...],
+         "primary_key": "listings/1/front_1a2b3c4d.jpg"}
+    """
+    place_id = request.data.get('place_id')
+    keys = request.data.get('keys')
+    primary_key = request.data.get('primary_key')
+    
+    try:
+        place = Place.objects.get(id=place_id, owner=request.user)
+    except (Place.DoesNotExist, ValueError, TypeError):
+        return Response({"error": "Listing not found or you don't have permission"}, 
+                       status=status.HTTP_404_NOT_FOUND)
+    
+    max_uploads = getattr(settings, 'PLACE_IMAGE_MAX_UPLOADS', 10)
+    if not isinstance(keys, list) or not 1 <= len(keys) <= max_uploads \
+            or not all(isinstance(key, str) for key in keys):
+        return Response({"error": f"keys must list between 1 and {max_uploads} uploads"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if primary_key is not None and not isinstance(primary_key, str):
+        return Response({"error": "primary_key must be one of the uploaded keys"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    
+    images, errors = PlaceImage.confirm_uploads(place, keys, primary_key)
+    
+    if not images:
+        return Response({"error": "None of the uploads could be registered", "errors": errors},
+                        status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer = PlaceImageSerializer(images, many=True)
+    return Response({'images': serializer.data, 'errors': errors}, status=status.HTTP_201_CREATED)
+
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def delete_image(request, image_id):
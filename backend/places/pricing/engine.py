@@ -0,0 +1,138 @@
+from django.utils import timezone
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+
+HOURS_PER_WEEK = 7 * 24
+SECONDS_PER_HOUR = 3600
+
+# A Monday at midnight; wall-clock times are measured from here so that
+# hour-of-week is a plain division
+EPOCH = datetime(1970, 1, 5)
+
+
+def to_cents(amount):
+    """Convert a Decimal amount of money to whole cents, rounding half up"""
+    return int(Decimal(amount).scaleb(2).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    """Convert whole cents back to a Decimal with two places"""
+    return Decimal(cents).scaleb(-2).quantize(Decimal('0.01'))
+
+
+class PriceSchedule:
+    """
+    A place's prices compiled into integer cents for each of the 168 hours of
+    the week, with prefix sums so any window is priced in constant time.
+
+    All arithmetic is in integer cent-seconds (cents per hour x seconds), so
+    quotes are exact and are rounded to cents once, at the end. Hours of the
+    week are taken from the wall clock in the current Django time zone.
+    """
+
+    def __init__(self, hourly_cents, daily_cap_cents=None):
+        if len(hourly_cents) != HOURS_PER_WEEK:
+            raise ValueError(f"Expected {HOURS_PER_WEEK} hourly rates, got {len(hourly_cents)}")
+
+        self.hourly_cents = tuple(hourly_cents)
+        self.daily_cap_cents = daily_cap_cents
+
+        # prefix[h] is the cost in cent-seconds of the week up to hour h
+        self.prefix = [0]
+        for cents in self.hourly_cents:
+            self.prefix.append(self.prefix[-1] + cents * SECONDS_PER_HOUR)
+
+    @classmethod
+    def compile(cls, price_per_hour, rate_table=None):
+        """Build the schedule for a base hourly price and an optional RateTable"""
+        if rate_table is None:
+            return _compile(to_cents(price_per_hour))
+
+        return _compile(
+            to_cents(price_per_hour),
+            rate_table.weekend_multiplier,
+            rate_table.night_multiplier,
+            rate_table.night_start_hour,
+            rate_table.night_end_hour,
+            to_cents(rate_table.daily_cap) if rate_table.daily_cap is not None else None,
+        )
+
+    def _cumulative(self, wall_seconds):
+        """Cost in cent-seconds from EPOCH to a wall-clock offset in seconds"""
+        weeks, offset = divmod(wall_seconds, HOURS_PER_WEEK * SECONDS_PER_HOUR)
+        hour, seconds = divmod(offset, SECONDS_PER_HOUR)
+        return weeks * self.prefix[-1] + self.prefix[hour] + self.hourly_cents[hour] * seconds
+
+    @staticmethod
+    def _wall_seconds(moment):
+        if timezone.is_aware(moment):
+            moment = timezone.localtime(moment).replace(tzinfo=None)
+        delta = moment - EPOCH
+        return delta.days * 86400 + delta.seconds
+
+    def quote_cents(self, start_datetime, end_datetime):
+        """Price of one window in whole cents"""
+        return self.quote_many_cents([(start_datetime, end_datetime)])[0]
+
+    def quote_many_cents(self, windows):
+        """
+        Price many (start_datetime, end_datetime) windows in one pass.
+        Returns a list of whole cents in the same order; empty or inverted
+        windows cost nothing.
+        """
+        quotes = []
+        day = 86400
+        cap = self.daily_cap_cents * SECONDS_PER_HOUR if self.daily_cap_cents is not None else None
+
+        for start_datetime, end_datetime in windows:
+            start = self._wall_seconds(start_datetime)
+            end = self._wall_seconds(end_datetime)
+            if end <= start:
+                quotes.append(0)
+                continue
+
+            if cap is None:
+                total = self._cumulative(end) - self._cumulative(start)
+            else:
+                # Cap each calendar day the window touches separately
+                total = 0
+                day_start = start - start % day
+                while day_start < end:
+                    day_end = day_start + day
+                    cost = self._cumulative(min(end, day_end)) - self._cumulative(max(start, day_start))
+                    total += min(cost, cap)
+                    day_start = day_end
+
+            quotes.append((total + SECONDS_PER_HOUR // 2) // SECONDS_PER_HOUR)
+
+        return quotes
+
+    def quote(self, start_datetime, end_datetime):
+        """Price of one window as a Decimal"""
+        return from_cents(self.quote_cents(start_datetime, end_datetime))
+
+
+@lru_cache(maxsize=1024)
+def _compile(base_cents, weekend_multiplier=Decimal('1'), night_multiplier=Decimal('1'),
+             night_start_hour=0, night_end_hour=0, daily_cap_cents=None):
+    """
+    Compile pricing rules into a PriceSchedule. Cached on the rules
+    themselves, so places that share a rate structure share the arrays.
+    """
+    if night_start_hour <= night_end_hour:
+        night_hours = set(range(night_start_hour, night_end_hour))
+    else:
+        night_hours = set(range(night_start_hour, 24)) | set(range(0, night_end_hour))
+
+    hourly_cents = []
+    for hour_of_week in range(HOURS_PER_WEEK):
+        weekday, hour = divmod(hour_of_week, 24)
+        rate = Decimal(base_cents)
+        if weekday >= 5:
+            rate *= weekend_multiplier
+        if hour in night_hours:
+            rate *= night_multiplier
+        hourly_cents.append(int(rate.quantize(Decimal('1'), rounding=ROUND_HALF_UP)))
+
+    return PriceSchedule(hourly_cents, daily_cap_cents)
@@ -0,0 +1,45 @@
+from django.db import models
+from django.core.exceptions import ValidationError
+from decimal import Decimal
+
+
+class RateTable(models.Model):
+    """
+    Optional pricing rules layered on top of a place's price_per_hour.
+    Places without a rate table charge price_per_hour around the clock.
+    """
+    place = models.OneToOneField('places.Place', on_delete=models.CASCADE, related_name='rate_table')
+
+    # Most a driver pays for any single calendar day
+    daily_cap = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+
+    # Applied to hours on Saturday and Sunday
+    weekend_multiplier = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('1.00'))
+
+    # Applied to hours from night_start_hour until night_end_hour (may wrap past midnight)
+    night_multiplier = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('1.00'))
+    night_start_hour = models.PositiveSmallIntegerField(default=22)
+    night_end_hour = models.PositiveSmallIntegerField(default=6)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = 'places'
+
+    def __str__(self):
+        return f"Rates for place {self.place_id}"
+
+    def clean(self):
+        """Validate multipliers and night hours"""
+        if self.night_start_hour > 23 or self.night_end_hour > 23:
+            raise ValidationError("Night hours must be between 0 and 23")
+
+        if self.weekend_multiplier <= 0 or self.night_multiplier <= 0:
+            raise ValidationError("Multipliers must be positive")
+
+        if self.daily_cap is not None and self.daily_cap <= 0:
+            raise ValidationError("Daily cap must be positive")
+
+    def save(self, *args, **kwargs):
+        self.clean()
+        super().save(*args, **kwargs)
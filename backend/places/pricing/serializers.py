@@ -0,0 +1,26 @@
+from rest_framework import serializers
+from .models import RateTable
+
+class RateTableSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RateTable
+        fields = [
+            'place', 'daily_cap', 'weekend_multiplier', 'night_multiplier',
+            'night_start_hour', 'night_end_hour', 'updated_at'
+        ]
+        read_only_fields = ['place', 'updated_at']
+    
+    def validate(self, data):
+        """Validate multipliers, night hours and the daily cap"""
+        for field in ('night_start_hour', 'night_end_hour'):
+            if field in data and data[field] > 23:
+                raise serializers.ValidationError("Night hours must be between 0 and 23")
+        
+        for field in ('weekend_multiplier', 'night_multiplier'):
+            if field in data and data[field] <= 0:
+                raise serializers.ValidationError("Multipliers must be positive")
+        
+        if data.get('daily_cap') is not None and data['daily_cap'] <= 0:
+            raise serializers.ValidationError("Daily cap must be positive")
+        
+        return data
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('quote/', views.quote, name='quote'),
+    path('rates/<int:place_id>/', views.rate_table, name='rate-table'),
+]
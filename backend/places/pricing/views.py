@@ -0,0 +1,106 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated, AllowAny
+from django.conf import settings
+from collections import defaultdict
+import logging
+
+from .engine import from_cents
+from .models import RateTable
+from .serializers import RateTableSerializer
+from places.place.models import Place
+
+logger = logging.getLogger(__name__)
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def quote(request):
+    """
+    Price many (place, time window) pairs at once, e.g. for search results.
+    Expects {"quotes": [{"place_id", "start_time", "end_time"}, ...]} and
+    returns one result per entry, in order.
+    """
+    items = request.data.get('quotes')
+    max_quotes = getattr(settings, 'PRICING_MAX_QUOTES', 200)
+    
+    if not isinstance(items, list) or not items or len(items) > max_quotes:
+        return Response(
+            {'error': f'quotes must be a list of between 1 and {max_quotes} entries'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    results = []
+    for item in items:
+        result = {'place_id': None, 'start_time': None, 'end_time': None, 'total_price': None, 'error': None}
+        results.append(result)
+        
+        if not isinstance(item, dict) or any(item.get(key) in (None, '') for key in ('place_id', 'start_time', 'end_time')):
+            result['error'] = 'place_id, start_time, and end_time are required'
+            continue
+        
+        try:
+            result['place_id'] = int(item['place_id'])
+            # Both ends come back timezone-aware, so mixed inputs compare safely
+            result['start_time'] = Place.parse_datetime(item['start_time'])
+            result['end_time'] = Place.parse_datetime(item['end_time'])
+        except (AttributeError, TypeError, ValueError):
+            result['error'] = 'Invalid place_id or datetime format'
+            continue
+        
+        if result['end_time'] <= result['start_time']:
+            result['error'] = 'End time must be after start time'
+    
+    try:
+        places = Place.objects.select_related('rate_table').in_bulk(
+            {result['place_id'] for result in results if not result['error']}
+        )
+        
+        # Price each place's windows in a single pass over its schedule
+        pending = defaultdict(list)
+        for result in results:
+            if result['error']:
+                continue
+            if result['place_id'] not in places:
+                result['error'] = 'Parking space not found'
+                continue
+            pending[result['place_id']].append(result)
+        
+        for place_id, place_results in pending.items():
+            schedule = places[place_id].get_price_schedule()
+            cents = schedule.quote_many_cents(
+                (result['start_time'], result['end_time']) for result in place_results
+            )
+            for result, amount in zip(place_results, cents):
+                result['total_price'] = str(from_cents(amount))
+    except Exception as e:
+        logger.error(f"Error quoting prices: {str(e)}", exc_info=True)
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    return Response({'results': results})
+
+@api_view(['GET', 'PUT'])
+@permission_classes([IsAuthenticated])
+def rate_table(request, place_id):
+    """Get or replace the pricing rules for one of the current user's listings"""
+    try:
+        place = Place.objects.get(id=place_id)
+    except Place.DoesNotExist:
+        return Response({"error": "Listing not found"}, status=status.HTTP_404_NOT_FOUND)
+    
+    if place.owner_id != request.user.id:
+        return Response({"error": "You don't have permission to modify this listing"},
+                        status=status.HTTP_403_FORBIDDEN)
+    
+    rates = RateTable.objects.filter(place=place).first() or RateTable(place=place)
+    
+    if request.method == 'GET':
+        serializer = RateTableSerializer(rates)
+        return Response(serializer.data)
+    
+    elif request.method == 'PUT':
+        serializer = RateTableSerializer(rates, data=request.data)
+        if serializer.is_valid():
+            serializer.save(place=place)
+            return Response(serializer.data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
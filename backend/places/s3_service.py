@@ -1,9 +1,29 @@
 # s3_service.py
 import boto3
+import io
+import logging
 import os
 import uuid
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
 from django.conf import settings
 
+logger = logging.getLogger(__name__)
+
+class _KeepOpen:
+    """File proxy that ignores close(), since s3transfer closes what it uploads"""
+    def __init__(self, file_obj):
+        self._file_obj = file_obj
+    
+    def __getattr__(self, name):
+        return getattr(self._file_obj, name)
+    
+    def close(self):
+        pass
+
 class S3Service:
     def __init__(self, bucket_name=None, region=None):
         """Initialize the S3 service with settings from Django or environment."""
@@ -12,14 +32,38 @@ class S3Service:
         self.access_key = settings.AWS_ACCESS_KEY_ID
         self.secret_key = settings.AWS_SECRET_ACCESS_KEY
         
-        # Initialize S3 client
+        # Files are streamed from disk; larger ones go up in parts, with at
+        # most max_concurrency parts of multipart_chunksize held in memory
+        max_concurrency = getattr(settings, 'AWS_S3_MAX_CONCURRENCY', 4)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=getattr(settings, 'AWS_S3_MULTIPART_THRESHOLD', 8 * 1024 * 1024),
+            multipart_chunksize=getattr(settings, 'AWS_S3_MULTIPART_CHUNKSIZE', 8 * 1024 * 1024),
+            max_concurrency=max_concurrency,
+        )
+        # Not a constructor argument in boto3, but honoured by s3transfer
+        self.transfer_config.max_in_memory_upload_chunks = max_concurrency
+        
+        # Initialize S3 client. Clients are thread-safe, so one is shared by
+        # every upload thread; its connection pool is sized to match them
+        self.upload_workers = getattr(settings, 'AWS_S3_UPLOAD_WORKERS', 8)
         self.client = boto3.client(
             's3',
             aws_access_key_id=self.access_key,
             aws_secret_access_key=self.secret_key,
-            region_name=self.region
+            region_name=self.region,
+            config=Config(max_pool_connections=max(self.upload_workers * max_concurrency, 10))
         )
     
+    def unique_filename(self, original_name=None):
+        """
+        Make a filename that will not collide with an existing object: the
+        original name with a UUID fragment added, or a UUID if there is none.
+        """
+        if not original_name:
+            return f"{uuid.uuid4().hex}.bin"
+        name, ext = os.path.splitext(os.path.basename(original_name))
+        return f"{name}_{uuid.uuid4().hex[:8]}{ext}"
+    
     def upload_file(self, file_obj, directory='media', filename=None):
         """
         Upload a file to S3 and return the key.
@@ -34,25 +78,18 @@ class S3Service:
         """
         # Generate a unique filename if not provided
         if filename is None:
-            if hasattr(file_obj, 'name'):
-                # Use the original filename but add a UUID to ensure uniqueness
-                original_name = os.path.basename(file_obj.name)
-                name, ext = os.path.splitext(original_name)
-                filename = f"{name}_{uuid.uuid4().hex[:8]}{ext}"
-            else:
-                filename = f"{uuid.uuid4().hex}.bin"
+            filename = self.unique_filename(getattr(file_obj, 'name', None))
         
         # Create the full key (path within the bucket)
         key = f"{directory}/{filename}" if directory else filename
         
-        # Get the file content
+        # Stream file objects from the start rather than reading them into memory
         if hasattr(file_obj, 'read'):
-            content = file_obj.read()
-            # Reset file pointer if possible
+            stream = _KeepOpen(file_obj)
             if hasattr(file_obj, 'seek'):
                 file_obj.seek(0)
         else:
-            content = file_obj
+            stream = io.BytesIO(file_obj)
         
         # Determine content type (you might want to expand this)
         content_type = 'application/octet-stream'
@@ -64,18 +101,141 @@ class S3Service:
             content_type = 'image/png'
         elif filename.lower().endswith('.gif'):
             content_type = 'image/gif'
+        elif filename.lower().endswith('.webp'):
+            content_type = 'image/webp'
         
         # Upload the file with public-read ACL
-        self.client.put_object(
-            Bucket=self.bucket_name,
-            Key=key,
-            Body=content,
-            ContentType=content_type,
-            ACL='public-read'
+        self.client.upload_fileobj(
+            stream,
+            self.bucket_name,
+            key,
+            ExtraArgs={'ContentType': content_type, 'ACL': 'public-read'},
+            Config=self.transfer_config
         )
         
+        # Reset file pointer if possible
+        if hasattr(file_obj, 'seek'):
+            file_obj.seek(0)
+        
         return key
     
+    def upload_files(self, file_objs, directory='media'):
+        """
+        Upload several files to S3 concurrently on a bounded thread pool.
+        If any upload fails, the ones that succeeded are deleted again and
+        the first error is raised.
+        
+        Args:
+            file_objs: A list of file-like objects or bytes
+            directory: The directory within the bucket (default: 'media')
+            
+        Returns:
+            The S3 keys of the uploaded files, in the order given
+        """
+        if not file_objs:
+            return []
+        
+        workers = min(self.upload_workers, len(file_objs))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self.upload_file, file_obj, directory) for file_obj in file_objs]
+        
+        keys = [future.result() for future in futures if not future.exception()]
+        errors = [future.exception() for future in futures if future.exception()]
+        if errors:
+            self.delete_files(keys)
+            raise errors[0]
+        
+        return keys
+    
+    def presign_upload(self, key, content_type, max_bytes, method='post', expires_in=900):
+        """
+        Let a client upload one file straight to S3 under the given key.
+        
+        Args:
+            key: The S3 key the file must be uploaded to
+            content_type: The content type the upload must declare
+            max_bytes: The largest file accepted (enforced for POST only;
+                       check PUT uploads with head_file afterwards)
+            method: 'post' for a browser form upload, 'put' for a raw PUT
+            expires_in: Seconds the upload stays allowed
+            
+        Returns:
+            For 'post', {'url', 'fields'} to submit as multipart form data with
+            the file last; for 'put', {'url', 'headers'} to send with the body
+        """
+        if method == 'post':
+            return self.client.generate_presigned_post(
+                Bucket=self.bucket_name,
+                Key=key,
+                Fields={'Content-Type': content_type, 'acl': 'public-read'},
+                Conditions=[
+                    {'Content-Type': content_type},
+                    {'acl': 'public-read'},
+                    ['content-length-range', 1, max_bytes],
+                ],
+                ExpiresIn=expires_in
+            )
+        
+        url = self.client.generate_presigned_url(
+            'put_object',
+            Params={'Bucket': self.bucket_name, 'Key': key, 'ContentType': content_type, 'ACL': 'public-read'},
+            ExpiresIn=expires_in
+        )
+        return {'url': url, 'headers': {'Content-Type': content_type, 'x-amz-acl': 'public-read'}}
+    
+    def download_file(self, key):
+        """
+        Download a file from S3, streamed into a temporary file that stays in
+        memory up to AWS_S3_MAX_DOWNLOAD_MEMORY bytes and spills to disk after.
+        
+        Args:
+            key: The S3 key (path within the bucket)
+            
+        Returns:
+            The temporary file, positioned at the start; close it when done
+        """
+        file_obj = SpooledTemporaryFile(max_size=getattr(settings, 'AWS_S3_MAX_DOWNLOAD_MEMORY', 10 * 1024 * 1024))
+        try:
+            self.client.download_fileobj(self.bucket_name, key, file_obj, Config=self.transfer_config)
+        except Exception:
+            file_obj.close()
+            raise
+        file_obj.seek(0)
+        return file_obj
+    
+    def head_file(self, key):
+        """
+        Look up an S3 object's size and content type without downloading it.
+        
+        Args:
+            key: The S3 key (path within the bucket)
+            
+        Returns:
+            {'size', 'content_type'}, or None if there is no such object
+        """
+        try:
+            response = self.client.head_object(Bucket=self.bucket_name, Key=key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        return {'size': response['ContentLength'], 'content_type': response.get('ContentType', '')}
+    
+    def head_files(self, keys):
+        """
+        Look up several S3 objects concurrently with head_file.
+        
+        Args:
+            keys: The S3 keys to look up
+            
+        Returns:
+            A dict of key to head_file's result
+        """
+        if not keys:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.upload_workers, len(keys))) as executor:
+            return dict(zip(keys, executor.map(self.head_file, keys)))
+    
     def get_url(self, key):
         """
         Get the URL for an S3 object.
@@ -100,6 +260,35 @@ class S3Service:
             Key=key
         )
     
+    def delete_files(self, keys):
+        """
+        Delete several files from S3 with delete_objects, up to 1000 keys per
+        request, logging rather than raising failures.
+        
+        Args:
+            keys: The S3 keys to delete
+            
+        Returns:
+            The keys that could not be deleted
+        """
+        keys = list(dict.fromkeys(keys))
+        failed = []
+        for i in range(0, len(keys), 1000):
+            batch = keys[i:i + 1000]
+            try:
+                response = self.client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+                )
+            except Exception as e:
+                logger.error(f"Error deleting {len(batch)} files from S3: {str(e)}", exc_info=True)
+                failed.extend(batch)
+                continue
+            for error in response.get('Errors', []):
+                logger.error(f"Error deleting {error['Key']} from S3: {error.get('Code')} {error.get('Message')}")
+                failed.append(error['Key'])
+        return failed
+    
     def list_files(self, directory=''):
         """
         List files in a directory.
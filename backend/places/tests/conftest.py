@@ -0,0 +1,62 @@
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from places.place.models import Place
+
+User = get_user_model()
+
+requires_postgres = pytest.mark.skipif(
+    connection.vendor != 'postgresql',
+    reason="Needs Postgres (set TEST_DATABASE_URL)",
+)
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def create_user(db):
+    def make_user(email=None, password='password123', **kwargs):
+        if email is None:
+            email = f"user_{uuid.uuid4()}@example.com"
+        return User.objects.create_user(email=email, password=password, **kwargs)
+    return make_user
+
+
+@pytest.fixture
+def create_place(db, create_user):
+    def make_place(owner=None, **kwargs):
+        if owner is None:
+            owner = create_user()
+
+        place_data = {
+            'name': 'Test Driveway',
+            'description': 'A nice driveway for parking',
+            'address': '123 Test St',
+            'city': 'Test City',
+            'state': 'Test State',
+            'zip_code': '12345',
+            'latitude': Decimal('37.7749'),
+            'longitude': Decimal('-122.4194'),
+            'price_per_hour': Decimal('5.00')
+        }
+
+        place_data.update(kwargs)
+        return Place.objects.create(owner=owner, **place_data)
+    return make_place
+
+
+@pytest.fixture
+def future_window():
+    """A two hour window starting on the hour, a couple of days out"""
+    start = (timezone.now() + timedelta(days=2)).replace(minute=0, second=0, microsecond=0)
+    return start, start + timedelta(hours=2)
@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+# Runs in a fresh interpreter, where only app loading has imported anything
+CHECK_MODELS = """
+import sys
+import django
+django.setup()
+from django.apps import apps
+assert 'places.urls' not in sys.modules
+print(sorted(model.__name__ for model in apps.get_app_config('places').get_models()))
+"""
+
+
+def test_app_load_registers_every_model():
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'config.test_settings'}
+    result = subprocess.run([sys.executable, '-c', CHECK_MODELS], capture_output=True, text=True, env=env,
+                            cwd=settings.BASE_DIR, check=True)
+
+    assert result.stdout.split('\n')[-2] == str(sorted([
+        'BlockedPeriod', 'Booking', 'BookingHold', 'BookingRollup', 'CalendarImport', 'IdempotencyKey',
+        'Place', 'PlaceImage', 'RateTable',
+    ]))
@@ -0,0 +1,104 @@
+from datetime import date, datetime, timedelta
+from io import StringIO
+
+import pytest
+import pytz
+from django.core.management import call_command
+from django.utils import timezone
+
+from places.blocked_period.models import BlockedPeriod
+from places.place.models import Place
+
+
+def utc(*args):
+    return pytz.UTC.localize(datetime(*args))
+
+
+def add_block(place, start, end, block_type='owner-block', **fields):
+    # Insert directly, the way fragmented blocks were left behind before create_block merged them
+    return BlockedPeriod.objects.bulk_create([
+        BlockedPeriod(place=place, start_datetime=start, end_datetime=end, block_type=block_type, **fields)
+    ])[0]
+
+
+@pytest.fixture
+def place(create_place):
+    return create_place()
+
+
+@pytest.mark.django_db
+class TestCompact:
+    def test_merges_runs_of_the_same_type(self, place):
+        add_block(place, utc(2030, 1, 1, 9), utc(2030, 1, 1, 10), reason='a')
+        add_block(place, utc(2030, 1, 1, 10), utc(2030, 1, 1, 11), reason='b')
+        add_block(place, utc(2030, 1, 1, 10, 30), utc(2030, 1, 1, 12), reason='a')
+        add_block(place, utc(2030, 1, 1, 11), utc(2030, 1, 1, 13), block_type='maintenance')
+        add_block(place, utc(2030, 1, 2, 9), utc(2030, 1, 2, 10))
+
+        assert BlockedPeriod.compact() == (3, 1)
+
+        blocks = list(BlockedPeriod.objects.order_by('start_datetime', 'block_type').values_list(
+            'start_datetime', 'end_datetime', 'block_type', 'reason'
+        ))
+        assert blocks == [
+            (utc(2030, 1, 1, 9), utc(2030, 1, 1, 12), 'owner-block', 'a; b'),
+            (utc(2030, 1, 1, 11), utc(2030, 1, 1, 13), 'maintenance', ''),
+            (utc(2030, 1, 2, 9), utc(2030, 1, 2, 10), 'owner-block', ''),
+        ]
+
+    def test_leaves_recurring_and_booking_blocks_alone(self, place, create_user):
+        place.create_booking(create_user(), utc(2030, 1, 1, 10), utc(2030, 1, 1, 11))
+        add_block(place, utc(2030, 1, 1, 9), utc(2030, 1, 1, 10), is_recurring=True, recurring_pattern='daily')
+        add_block(place, utc(2030, 1, 1, 9), utc(2030, 1, 1, 10))
+
+        assert BlockedPeriod.compact() == (0, 0)
+        assert BlockedPeriod.objects.count() == 3
+
+    def test_bumps_calendar_version_only_when_merging(self, place, create_place):
+        other = create_place()
+        add_block(place, utc(2030, 1, 1, 9), utc(2030, 1, 1, 10))
+        add_block(place, utc(2030, 1, 1, 10), utc(2030, 1, 1, 11))
+        add_block(other, utc(2030, 1, 1, 9), utc(2030, 1, 1, 10))
+
+        BlockedPeriod.compact()
+
+        versions = dict(Place.objects.values_list('id', 'calendar_version'))
+        assert versions[place.id] == place.calendar_version + 1
+        assert versions[other.id] == other.calendar_version
+
+
+@pytest.mark.django_db
+class TestPurgeEnded:
+    def test_deletes_blocks_over_before_horizon_in_chunks(self, place):
+        now = timezone.now()
+        for days in (40, 35, 31):
+            add_block(place, now - timedelta(days=days, hours=1), now - timedelta(days=days))
+        add_block(place, now - timedelta(days=40), now - timedelta(days=40) + timedelta(hours=1),
+                  is_recurring=True, recurring_pattern='daily', recurring_end_date=(now - timedelta(days=35)).date())
+        kept = [
+            add_block(place, now - timedelta(days=1, hours=1), now - timedelta(days=1)),
+            add_block(place, now - timedelta(days=40), now - timedelta(days=40) + timedelta(hours=1),
+                      is_recurring=True, recurring_pattern='weekly'),
+            add_block(place, now - timedelta(days=40), now - timedelta(days=40) + timedelta(hours=1),
+                      is_recurring=True, recurring_pattern='weekly', recurring_end_date=date.max),
+        ]
+
+        assert BlockedPeriod.purge_ended(now - timedelta(days=30), chunk_size=2) == 4
+
+        assert set(BlockedPeriod.objects.values_list('id', flat=True)) == {block.id for block in kept}
+
+
+@pytest.mark.django_db
+def test_command_reports_rows_reclaimed(place):
+    now = timezone.now()
+    add_block(place, now - timedelta(days=200, hours=1), now - timedelta(days=200))
+    add_block(place, now + timedelta(days=1), now + timedelta(days=1, hours=1))
+    add_block(place, now + timedelta(days=1, hours=1), now + timedelta(days=1, hours=2))
+    out = StringIO()
+
+    call_command('compact_blocked_periods', '--retention-days', '90', stdout=out)
+
+    output = out.getvalue()
+    assert 'purged: 1 block(s)' in output
+    assert 'compacted: 2 block(s) into 1' in output
+    assert 'rows: 3 -> 1' in output
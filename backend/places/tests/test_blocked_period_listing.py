@@ -0,0 +1,92 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+import pytz
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from places.blocked_period.models import BlockedPeriod
+
+
+def utc(*args):
+    return pytz.UTC.localize(datetime(*args))
+
+
+def add_block(place, start, end, **fields):
+    return BlockedPeriod.objects.create(place=place, start_datetime=start, end_datetime=end,
+                                        block_type=fields.pop('block_type', 'owner-block'), **fields)
+
+
+@pytest.fixture
+def place(create_place):
+    return create_place()
+
+
+@pytest.fixture
+def owner_client(api_client, place):
+    api_client.force_authenticate(user=place.owner)
+    return api_client
+
+
+def list_blocks(client, place, **params):
+    return client.get(reverse('blocked-periods'), {'place_id': place.id, **params})
+
+
+@pytest.mark.django_db
+class TestBlockedPeriodListing:
+    def test_expands_recurring_blocks_within_window(self, owner_client, place):
+        # Mon 2030-01-07 to Mon 2030-01-14
+        one_off = add_block(place, utc(2030, 1, 8, 12), utc(2030, 1, 8, 13))
+        nightly = add_block(place, utc(2030, 1, 1, 22), utc(2030, 1, 2, 6), is_recurring=True,
+                            recurring_pattern='weekdays', recurring_end_date=date(2030, 1, 9))
+        add_block(place, utc(2029, 1, 1, 9), utc(2029, 1, 1, 10))
+        add_block(place, utc(2029, 1, 1, 9), utc(2029, 1, 1, 10), is_recurring=True,
+                  recurring_pattern='daily', recurring_end_date=date(2029, 2, 1))
+
+        response = list_blocks(owner_client, place, start_date='2030-01-07T00:00:00Z',
+                               end_date='2030-01-14T00:00:00Z')
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        intervals = [(item['block_id'], item['start_datetime'], item['end_datetime']) for item in data['intervals']]
+        # Weeknights only, the last one starting on the end date and running past it
+        assert intervals == [
+            (nightly.id, '2030-01-07T22:00:00Z', '2030-01-08T06:00:00Z'),
+            (one_off.id, '2030-01-08T12:00:00Z', '2030-01-08T13:00:00Z'),
+            (nightly.id, '2030-01-08T22:00:00Z', '2030-01-09T06:00:00Z'),
+            (nightly.id, '2030-01-09T22:00:00Z', '2030-01-10T06:00:00Z'),
+        ]
+        assert [block['id'] for block in data['blocks']] == sorted([one_off.id, nightly.id])
+
+    def test_defaults_to_bounded_window(self, owner_client, place, settings):
+        settings.BLOCKED_PERIODS_PAST_DAYS = 7
+        settings.BLOCKED_PERIODS_WINDOW_DAYS = 30
+        now = timezone.now()
+        recent = add_block(place, now - timedelta(days=2), now - timedelta(days=2) + timedelta(hours=1))
+        add_block(place, now - timedelta(days=60), now - timedelta(days=60) + timedelta(hours=1))
+        add_block(place, now + timedelta(days=60), now + timedelta(days=60, hours=1))
+
+        data = list_blocks(owner_client, place).json()
+
+        assert [item['block_id'] for item in data['intervals']] == [recent.id]
+
+    def test_rejects_oversized_window(self, owner_client, place, settings):
+        settings.BLOCKED_PERIODS_MAX_WINDOW_DAYS = 31
+
+        response = list_blocks(owner_client, place, start_date='2030-01-01', end_date='2030-03-01')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_query_count_does_not_grow_with_history(self, owner_client, place, django_assert_num_queries):
+        BlockedPeriod.objects.bulk_create([
+            BlockedPeriod(place=place, start_datetime=utc(2029, 1, 1) + timedelta(hours=2 * n),
+                          end_datetime=utc(2029, 1, 1) + timedelta(hours=2 * n + 1), block_type='owner-block')
+            for n in range(500)
+        ])
+
+        # place, blocks
+        with django_assert_num_queries(2):
+            response = list_blocks(owner_client, place, start_date='2030-01-01', end_date='2030-02-01')
+
+        assert response.json()['intervals'] == []
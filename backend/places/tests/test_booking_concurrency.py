@@ -0,0 +1,126 @@
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError, connections, transaction
+
+from places.booking.models import Booking
+from places.place.models import Place
+from places.tests.conftest import requires_postgres
+
+
+@pytest.mark.django_db
+class TestCreateBookingLocking:
+    def test_second_overlapping_booking_is_rejected(self, create_place, create_user, future_window):
+        place = create_place()
+        start, end = future_window
+
+        booking, success, _ = place.create_booking(create_user(), start, end)
+        assert success
+
+        other, success, message = place.create_booking(create_user(), start + timedelta(hours=1), end)
+        assert not success
+        assert other is None
+        assert 'unavailable' in message
+        assert Booking.objects.filter(place=place).count() == 1
+
+    def test_adjacent_bookings_are_allowed(self, create_place, create_user, future_window):
+        place = create_place()
+        start, end = future_window
+
+        place.create_booking(create_user(), start, end)
+        _, success, _ = place.create_booking(create_user(), end, end + timedelta(hours=1))
+
+        assert success
+
+
+@requires_postgres
+@pytest.mark.django_db
+class TestBookingExclusionConstraint:
+    def _booking(self, place, user, start, end, status='pending'):
+        # bulk_create skips Booking.save() and its availability check, so only
+        # the database constraint stands in the way
+        return Booking(place=place, user=user, start_time=start, end_time=end,
+                       status=status, total_price=Decimal('10.00'))
+
+    def test_overlapping_active_bookings_violate_constraint(self, create_place, create_user, future_window):
+        place = create_place()
+        user = create_user()
+        start, end = future_window
+
+        Booking.objects.bulk_create([self._booking(place, user, start, end)])
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Booking.objects.bulk_create([self._booking(place, user, start + timedelta(hours=1), end)])
+
+    def test_create_booking_reports_constraint_violation(self, create_place, create_user, future_window):
+        place = create_place()
+        start, end = future_window
+        Booking.objects.bulk_create([self._booking(place, create_user(), start, end)])
+
+        with patch.object(Place, 'is_available', return_value=(True, '')):
+            booking, success, message = place.create_booking(create_user(), start, end)
+
+        assert (booking, success) == (None, False)
+        assert 'just booked' in message
+
+    def test_create_booking_raises_other_integrity_errors(self, create_place, create_user, future_window):
+        place = create_place()
+        start, end = future_window
+
+        with patch.object(Booking, 'save', side_effect=IntegrityError('some other constraint')), \
+                pytest.raises(IntegrityError):
+            place.create_booking(create_user(), start, end)
+
+    def test_inactive_and_other_place_bookings_may_overlap(self, create_place, create_user, future_window):
+        place, other_place = create_place(), create_place()
+        user = create_user()
+        start, end = future_window
+
+        Booking.objects.bulk_create([
+            self._booking(place, user, start, end),
+            self._booking(place, user, start, end, status='cancelled'),
+            self._booking(other_place, user, start, end),
+        ])
+
+        assert Booking.objects.count() == 3
+
+
+@requires_postgres
+@pytest.mark.django_db(transaction=True)
+class TestConcurrentBookings:
+    def test_only_one_of_many_concurrent_bookings_wins(self, create_place, create_user, future_window):
+        place = create_place()
+        users = [create_user() for _ in range(6)]
+        start, end = future_window
+        barrier = threading.Barrier(len(users))
+        results = []
+
+        def book(user):
+            barrier.wait()
+            try:
+                results.append(place.create_booking(user, start, end)[1])
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=book, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results.count(True) == 1
+        assert Booking.objects.filter(place=place).count() == 1
+
+    def test_benchmark_reports_no_double_bookings(self):
+        out = StringIO()
+        call_command('bench_booking_contention', threads=3, attempts=3, stdout=out)
+
+        output = out.getvalue()
+        assert 'single place' in output
+        assert 'many places' in output
+        assert 'double bookings: 1' not in output
+        assert output.count('double bookings: 0') == 2
@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from places.booking.models import Booking
+from places.booking_hold.models import BookingHold
+
+
+@pytest.mark.django_db
+class TestBookingHoldModel:
+    def test_hold_blocks_other_customers(self, create_place, create_user, future_window):
+        place = create_place()
+        start, end = future_window
+
+        hold, success, _ = BookingHold.place_hold(place, create_user(), start, end)
+        assert success
+        assert hold.expires_at > timezone.now()
+
+        is_available, reason = place.is_available(start, end)
+        assert not is_available
+        assert 'held' in reason
+
+        _, success, _ = place.create_booking(create_user(), start, end)
+        assert not success
+
+    def test_own_hold_points_to_booking_the_hold(self, create_place, create_user, future_window):
+        place = create_place()
+        user = create_user()
+        start, end = future_window
+        hold, _, _ = BookingHold.place_hold(place, user, start, end)
+
+        booking, success, message = place.create_booking(user, start, end)
+
+        assert (booking, success) == (None, False)
+        assert f"book hold {hold.pk}" in message
+        assert BookingHold.objects.filter(pk=hold.pk).exists()
+
+    def test_expired_hold_is_ignored(self, create_place, create_user, future_window):
+        place = create_place()
+        start, end = future_window
+        hold, _, _ = BookingHold.place_hold(place, create_user(), start, end)
+        BookingHold.objects.filter(pk=hold.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        assert place.is_available(start, end)[0]
+
+    def test_expired_holds_are_cleared_lazily_per_place(self, create_place, create_user, future_window):
+        place, other_place = create_place(), create_place()
+        start, end = future_window
+        stale, _, _ = BookingHold.place_hold(place, create_user(), start, end)
+        other, _, _ = BookingHold.place_hold(other_place, create_user(), start, end)
+        BookingHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        BookingHold.place_hold(place, create_user(), end, end + timedelta(hours=1))
+
+        assert not BookingHold.objects.filter(pk=stale.pk).exists()
+        assert BookingHold.objects.filter(pk=other.pk).exists()
+
+    def test_convert_to_booking_consumes_hold(self, create_place, create_user, future_window):
+        place = create_place()
+        start, end = future_window
+        hold, _, _ = BookingHold.place_hold(place, create_user(), start, end)
+
+        booking, success, _ = hold.convert_to_booking()
+
+        assert success
+        assert booking.start_time == start
+        assert booking.user == hold.user
+        assert not BookingHold.objects.filter(pk=hold.pk).exists()
+
+    def test_expired_hold_cannot_be_converted(self, create_place, create_user, future_window):
+        place = create_place()
+        start, end = future_window
+        hold, _, _ = BookingHold.place_hold(place, create_user(), start, end)
+        hold.expires_at = timezone.now() - timedelta(seconds=1)
+
+        booking, success, message = hold.convert_to_booking()
+
+        assert not success
+        assert booking is None
+        assert message == "Hold has expired"
+
+
+@pytest.mark.django_db
+class TestBookingHoldViews:
+    def test_hold_then_book(self, api_client, create_place, create_user, future_window):
+        place = create_place()
+        user = create_user()
+        start, end = future_window
+        api_client.force_authenticate(user=user)
+
+        response = api_client.post(reverse('create-hold'), {
+            'place_id': place.id,
+            'start_time': start.isoformat(),
+            'end_time': end.isoformat(),
+        }, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+
+        response = api_client.post(reverse('book-hold', args=[response.data['id']]))
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Booking.objects.filter(place=place, user=user).count() == 1
+
+    def test_cannot_book_someone_elses_hold(self, api_client, create_place, create_user, future_window):
+        place = create_place()
+        start, end = future_window
+        hold, _, _ = BookingHold.place_hold(place, create_user(), start, end)
+
+        api_client.force_authenticate(user=create_user())
+        response = api_client.post(reverse('book-hold', args=[hold.id]))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_release_hold(self, api_client, create_place, create_user, future_window):
+        place = create_place()
+        user = create_user()
+        start, end = future_window
+        hold, _, _ = BookingHold.place_hold(place, user, start, end)
+
+        api_client.force_authenticate(user=user)
+        response = api_client.delete(reverse('hold-detail', args=[hold.id]))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert place.is_available(start, end)[0]
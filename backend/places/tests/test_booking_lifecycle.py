@@ -0,0 +1,77 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from places.blocked_period.models import BlockedPeriod
+from places.booking.models import Booking
+
+
+@pytest.fixture
+def make_booking(create_place, create_user):
+    place = create_place()
+    user = create_user()
+
+    def make(start, hours=1, status='pending'):
+        booking = Booking(place=place, user=user, start_time=start, end_time=start + timedelta(hours=hours),
+                          status=status, total_price=Decimal('5.00'))
+        booking.save(availability_checked=True)
+        return booking
+    return make
+
+
+def statuses(*bookings):
+    return [Booking.objects.get(pk=booking.pk).status for booking in bookings]
+
+
+@pytest.mark.django_db
+class TestBulkTransitions:
+    def test_complete_finished(self, make_booking):
+        now = timezone.now()
+        finished = make_booking(now - timedelta(hours=3), status='confirmed')
+        running = make_booking(now - timedelta(minutes=30), status='confirmed')
+
+        assert Booking.complete_finished(now=now) == 1
+
+        assert statuses(finished, running) == ['completed', 'confirmed']
+        assert not BlockedPeriod.objects.filter(booking=finished).exists()
+        assert BlockedPeriod.objects.filter(booking=running).exists()
+
+    def test_expire_pending(self, make_booking):
+        now = timezone.now()
+        started = make_booking(now - timedelta(minutes=10))
+        stale = make_booking(now + timedelta(days=3))
+        Booking.objects.filter(pk=stale.pk).update(booking_time=now - timedelta(hours=30))
+        fresh = make_booking(now + timedelta(days=4))
+        confirmed = make_booking(now + timedelta(days=2), status='confirmed')
+
+        assert Booking.expire_pending(timedelta(hours=24), now=now) == 2
+
+        assert statuses(started, stale, fresh, confirmed) == ['cancelled', 'cancelled', 'pending', 'confirmed']
+        assert BlockedPeriod.objects.filter(booking__in=[fresh, confirmed]).count() == 2
+        assert BlockedPeriod.objects.count() == 2
+
+    def test_works_in_chunks(self, make_booking, django_assert_num_queries):
+        now = timezone.now()
+        for day in range(5):
+            make_booking(now - timedelta(days=day + 1), status='confirmed')
+
+        # 3 chunks x (savepoint, select, update, delete, bump calendar versions, release),
+        # then an empty select in its own savepoint
+        with django_assert_num_queries(3 * 6 + 3):
+            assert Booking.complete_finished(now=now, chunk_size=2) == 5
+
+
+@pytest.mark.django_db
+def test_command_reports_rates(make_booking):
+    make_booking(timezone.now() - timedelta(hours=3), status='confirmed')
+    out = StringIO()
+
+    call_command('transition_bookings', stdout=out)
+
+    assert 'completed: 1 booking(s)' in out.getvalue()
+    assert 'cancelled: 0 booking(s)' in out.getvalue()
+    assert 'rows/sec' in out.getvalue()
@@ -0,0 +1,122 @@
+"""
+Query budgets for the booking write path. Counts include the SAVEPOINT and
+RELEASE statements of the transaction blocks, since tests run inside one.
+"""
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from places.blocked_period.models import BlockedPeriod
+from places.booking.models import Booking
+
+
+@pytest.fixture
+def booking(create_place, create_user, future_window):
+    start, end = future_window
+    booking, _, _ = create_place().create_booking(create_user(), start + timedelta(days=2), end + timedelta(days=2))
+    # Start from a cold instance, as a view would
+    return Booking.objects.get(pk=booking.pk)
+
+
+@pytest.mark.django_db
+class TestBookingQueryBudget:
+    def test_create(self, create_place, create_user, future_window, django_assert_num_queries):
+        place = create_place()
+        user = create_user()
+        start, end = future_window
+
+        # lock place, load blocks, load holds, load rate table, insert booking, insert block,
+        # bump calendar version, upsert rollup, insert outbox event
+        with django_assert_num_queries(11):
+            booking, success, _ = place.create_booking(user, start, end)
+
+        assert success
+        assert BlockedPeriod.objects.get(booking=booking).reason == f"Booked by {user.email}"
+
+    def test_confirm(self, booking, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            success, _ = booking.confirm()
+
+        assert success
+        assert BlockedPeriod.objects.filter(booking=booking).exists()
+
+    def test_cancel(self, booking, django_assert_num_queries):
+        # update status, delete the block, bump the calendar version, subtract the rollup and
+        # record the event in one transaction
+        with django_assert_num_queries(7):
+            success, _ = booking.cancel()
+
+        assert success
+        assert not BlockedPeriod.objects.filter(booking=booking).exists()
+
+    def test_complete(self, booking, django_assert_num_queries):
+        booking.confirm()
+
+        with django_assert_num_queries(5):
+            success, _ = booking.complete()
+
+        assert success
+        assert Booking.objects.get(pk=booking.pk).status == 'completed'
+        assert not BlockedPeriod.objects.filter(booking=booking).exists()
+
+    def test_create_view(self, api_client, create_place, create_user, future_window, django_assert_num_queries):
+        place = create_place()
+        start, end = future_window
+        api_client.force_authenticate(user=create_user())
+
+        with django_assert_num_queries(11):
+            response = api_client.post(reverse('create-booking'), {
+                'place_id': place.id,
+                'start_time': start.isoformat(),
+                'end_time': end.isoformat(),
+            }, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_create_view_without_offset(self, api_client, create_place, create_user, future_window):
+        place = create_place()
+        start, end = future_window
+        api_client.force_authenticate(user=create_user())
+
+        response = api_client.post(reverse('create-booking'), {
+            'place_id': place.id,
+            'start_time': start.strftime('%Y-%m-%dT%H:%M:%S'),
+            'end_time': end.strftime('%Y-%m-%dT%H:%M:%S'),
+        }, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        booking = Booking.objects.get(pk=response.data['id'])
+        assert booking.start_time == start
+        assert booking.end_time == end
+
+    def test_patch_view(self, api_client, booking, django_assert_num_queries):
+        api_client.force_authenticate(user=booking.user)
+
+        with django_assert_num_queries(2):
+            response = api_client.patch(reverse('booking-detail', args=[booking.id]),
+                                        {'status': 'confirmed'}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+class TestStatusChanges:
+    def test_cancelled_booking_cannot_be_reactivated(self, booking):
+        booking.cancel()
+
+        success, message = booking.update_status('pending')
+
+        assert not success
+        assert 'back to Pending' in message
+        assert not BlockedPeriod.objects.filter(booking=booking).exists()
+
+    def test_saving_moved_booking_moves_its_block(self, booking):
+        booking.start_time += timedelta(hours=1)
+        booking.end_time += timedelta(hours=1)
+        booking.save()
+
+        block = BlockedPeriod.objects.get(booking=booking)
+        assert block.start_datetime == booking.start_time
+        assert block.end_datetime == booking.end_time
@@ -0,0 +1,126 @@
+from datetime import date, datetime, timedelta
+from io import StringIO
+
+import pytest
+import pytz
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from places.analytics.models import BookingRollup
+from places.booking.models import Booking
+
+
+def utc(*args):
+    return pytz.UTC.localize(datetime(*args))
+
+
+def rollups(place):
+    return {
+        row.day: (row.booked_minutes, row.revenue_cents, row.bookings_count)
+        for row in BookingRollup.objects.filter(place=place)
+    }
+
+
+@pytest.fixture
+def place(create_place):
+    return create_place()
+
+
+@pytest.mark.django_db
+class TestRollupMaintenance:
+    def test_booking_is_split_across_midnight(self, place, create_user):
+        # 22:00 to 02:00 at $5/h: 2 hours and $10 on each day
+        place.create_booking(create_user(), utc(2030, 1, 7, 22), utc(2030, 1, 8, 2))
+
+        assert rollups(place) == {date(2030, 1, 7): (120, 1000, 1), date(2030, 1, 8): (120, 1000, 0)}
+
+    def test_bookings_accumulate_and_cancel_subtracts(self, place, create_user):
+        user = create_user()
+        first, _, _ = place.create_booking(user, utc(2030, 1, 7, 9), utc(2030, 1, 7, 10))
+        place.create_booking(user, utc(2030, 1, 7, 12), utc(2030, 1, 7, 14))
+        assert rollups(place) == {date(2030, 1, 7): (180, 1500, 2)}
+
+        first.cancel()
+
+        assert rollups(place) == {date(2030, 1, 7): (120, 1000, 1)}
+
+    def test_completion_keeps_revenue(self, place, create_user):
+        booking, _, _ = place.create_booking(create_user(), utc(2030, 1, 7, 9), utc(2030, 1, 7, 10))
+        booking.confirm()
+        booking.complete()
+
+        assert rollups(place) == {date(2030, 1, 7): (60, 500, 1)}
+
+    def test_bulk_paths(self, place, create_user):
+        windows = [(utc(2030, 1, d, 9), utc(2030, 1, d, 10)) for d in (7, 8)]
+        place.create_bookings(create_user(), windows)
+        assert rollups(place) == {date(2030, 1, 7): (60, 500, 1), date(2030, 1, 8): (60, 500, 1)}
+
+        Booking.objects.update(booking_time=utc(2029, 1, 1))
+        Booking.expire_pending(timedelta(hours=24), now=utc(2029, 6, 1))
+
+        assert rollups(place) == {date(2030, 1, 7): (0, 0, 0), date(2030, 1, 8): (0, 0, 0)}
+
+    def test_backfill_rebuilds_from_bookings(self, place, create_user):
+        place.create_booking(create_user(), utc(2030, 1, 7, 9), utc(2030, 1, 7, 11))
+        BookingRollup.objects.update(booked_minutes=999)
+        out = StringIO()
+
+        call_command('backfill_booking_rollups', stdout=out)
+
+        assert rollups(place) == {date(2030, 1, 7): (120, 1000, 1)}
+        assert 'scanned 1 booking(s), wrote 1 rollup row(s)' in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestHostAnalytics:
+    @pytest.fixture
+    def owner(self, place):
+        return place.owner
+
+    @pytest.fixture
+    def booked(self, place, create_place, create_user):
+        user = create_user()
+        place.create_booking(user, utc(2030, 1, 7, 0), utc(2030, 1, 7, 6))
+        place.create_booking(user, utc(2030, 1, 9, 0), utc(2030, 1, 9, 12))
+        create_place().create_booking(user, utc(2030, 1, 7, 0), utc(2030, 1, 7, 6))
+
+    def test_daily(self, api_client, owner, place, booked, django_assert_num_queries):
+        api_client.force_authenticate(user=owner)
+
+        with django_assert_num_queries(1):
+            response = api_client.get(reverse('host-analytics'), {'start': '2030-01-07', 'end': '2030-01-13'})
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()['results']
+        assert [(r['period'], r['booked_minutes'], r['revenue'], r['occupancy']) for r in results] == [
+            ('2030-01-07', 360, '30.00', 0.25),
+            ('2030-01-09', 720, '60.00', 0.5),
+        ]
+        assert {r['place_id'] for r in results} == {place.id}
+
+    def test_weekly(self, api_client, owner, booked):
+        api_client.force_authenticate(user=owner)
+
+        response = api_client.get(reverse('host-analytics'), {'start': '2030-01-07', 'end': '2030-01-13',
+                                                              'group': 'week'})
+
+        [week] = response.json()['results']
+        assert (week['period'], week['booked_minutes'], week['bookings_count']) == ('2030-01-07', 1080, 2)
+        assert week['occupancy'] == round(1080 / (7 * 1440), 4)
+
+    def test_requires_dates(self, api_client, owner):
+        api_client.force_authenticate(user=owner)
+
+        response = api_client.get(reverse('host-analytics'), {'start': '2030-01-07'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_rejects_invalid_place_id(self, api_client, owner):
+        api_client.force_authenticate(user=owner)
+
+        response = api_client.get(reverse('host-analytics'), {'start': '2030-01-07', 'end': '2030-01-13',
+                                                              'place_id': 'abc'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
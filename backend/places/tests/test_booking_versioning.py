@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from places.blocked_period.models import BlockedPeriod
+from places.booking.models import Booking, BookingConflict
+
+
+@pytest.fixture
+def booking(create_place, create_user, future_window):
+    start, end = future_window
+    booking, _, _ = create_place().create_booking(create_user(), start + timedelta(days=2), end + timedelta(days=2))
+    return Booking.objects.get(pk=booking.pk)
+
+
+@pytest.mark.django_db
+class TestOptimisticTransitions:
+    def test_transitions_bump_version(self, booking):
+        booking.confirm()
+
+        assert booking.version == 2
+        assert Booking.objects.get(pk=booking.pk).version == 2
+
+    def test_stale_instance_cannot_overwrite(self, booking):
+        host_copy = Booking.objects.get(pk=booking.pk)
+        driver_copy = Booking.objects.get(pk=booking.pk)
+
+        driver_copy.cancel()
+        with pytest.raises(BookingConflict):
+            host_copy.confirm()
+
+        assert host_copy.status == 'pending'
+        assert Booking.objects.get(pk=booking.pk).status == 'cancelled'
+
+    def test_conflict_leaves_side_effects_alone(self, booking):
+        stale = Booking.objects.get(pk=booking.pk)
+        booking.confirm()
+
+        with pytest.raises(BookingConflict):
+            stale.cancel()
+
+        assert BlockedPeriod.objects.filter(booking=booking).exists()
+
+    def test_bulk_transitions_bump_version(self, booking):
+        now = timezone.now()
+        Booking.objects.filter(pk=booking.pk).update(status='confirmed', start_time=now - timedelta(hours=2),
+                                                     end_time=now - timedelta(hours=1))
+
+        Booking.complete_finished()
+
+        assert Booking.objects.get(pk=booking.pk).version == 2
+
+
+@pytest.mark.django_db
+class TestBookingDetailConflicts:
+    def test_patch_with_stale_version_returns_409(self, api_client, booking):
+        api_client.force_authenticate(user=booking.place.owner)
+        url = reverse('booking-detail', args=[booking.id])
+
+        first = api_client.patch(url, {'status': 'confirmed', 'version': 1}, format='json')
+        second = api_client.patch(url, {'status': 'cancelled', 'version': 1}, format='json')
+
+        assert first.status_code == status.HTTP_200_OK
+        assert first.json()['version'] == 2
+        assert second.status_code == status.HTTP_409_CONFLICT
+        assert Booking.objects.get(pk=booking.pk).status == 'confirmed'
+
+    def test_if_match_header(self, api_client, booking):
+        api_client.force_authenticate(user=booking.user)
+        url = reverse('booking-detail', args=[booking.id])
+
+        response = api_client.patch(url, {'status': 'cancelled'}, format='json', HTTP_IF_MATCH='"7"')
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+    def test_race_after_load_returns_409(self, api_client, booking, monkeypatch):
+        api_client.force_authenticate(user=booking.user)
+        original = Booking.update_status
+
+        def racing_update_status(self, new_status):
+            # Someone else confirms between this request loading and updating the booking
+            Booking.objects.filter(pk=self.pk).update(status='confirmed', version=self.version + 1)
+            return original(self, new_status)
+
+        monkeypatch.setattr(Booking, 'update_status', racing_update_status)
+        response = api_client.patch(reverse('booking-detail', args=[booking.id]), {'status': 'cancelled'},
+                                    format='json')
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert Booking.objects.get(pk=booking.pk).status == 'confirmed'
@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+from rest_framework import status
+
+from places.blocked_period.models import BlockedPeriod
+
+
+def utc(*args):
+    return pytz.UTC.localize(datetime(*args))
+
+
+def spans(place):
+    return [
+        (block.start_datetime, block.end_datetime)
+        for block in BlockedPeriod.objects.filter(place=place, block_type='owner-block').order_by('start_datetime')
+    ]
+
+
+@pytest.fixture
+def place(create_place):
+    return create_place()
+
+
+@pytest.mark.django_db
+class TestApplyBulk:
+    def test_merges_new_intervals_with_each_other_and_existing_blocks(self, place):
+        existing, _ = BlockedPeriod.create_block(place, utc(2030, 1, 1, 12), utc(2030, 1, 1, 13), reason='lunch')
+        untouched, _ = BlockedPeriod.create_block(place, utc(2030, 1, 2, 12), utc(2030, 1, 2, 13))
+
+        result = BlockedPeriod.apply_bulk(place, [
+            (utc(2030, 1, 1, 9), utc(2030, 1, 1, 11)),
+            (utc(2030, 1, 1, 11), utc(2030, 1, 1, 12)),
+            (utc(2030, 1, 3, 18), utc(2030, 1, 3, 22)),
+        ], reason='away')
+
+        assert result['deleted_block_ids'] == [existing.id]
+        assert spans(place) == [
+            (utc(2030, 1, 1, 9), utc(2030, 1, 1, 13)),
+            (utc(2030, 1, 2, 12), utc(2030, 1, 2, 13)),
+            (utc(2030, 1, 3, 18), utc(2030, 1, 3, 22)),
+        ]
+        assert sorted(block.reason for block in result['created']) == ['away', 'lunch; away']
+        assert BlockedPeriod.objects.filter(id=untouched.id).exists()
+
+    def test_already_blocked_intervals_change_nothing(self, place):
+        outer, _ = BlockedPeriod.create_block(place, utc(2030, 1, 1, 9), utc(2030, 1, 1, 17))
+
+        result = BlockedPeriod.apply_bulk(place, [(utc(2030, 1, 1, 10), utc(2030, 1, 1, 11))])
+
+        assert result == {'created': [], 'deleted_block_ids': [], 'conflicts': []}
+        assert list(BlockedPeriod.objects.values_list('id', flat=True)) == [outer.id]
+
+    def test_deletes_before_merging(self, place):
+        old, _ = BlockedPeriod.create_block(place, utc(2030, 1, 1, 9), utc(2030, 1, 1, 17), reason='old')
+
+        result = BlockedPeriod.apply_bulk(place, [(utc(2030, 1, 1, 10), utc(2030, 1, 1, 11))], delete_ids=[old.id])
+
+        assert result['deleted_block_ids'] == [old.id]
+        assert spans(place) == [(utc(2030, 1, 1, 10), utc(2030, 1, 1, 11))]
+        assert result['created'][0].reason == ''
+
+    def test_skips_intervals_overlapping_bookings(self, place, create_user):
+        place.create_booking(create_user(), utc(2030, 1, 2, 19), utc(2030, 1, 2, 20))
+        evenings = [(utc(2030, 1, day, 18), utc(2030, 1, day, 22)) for day in (1, 2, 3)]
+
+        result = BlockedPeriod.apply_bulk(place, evenings)
+
+        assert result['conflicts'] == [evenings[1]]
+        assert spans(place) == [evenings[0], evenings[2]]
+
+    def test_rejects_deleting_booking_blocks(self, place, create_user):
+        booking, _, _ = place.create_booking(create_user(), utc(2030, 1, 1, 9), utc(2030, 1, 1, 10))
+        block = BlockedPeriod.objects.get(booking=booking)
+
+        with pytest.raises(ValidationError, match='booking'):
+            BlockedPeriod.apply_bulk(place, delete_ids=[block.id])
+
+        assert BlockedPeriod.objects.filter(id=block.id).exists()
+
+    def test_rejects_deleting_imported_blocks(self, place):
+        block = BlockedPeriod.objects.create(place=place, start_datetime=utc(2030, 1, 1, 9),
+                                             end_datetime=utc(2030, 1, 1, 10), block_type='external')
+
+        with pytest.raises(ValidationError, match='another calendar'):
+            BlockedPeriod.apply_bulk(place, delete_ids=[block.id])
+
+        assert BlockedPeriod.objects.filter(id=block.id).exists()
+
+
+@pytest.mark.django_db
+class TestBulkEndpoint:
+    def test_month_of_evenings_in_one_request(self, api_client, place, django_assert_max_num_queries):
+        api_client.force_authenticate(user=place.owner)
+        start = utc(2030, 1, 1, 18)
+        evenings = [
+            {'start_datetime': (start + timedelta(days=day)).isoformat(),
+             'end_datetime': (start + timedelta(days=day, hours=4)).isoformat()}
+            for day in range(30)
+        ]
+
+        # Place, lock, fetch, insert and calendar version bump, whatever the number of intervals
+        with django_assert_max_num_queries(7):
+            response = api_client.post(reverse('blocked-periods-bulk'), {
+                'place_id': place.id, 'create': evenings, 'reason': 'evenings'
+            }, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()['created']) == 30
+        assert BlockedPeriod.objects.filter(place=place).count() == 30
+
+    def test_deletes_blocks(self, api_client, place):
+        block, _ = BlockedPeriod.create_block(place, utc(2030, 1, 1, 9), utc(2030, 1, 1, 10))
+        api_client.force_authenticate(user=place.owner)
+
+        response = api_client.post(reverse('blocked-periods-bulk'), {
+            'place_id': place.id, 'delete': [block.id]
+        }, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['deleted_block_ids'] == [block.id]
+        assert not BlockedPeriod.objects.exists()
+
+    def test_only_owner_can_apply(self, api_client, place, create_user):
+        api_client.force_authenticate(user=create_user())
+
+        response = api_client.post(reverse('blocked-periods-bulk'), {
+            'place_id': place.id,
+            'create': [{'start_datetime': '2030-01-01T09:00:00Z', 'end_datetime': '2030-01-01T10:00:00Z'}],
+        }, format='json')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert not BlockedPeriod.objects.exists()
+
+    def test_rejects_unknown_block_ids(self, api_client, place):
+        api_client.force_authenticate(user=place.owner)
+
+        response = api_client.post(reverse('blocked-periods-bulk'), {
+            'place_id': place.id, 'delete': [12345]
+        }, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert '12345' in response.json()['error']
@@ -0,0 +1,152 @@
+from datetime import date, datetime
+
+import pytest
+import pytz
+from django.urls import reverse
+from rest_framework import status
+
+from places.blocked_period.models import BlockedPeriod
+from places.booking.models import Booking
+
+
+def utc(*args):
+    return pytz.UTC.localize(datetime(*args))
+
+
+@pytest.fixture
+def weekday_windows():
+    # Mon 2030-01-07 .. Fri 2030-01-18, 09:00-17:00
+    return Booking.expand_recurrence(utc(2030, 1, 7, 9), utc(2030, 1, 7, 17), 'weekdays', date(2030, 1, 18))
+
+
+class TestExpandRecurrence:
+    def test_weekdays_skip_weekends(self, weekday_windows):
+        assert len(weekday_windows) == 10
+        assert all(start.weekday() < 5 for start, _ in weekday_windows)
+        assert weekday_windows[-1] == (utc(2030, 1, 18, 9), utc(2030, 1, 18, 17))
+
+    def test_weekly_repeats_on_first_weekday(self):
+        windows = Booking.expand_recurrence(utc(2030, 1, 9, 9), utc(2030, 1, 9, 10), 'weekly', date(2030, 1, 31))
+        assert [start.day for start, _ in windows] == [9, 16, 23, 30]
+
+
+@pytest.mark.django_db
+class TestRecurringBlockOccurrences:
+    def test_recurring_block_makes_place_unavailable(self, create_place):
+        place = create_place()
+        BlockedPeriod.objects.create(
+            place=place, start_datetime=utc(2030, 1, 1, 18), end_datetime=utc(2030, 1, 1, 20),
+            block_type='owner-block', is_recurring=True, recurring_pattern='daily'
+        )
+
+        is_available, reason = place.is_available(utc(2030, 1, 10, 19), utc(2030, 1, 10, 21))
+
+        assert not is_available
+        assert 'recurring' in reason
+        assert place.is_available(utc(2030, 1, 10, 20), utc(2030, 1, 10, 22))[0]
+
+    def test_overnight_and_ended_occurrences(self, create_place):
+        block = BlockedPeriod(
+            place=create_place(), start_datetime=utc(2030, 1, 1, 22), end_datetime=utc(2030, 1, 2, 6),
+            block_type='owner-block', is_recurring=True, recurring_pattern='daily',
+            recurring_end_date=date(2030, 1, 5)
+        )
+
+        assert list(block.occurrences_between(utc(2030, 1, 4, 2), utc(2030, 1, 4, 3))) == [
+            (utc(2030, 1, 3, 22), utc(2030, 1, 4, 6))
+        ]
+        assert list(block.occurrences_between(utc(2030, 1, 7, 2), utc(2030, 1, 7, 3))) == []
+
+
+@pytest.mark.django_db
+class TestCreateBookings:
+    def test_books_every_window(self, create_place, create_user, weekday_windows):
+        place = create_place()
+
+        results = place.create_bookings(create_user(), weekday_windows)
+
+        assert all(result['success'] for result in results)
+        assert Booking.objects.filter(place=place).count() == 10
+        assert BlockedPeriod.objects.filter(place=place, block_type='booking', booking__isnull=False).count() == 10
+
+    def test_conflicting_windows_fail_individually(self, create_place, create_user, weekday_windows):
+        place = create_place()
+        BlockedPeriod.objects.create(
+            place=place, start_datetime=utc(2030, 1, 9, 12), end_datetime=utc(2030, 1, 9, 13),
+            block_type='maintenance', reason='Resurfacing'
+        )
+        windows = weekday_windows + [(utc(2030, 1, 7, 16), utc(2030, 1, 7, 18))]
+
+        results = place.create_bookings(create_user(), windows)
+
+        failures = [result for result in results if not result['success']]
+        assert [failure['start_time'] for failure in failures] == [utc(2030, 1, 9, 9), utc(2030, 1, 7, 16)]
+        assert 'Resurfacing' in failures[0]['message']
+        assert failures[1]['message'] == "Overlaps another window in this request"
+        assert Booking.objects.filter(place=place).count() == 9
+
+    def test_naive_windows_are_utc(self, create_place, create_user):
+        place = create_place()
+        BlockedPeriod.objects.create(
+            place=place, start_datetime=utc(2030, 1, 7, 9), end_datetime=utc(2030, 1, 7, 10),
+            block_type='maintenance', reason='Resurfacing'
+        )
+        windows = [(datetime(2030, 1, 7, 9), datetime(2030, 1, 7, 11)), (datetime(2030, 1, 8, 9), utc(2030, 1, 8, 11))]
+
+        results = place.create_bookings(create_user(), windows)
+
+        assert [result['success'] for result in results] == [False, True]
+        assert results[1]['booking'].start_time == utc(2030, 1, 8, 9)
+
+    def test_query_count_does_not_grow_with_windows(self, create_place, create_user, weekday_windows,
+                                                    django_assert_max_num_queries):
+        place = create_place()
+        user = create_user()
+
+        with django_assert_max_num_queries(11):
+            place.create_bookings(user, weekday_windows)
+
+
+@pytest.mark.django_db
+class TestBulkBookingView:
+    def test_recurrence_request(self, api_client, create_place, create_user):
+        place = create_place()
+        api_client.force_authenticate(user=create_user())
+
+        response = api_client.post(reverse('create-bulk-bookings'), {
+            'place_id': place.id,
+            'recurrence': {
+                'start_time': '2030-01-07T09:00:00Z',
+                'end_time': '2030-01-07T17:00:00Z',
+                'pattern': 'weekdays',
+                'until': '2030-02-01',
+            },
+        }, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['created'] == 20
+        assert response.data['failed'] == 0
+        assert response.data['results'][0]['booking']['place'] == place.id
+
+    def test_all_windows_failing_is_bad_request(self, api_client, create_place, create_user):
+        place = create_place()
+        api_client.force_authenticate(user=create_user())
+
+        response = api_client.post(reverse('create-bulk-bookings'), {
+            'place_id': place.id,
+            'windows': [{'start_time': '2030-01-07T17:00:00Z', 'end_time': '2030-01-07T09:00:00Z'}],
+        }, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['failed'] == 1
+
+    def test_rejects_unknown_pattern(self, api_client, create_place, create_user):
+        api_client.force_authenticate(user=create_user())
+
+        response = api_client.post(reverse('create-bulk-bookings'), {
+            'place_id': create_place().id,
+            'recurrence': {'start_time': '2030-01-07T09:00:00Z', 'end_time': '2030-01-07T17:00:00Z',
+                           'pattern': 'fortnightly', 'until': '2030-02-01'},
+        }, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
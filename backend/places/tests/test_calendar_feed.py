@@ -0,0 +1,114 @@
+from datetime import date, datetime
+
+import pytest
+import pytz
+from django.urls import reverse
+from rest_framework import status
+
+from places.blocked_period.models import BlockedPeriod
+from places.calendar_feed.ical import fold
+from places.place.models import Place
+
+
+def utc(*args):
+    return pytz.UTC.localize(datetime(*args))
+
+
+def get_feed(client, place, **headers):
+    response = client.get(reverse('calendar-feed', args=[place.get_calendar_token()]), headers=headers)
+    body = b''.join(response.streaming_content).decode() if response.streaming else response.content.decode()
+    return response, body
+
+
+def calendar_version(place):
+    return Place.objects.get(pk=place.pk).calendar_version
+
+
+@pytest.fixture
+def place(create_place):
+    return create_place()
+
+
+def test_fold_splits_long_lines_without_breaking_characters():
+    line = 'DESCRIPTION:' + 'é' * 60
+
+    folded = fold(line)
+
+    parts = folded.split('\r\n ')
+    assert all(len(part.encode()) <= 75 for part in parts)
+    assert ''.join(parts) == line + '\r\n'
+
+
+@pytest.mark.django_db
+class TestCalendarFeed:
+    def test_renders_blocks_bookings_and_recurrences(self, client, place, create_user):
+        BlockedPeriod.create_block(place, utc(2030, 1, 1, 9), utc(2030, 1, 1, 10), reason='Gate repair; bring keys')
+        # Created on a Saturday, so the first weekday occurrence is the Monday after
+        BlockedPeriod.create_block(place, utc(2030, 1, 5, 22), utc(2030, 1, 5, 23), is_recurring=True,
+                                   recurring_pattern='weekdays', recurring_end_date=date(2030, 2, 1))
+        place.create_booking(create_user(email='driver@example.com'), utc(2030, 1, 2, 9), utc(2030, 1, 2, 10))
+
+        response, body = get_feed(client, place)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'].startswith('text/calendar')
+        assert body.startswith('BEGIN:VCALENDAR\r\n') and body.endswith('END:VCALENDAR\r\n')
+        assert body.count('BEGIN:VEVENT') == 3
+        assert 'DTSTART:20300101T090000Z' in body
+        assert r'DESCRIPTION:Gate repair\; bring keys' in body
+        assert 'DTSTART:20300107T220000Z\r\nDTEND:20300107T230000Z' in body
+        assert 'RRULE:FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR;UNTIL=20300201T220000Z' in body
+        assert 'SUMMARY:Booked' in body
+        assert 'driver@example.com' not in body
+
+    def test_unchanged_calendar_is_not_modified(self, client, place, django_assert_num_queries):
+        place.get_calendar_token()
+        response, _ = get_feed(client, place)
+        etag = response['ETag']
+
+        with django_assert_num_queries(1):
+            response, body = get_feed(client, place, if_none_match=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+        assert body == ''
+
+    def test_changes_to_blocks_and_bookings_change_the_etag(self, client, place, create_user):
+        versions = [calendar_version(place)]
+
+        block, _ = BlockedPeriod.create_block(place, utc(2030, 1, 1, 9), utc(2030, 1, 1, 10))
+        versions.append(calendar_version(place))
+        BlockedPeriod.apply_bulk(place, [(utc(2030, 1, 3, 9), utc(2030, 1, 3, 10))])
+        versions.append(calendar_version(place))
+        block.delete()
+        versions.append(calendar_version(place))
+        booking, _, _ = place.create_booking(create_user(), utc(2030, 1, 2, 9), utc(2030, 1, 2, 10))
+        versions.append(calendar_version(place))
+        booking.cancel()
+        versions.append(calendar_version(place))
+
+        assert versions == sorted(set(versions))
+        response, _ = get_feed(client, place)
+        assert response['ETag'] == f'"{place.pk}-{versions[-1]}"'
+
+    def test_unknown_token_is_not_found(self, client):
+        response = client.get(reverse('calendar-feed', args=['not-a-token']))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_owner_gets_and_rotates_feed_url(api_client, place, create_user, client):
+    url = reverse('calendar-feed-url', args=[place.id])
+
+    api_client.force_authenticate(user=create_user())
+    assert api_client.get(url).status_code == status.HTTP_403_FORBIDDEN
+
+    api_client.force_authenticate(user=place.owner)
+    old_url = api_client.get(url).json()['url']
+    new_url = api_client.post(url).json()['url']
+
+    assert old_url != new_url
+    assert old_url.endswith('.ics')
+    assert client.get(old_url).status_code == status.HTTP_404_NOT_FOUND
+    assert client.get(new_url).status_code == status.HTTP_200_OK
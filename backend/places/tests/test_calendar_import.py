@@ -0,0 +1,287 @@
+import io
+import socket
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+import pytz
+import requests
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from places.blocked_period.models import BlockedPeriod
+from places.calendar_feed.ical import parse_events
+from places.calendar_feed.models import CalendarImport
+from places.place.models import Place
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+
+def utc(*args):
+    return pytz.UTC.localize(datetime(*args))
+
+
+NOW = utc(2030, 1, 1)
+
+
+def fixture(name):
+    return (FIXTURES / name).read_text()
+
+
+def imported(calendar_import):
+    return {
+        block.external_uid: block
+        for block in BlockedPeriod.objects.filter(calendar_import=calendar_import)
+    }
+
+
+def generated_calendar(events, sequence=0):
+    lines = ['BEGIN:VCALENDAR', 'VERSION:2.0']
+    for n in range(events):
+        start = NOW + timedelta(hours=n * 3)
+        lines += [
+            'BEGIN:VEVENT', f'UID:event-{n}@example.com', f'SEQUENCE:{sequence}',
+            f'DTSTART:{start:%Y%m%dT%H%M%SZ}', f'DTEND:{start + timedelta(hours=1):%Y%m%dT%H%M%SZ}',
+            'SUMMARY:Busy', 'END:VEVENT',
+        ]
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(lines)
+
+
+@pytest.fixture
+def place(create_place):
+    return create_place()
+
+
+@pytest.fixture
+def calendar_import(place):
+    return CalendarImport.objects.create(place=place, name='Other site')
+
+
+class TestParseEvents:
+    def test_reads_fixture(self):
+        events = parse_events(fixture('external_calendar.ics'), NOW, timedelta(days=365))
+
+        assert events['stay-1@example.com']['reason'] == 'Reserved on Other Site, guest Sam'
+        assert events['all-day@example.com']['start_datetime'] == utc(2030, 1, 10)
+        assert events['all-day@example.com']['end_datetime'] == utc(2030, 1, 12)
+        assert events['all-day@example.com']['reason'].endswith('at all during the works')
+        # 09:00 in New York in January
+        assert events['local-time@example.com']['start_datetime'] == utc(2030, 1, 15, 14)
+        assert events['local-time@example.com']['end_datetime'] == utc(2030, 1, 15, 15, 30)
+        assert {'cancelled@example.com', 'free@example.com', 'past@example.com'}.isdisjoint(events)
+
+    def test_simple_rules_become_recurring_blocks(self):
+        events = parse_events(fixture('external_calendar.ics'), NOW, timedelta(days=365))
+
+        evenings = events['evenings@example.com']
+        assert evenings['is_recurring'] is True
+        assert evenings['recurring_pattern'] == 'weekdays'
+        assert evenings['recurring_end_date'] == date(2030, 1, 31)
+
+    def test_other_rules_are_expanded_with_exceptions_and_overrides(self):
+        events = parse_events(fixture('external_calendar.ics'), NOW, timedelta(days=365))
+
+        fortnightly = sorted(
+            (event['start_datetime'], event['reason']) for key, event in events.items()
+            if key.startswith('fortnightly@example.com/')
+        )
+        assert fortnightly == [
+            (utc(2030, 1, 2, 8), 'Fortnightly'),
+            (utc(2030, 1, 30, 10), 'Fortnightly (moved)'),
+            (utc(2030, 2, 13, 8), 'Fortnightly'),
+        ]
+
+
+@pytest.mark.django_db
+class TestSync:
+    def test_first_sync_creates_external_blocks(self, place, calendar_import):
+        counts = calendar_import.sync(fixture('external_calendar.ics'), now=NOW)
+
+        blocks = imported(calendar_import)
+        assert counts == {'created': len(blocks), 'updated': 0, 'deleted': 0}
+        assert {block.block_type for block in blocks.values()} == {'external'}
+        assert blocks['evenings@example.com'].is_recurring
+        # An imported booking on the other site makes the space unavailable here
+        assert not place.is_available(utc(2030, 1, 5, 11), utc(2030, 1, 5, 13))[0]
+
+    def test_resync_applies_only_the_differences(self, place, calendar_import):
+        calendar_import.sync(fixture('external_calendar.ics'), now=NOW)
+        before = imported(calendar_import)
+        version = Place.objects.get(pk=place.pk).calendar_version
+
+        counts = calendar_import.sync(fixture('external_calendar_updated.ics'), now=NOW)
+
+        after = imported(calendar_import)
+        assert counts == {'created': 1, 'updated': 1, 'deleted': 1}
+        assert after['stay-1@example.com'].id == before['stay-1@example.com'].id
+        assert after['stay-1@example.com'].start_datetime == utc(2030, 1, 5, 11)
+        assert after['stay-1@example.com'].external_sequence == 1
+        assert 'all-day@example.com' not in after
+        assert 'stay-2@example.com' in after
+        assert after['evenings@example.com'].updated_at == before['evenings@example.com'].updated_at
+        assert Place.objects.get(pk=place.pk).calendar_version > version
+
+    def test_stale_sequence_is_ignored(self, calendar_import):
+        calendar_import.sync(fixture('external_calendar_updated.ics'), now=NOW)
+
+        counts = calendar_import.sync(fixture('external_calendar.ics'), now=NOW)
+
+        assert counts['updated'] == 0
+        assert imported(calendar_import)['stay-1@example.com'].start_datetime == utc(2030, 1, 5, 11)
+
+    def test_unchanged_large_calendar_resyncs_without_writing_blocks(self, calendar_import,
+                                                                     django_assert_num_queries):
+        body = generated_calendar(5000)
+        assert calendar_import.sync(body, now=NOW)['created'] == 5000
+
+        # savepoint, lock place, read existing blocks, save last_synced_at, release
+        with django_assert_num_queries(5):
+            counts = calendar_import.sync(body, now=NOW)
+
+        assert counts == {'created': 0, 'updated': 0, 'deleted': 0}
+
+    def test_other_blocks_are_left_alone(self, place, calendar_import):
+        own, _ = BlockedPeriod.create_block(place, utc(2030, 1, 5, 10), utc(2030, 1, 5, 12))
+        calendar_import.sync(fixture('external_calendar.ics'), now=NOW)
+
+        calendar_import.sync('BEGIN:VCALENDAR\r\nEND:VCALENDAR\r\n', now=NOW)
+
+        assert list(BlockedPeriod.objects.values_list('id', flat=True)) == [own.id]
+
+
+@pytest.mark.django_db
+class TestImportEndpoints:
+    def test_owner_imports_uploaded_file(self, api_client, place):
+        api_client.force_authenticate(user=place.owner)
+        upload = SimpleUploadedFile('calendar.ics', generated_calendar(3).encode(), content_type='text/calendar')
+
+        response = api_client.post(reverse('calendar-imports', args=[place.id]), {'name': 'Other', 'file': upload},
+                                   format='multipart')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()['created'] == 3
+        assert BlockedPeriod.objects.filter(place=place, block_type='external').count() == 3
+
+    def test_requires_url_or_file(self, api_client, place):
+        api_client.force_authenticate(user=place.owner)
+
+        response = api_client.post(reverse('calendar-imports', args=[place.id]), {'name': 'Other'}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not CalendarImport.objects.exists()
+
+    def test_deleting_import_removes_its_blocks(self, api_client, place, calendar_import, create_user):
+        calendar_import.sync(generated_calendar(3), now=NOW)
+        url = reverse('calendar-import-detail', args=[calendar_import.id])
+
+        api_client.force_authenticate(user=create_user())
+        assert api_client.delete(url).status_code == status.HTTP_403_FORBIDDEN
+
+        api_client.force_authenticate(user=place.owner)
+        assert api_client.delete(url).status_code == status.HTTP_200_OK
+        assert not BlockedPeriod.objects.exists()
+
+
+HOSTS = {'calendar.example.com': '93.184.216.34', 'internal.example.com': '10.0.0.5'}
+
+
+def resolve(host, port, *args, **kwargs):
+    return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (HOSTS.get(host, host), port))]
+
+
+def fake_response(status_code=200, body=b'', headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.raw = io.BytesIO(body)
+    response.headers.update(headers or {})
+    return response
+
+
+@pytest.fixture
+def fetches():
+    """Records the URLs fetched in urls, answering each from responses[url]"""
+    recorded = SimpleNamespace(urls=[], responses={})
+
+    def get(session, url, **kwargs):
+        assert kwargs['stream'] and not kwargs['allow_redirects']
+        recorded.urls.append(url)
+        return recorded.responses[url]
+
+    with patch('places.calendar_feed.models.socket.getaddrinfo', side_effect=resolve), \
+         patch.object(requests.Session, 'get', autospec=True, side_effect=get):
+        yield recorded
+
+
+@pytest.mark.django_db
+class TestFetchAndSync:
+    def test_fetches_public_calendar(self, calendar_import, fetches):
+        calendar_import.url = 'https://calendar.example.com/cal.ics'
+        fetches.responses[calendar_import.url] = fake_response(body=generated_calendar(2).encode(),
+                                                               headers={'ETag': '"v1"'})
+
+        assert calendar_import.fetch_and_sync(now=NOW) == {'created': 2, 'updated': 0, 'deleted': 0}
+        assert calendar_import.etag == '"v1"'
+
+    @pytest.mark.parametrize('url', [
+        'http://127.0.0.1/cal.ics',
+        'http://169.254.169.254/latest/meta-data/',
+        'http://internal.example.com/cal.ics',
+        'http://[::1]/cal.ics',
+        'file:///etc/passwd',
+    ])
+    def test_refuses_non_public_urls(self, calendar_import, fetches, url):
+        calendar_import.url = url
+
+        with pytest.raises(requests.RequestException):
+            calendar_import.fetch_and_sync(now=NOW)
+
+        assert fetches.urls == []
+        calendar_import.refresh_from_db()
+        assert calendar_import.last_error == "The calendar URL must be a public http(s) address"
+
+    def test_refuses_redirect_to_private_address(self, calendar_import, fetches):
+        calendar_import.url = 'https://calendar.example.com/cal.ics'
+        fetches.responses[calendar_import.url] = fake_response(
+            302, headers={'Location': 'http://169.254.169.254/latest/meta-data/'}
+        )
+
+        with pytest.raises(requests.RequestException):
+            calendar_import.fetch_and_sync(now=NOW)
+
+        assert fetches.urls == ['https://calendar.example.com/cal.ics']
+
+    @override_settings(CALENDAR_IMPORT_MAX_BYTES=1000)
+    def test_stops_reading_at_the_size_limit(self, calendar_import, fetches):
+        calendar_import.url = 'https://calendar.example.com/cal.ics'
+        fetches.responses[calendar_import.url] = fake_response(body=generated_calendar(100).encode())
+
+        with pytest.raises(requests.RequestException):
+            calendar_import.fetch_and_sync(now=NOW)
+
+        calendar_import.refresh_from_db()
+        assert calendar_import.last_error == "The calendar is too large to import"
+        assert not BlockedPeriod.objects.exists()
+
+    def test_fetch_errors_are_not_echoed(self, api_client, place, fetches):
+        api_client.force_authenticate(user=place.owner)
+        url = 'https://calendar.example.com/secret-token/cal.ics'
+        fetches.responses[url] = fake_response(500, body=b'stack trace')
+
+        response = api_client.post(reverse('calendar-imports', args=[place.id]), {'url': url}, format='json')
+
+        assert response.status_code == status.HTTP_502_BAD_GATEWAY
+        assert response.json() == {'error': "The calendar could not be fetched"}
+
+    def test_private_url_is_rejected_with_400(self, api_client, place, fetches):
+        api_client.force_authenticate(user=place.owner)
+
+        response = api_client.post(reverse('calendar-imports', args=[place.id]),
+                                   {'url': 'http://internal.example.com/cal.ics'}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not CalendarImport.objects.exists()
@@ -0,0 +1,155 @@
+import threading
+from datetime import datetime
+
+import pytest
+import pytz
+from django.core.exceptions import ValidationError
+from django.db import connections
+
+from places.blocked_period.models import BlockedPeriod
+from places.booking.models import Booking
+from places.tests.conftest import requires_postgres
+
+
+def utc(*args):
+    return pytz.UTC.localize(datetime(*args))
+
+
+def spans(place):
+    return [
+        (block.start_datetime, block.end_datetime)
+        for block in BlockedPeriod.objects.filter(place=place, block_type='owner-block').order_by('start_datetime')
+    ]
+
+
+@pytest.fixture
+def place(create_place):
+    return create_place()
+
+
+def test_union_intervals_merges_overlapping_and_touching():
+    merged = BlockedPeriod.union_intervals([(5, 7, 'c'), (1, 3, 'a'), (3, 4, 'b'), (9, 10, 'd'), (6, 9, 'e')])
+
+    assert merged == [(1, 4, ['a', 'b']), (5, 10, ['c', 'e', 'd'])]
+
+
+@pytest.mark.django_db
+class TestCreateBlock:
+    def test_merges_overlapping_and_touching_blocks(self, place):
+        first, _ = BlockedPeriod.create_block(place, utc(2030, 1, 1, 9), utc(2030, 1, 1, 10), reason='a')
+        second, _ = BlockedPeriod.create_block(place, utc(2030, 1, 1, 11), utc(2030, 1, 1, 12), reason='b')
+
+        merged, info = BlockedPeriod.create_block(place, utc(2030, 1, 1, 10), utc(2030, 1, 1, 11), reason='c')
+
+        assert info['merged'] is True
+        assert sorted(info['deleted_block_ids']) == sorted([first.id, second.id])
+        assert spans(place) == [(utc(2030, 1, 1, 9), utc(2030, 1, 1, 12))]
+        assert merged.reason == 'a; b; c'
+
+    def test_merged_reasons_are_deduped_and_fit_the_column(self, place):
+        BlockedPeriod.create_block(place, utc(2030, 1, 1, 9), utc(2030, 1, 1, 10), reason='x' * 200)
+        BlockedPeriod.create_block(place, utc(2030, 1, 1, 11), utc(2030, 1, 1, 12), reason='x' * 200)
+
+        merged, _ = BlockedPeriod.create_block(place, utc(2030, 1, 1, 10), utc(2030, 1, 1, 11), reason='y' * 200)
+
+        assert merged.reason == ('x' * 200 + '; ' + 'y' * 200)[:255]
+        assert BlockedPeriod.objects.get().reason == merged.reason
+
+    def test_contained_block_is_not_created(self, place):
+        outer, _ = BlockedPeriod.create_block(place, utc(2030, 1, 1, 9), utc(2030, 1, 1, 17))
+
+        found, info = BlockedPeriod.create_block(place, utc(2030, 1, 1, 10), utc(2030, 1, 1, 11))
+
+        assert info['contained'] is True
+        assert found.id == outer.id
+        assert BlockedPeriod.objects.count() == 1
+
+    def test_rejects_overlap_with_active_booking_only(self, place, create_user):
+        booking, _, _ = place.create_booking(create_user(), utc(2030, 1, 1, 9), utc(2030, 1, 1, 10))
+
+        with pytest.raises(ValidationError):
+            BlockedPeriod.create_block(place, utc(2030, 1, 1, 9, 30), utc(2030, 1, 1, 11))
+
+        # Touching a booking is fine, and is not merged with it
+        BlockedPeriod.create_block(place, utc(2030, 1, 1, 10), utc(2030, 1, 1, 11))
+        assert BlockedPeriod.objects.get(booking=booking).end_datetime == utc(2030, 1, 1, 10)
+
+        Booking.objects.get(pk=booking.pk).cancel()
+        BlockedPeriod.create_block(place, utc(2030, 1, 1, 9), utc(2030, 1, 1, 10))
+        assert spans(place) == [(utc(2030, 1, 1, 9), utc(2030, 1, 1, 11))]
+
+    def test_recurring_blocks_are_not_merged(self, place):
+        BlockedPeriod.create_block(place, utc(2030, 1, 1, 9), utc(2030, 1, 1, 10))
+
+        _, info = BlockedPeriod.create_block(place, utc(2030, 1, 1, 9), utc(2030, 1, 1, 11), is_recurring=True,
+                                             recurring_pattern='daily')
+
+        assert info['merged'] is False
+        assert BlockedPeriod.objects.count() == 2
+
+    def test_query_count(self, place, django_assert_num_queries):
+        for hour in (9, 11, 13):
+            BlockedPeriod.create_block(place, utc(2030, 1, 1, hour), utc(2030, 1, 1, hour + 1))
+
+        # savepoint, lock place, fetch nearby blocks, delete, insert, bump calendar version, release
+        with django_assert_num_queries(7):
+            BlockedPeriod.create_block(place, utc(2030, 1, 1, 10), utc(2030, 1, 1, 13))
+
+        assert spans(place) == [(utc(2030, 1, 1, 9), utc(2030, 1, 1, 14))]
+
+
+@requires_postgres
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_adjacent_blocks_merge_into_one(place):
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def block(hour):
+        try:
+            barrier.wait()
+            BlockedPeriod.create_block(place, utc(2030, 1, 1, hour), utc(2030, 1, 1, hour + 1))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=block, args=(hour,)) for hour in range(8, 16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert spans(place) == [(utc(2030, 1, 1, 8), utc(2030, 1, 1, 16))]
+
+
+@requires_postgres
+@pytest.mark.django_db(transaction=True)
+def test_block_and_booking_race_never_overlap(place, create_user):
+    user = create_user()
+    barrier = threading.Barrier(2)
+
+    def book():
+        try:
+            barrier.wait()
+            place.create_booking(user, utc(2030, 1, 1, 9), utc(2030, 1, 1, 10))
+        finally:
+            connections.close_all()
+
+    def block():
+        try:
+            barrier.wait()
+            BlockedPeriod.create_block(place, utc(2030, 1, 1, 8), utc(2030, 1, 1, 12))
+        except ValidationError:
+            pass
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=book), threading.Thread(target=block)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Exactly one of them wins the window
+    assert BlockedPeriod.objects.filter(place=place).count() == 1
@@ -0,0 +1,80 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+import pytz
+from django.urls import reverse
+from rest_framework import status
+
+from places.booking.models import Booking
+
+
+def utc(*args):
+    return pytz.UTC.localize(datetime(*args))
+
+
+@pytest.fixture
+def host(create_user):
+    return create_user()
+
+
+@pytest.fixture
+def bookings(host, create_place, create_user):
+    places = [create_place(owner=host) for _ in range(3)]
+    other_place = create_place()
+    driver = create_user()
+
+    made = []
+    for day in range(1, 7):
+        for place in places + [other_place]:
+            booking = Booking(place=place, user=driver, start_time=utc(2030, 1, day, 9),
+                              end_time=utc(2030, 1, day, 10), total_price=Decimal('5.00'),
+                              status='confirmed' if day % 2 else 'pending')
+            booking.save(availability_checked=True)
+            made.append(booking)
+    return [booking for booking in made if booking.place.owner_id == host.id]
+
+
+@pytest.mark.django_db
+class TestHostBookings:
+    def test_lists_bookings_across_all_listings(self, api_client, host, bookings):
+        api_client.force_authenticate(user=host)
+
+        seen = []
+        cursor = None
+        while True:
+            params = {'limit': 5, **({'cursor': cursor} if cursor else {})}
+            body = api_client.get(reverse('host-bookings'), params).json()
+            seen += [result['id'] for result in body['results']]
+            cursor = body['next_cursor']
+            if not cursor:
+                break
+
+        assert seen == [booking.id for booking in sorted(bookings, key=lambda b: (b.start_time, b.id))]
+
+    def test_filters_by_status_and_range(self, api_client, host, bookings):
+        api_client.force_authenticate(user=host)
+
+        response = api_client.get(reverse('host-bookings'), {
+            'status': 'confirmed', 'start': '2030-01-02T00:00:00Z', 'end': '2030-01-05T12:00:00Z', 'limit': 50
+        })
+
+        results = response.json()['results']
+        assert {result['start_time'][:10] for result in results} == {'2030-01-03', '2030-01-05'}
+        assert len(results) == 6
+        assert results[0]['user']['email'] == bookings[0].user.email
+
+    def test_rejects_invalid_place_id(self, api_client, host):
+        api_client.force_authenticate(user=host)
+
+        response = api_client.get(reverse('host-bookings'), {'place_id': 'abc'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_query_count_is_flat(self, api_client, host, bookings, django_assert_num_queries):
+        api_client.force_authenticate(user=host)
+
+        with django_assert_num_queries(1):
+            response = api_client.get(reverse('host-bookings'), {'limit': 18})
+
+        assert len(response.json()['results']) == 18
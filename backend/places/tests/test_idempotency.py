@@ -0,0 +1,162 @@
+import threading
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.db import connections
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from places.booking.models import Booking
+from places.idempotency.models import IdempotencyKey
+from places.place.models import Place
+from places.tests.conftest import requires_postgres
+
+
+@pytest.fixture
+def booking_payload(create_place, future_window):
+    start, end = future_window
+    return {'place_id': create_place().id, 'start_time': start.isoformat(), 'end_time': end.isoformat()}
+
+
+@pytest.fixture
+def client(api_client, create_user):
+    api_client.force_authenticate(user=create_user())
+    return api_client
+
+
+@pytest.mark.django_db
+class TestIdempotentBooking:
+    def test_replay_returns_stored_response_without_rerunning(self, client, booking_payload):
+        url = reverse('create-booking')
+
+        first = client.post(url, booking_payload, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        with patch('places.place.models.Place.create_booking') as create_booking:
+            second = client.post(url, booking_payload, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+
+        assert first.status_code == second.status_code == status.HTTP_201_CREATED
+        assert second.json() == first.json()
+        assert second['Idempotent-Replayed'] == 'true'
+        create_booking.assert_not_called()
+        assert Booking.objects.count() == 1
+
+    def test_failed_validation_is_replayed_too(self, client, booking_payload):
+        booking_payload['end_time'] = booking_payload['start_time']
+        url = reverse('create-booking')
+
+        first = client.post(url, booking_payload, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        second = client.post(url, booking_payload, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+
+        assert first.status_code == second.status_code == status.HTTP_400_BAD_REQUEST
+        assert second['Idempotent-Replayed'] == 'true'
+
+    def test_key_reused_for_different_payload(self, client, booking_payload):
+        url = reverse('create-booking')
+        client.post(url, booking_payload, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+
+        booking_payload['end_time'] = booking_payload['start_time']
+        response = client.post(url, booking_payload, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_keys_are_scoped_per_user(self, api_client, create_user, booking_payload):
+        url = reverse('create-booking')
+        for _ in range(2):
+            api_client.force_authenticate(user=create_user())
+            api_client.post(url, booking_payload, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+
+        assert IdempotencyKey.objects.filter(key='abc').count() == 2
+
+    def test_without_key_every_request_runs(self, client, booking_payload):
+        url = reverse('create-booking')
+
+        client.post(url, booking_payload, format='json')
+        response = client.post(url, booking_payload, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not IdempotencyKey.objects.exists()
+
+    def test_duplicate_of_in_flight_request_conflicts(self, client, booking_payload):
+        url = reverse('create-booking')
+        client.post(url, booking_payload, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        IdempotencyKey.objects.update(status='in_progress', locked_until=timezone.now() + timedelta(minutes=1))
+
+        with patch('places.place.models.Place.create_booking') as create_booking:
+            response = client.post(url, booking_payload, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        create_booking.assert_not_called()
+
+    def test_stale_in_flight_key_is_taken_over(self, client, booking_payload):
+        booking_payload['end_time'] = booking_payload['start_time']
+        url = reverse('create-booking')
+        client.post(url, booking_payload, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        IdempotencyKey.objects.update(status='in_progress', locked_until=timezone.now() - timedelta(seconds=1))
+
+        response = client.post(url, booking_payload, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'Idempotent-Replayed' not in response
+        record = IdempotencyKey.objects.get()
+        assert record.status == 'completed'
+        assert record.locked_until is None
+
+    def test_server_error_releases_key(self, client, booking_payload):
+        url = reverse('create-booking')
+        with patch('places.place.models.Place.create_booking', side_effect=RuntimeError('boom')):
+            response = client.post(url, booking_payload, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert not IdempotencyKey.objects.exists()
+
+
+@pytest.mark.django_db
+def test_list_driveway_replay_skips_second_listing(client):
+    payload = {
+        'name': 'Driveway',
+        'address': '1 Main St, Springfield, IL 62701',
+        'price_per_hour': '4.50',
+        'photo_count': '0',
+    }
+    url = reverse('list-driveway')
+
+    first = client.post(url, payload, format='multipart', HTTP_IDEMPOTENCY_KEY='listing-1')
+    second = client.post(url, payload, format='multipart', HTTP_IDEMPOTENCY_KEY='listing-1')
+
+    assert first.status_code == status.HTTP_201_CREATED
+    assert second.json()['id'] == first.json()['id']
+    assert Place.objects.count() == 1
+
+
+@requires_postgres
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_duplicates_conflict(create_user, booking_payload):
+    user = create_user()
+    original = Place.create_booking
+    responses = []
+
+    def slow_create_booking(self, *args, **kwargs):
+        time.sleep(0.5)
+        return original(self, *args, **kwargs)
+
+    def post():
+        client = APIClient()
+        client.force_authenticate(user=user)
+        try:
+            responses.append(client.post(reverse('create-booking'), booking_payload, format='json',
+                                         HTTP_IDEMPOTENCY_KEY='abc'))
+        finally:
+            connections.close_all()
+
+    with patch.object(Place, 'create_booking', slow_create_booking):
+        threads = [threading.Thread(target=post) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert sorted(response.status_code for response in responses) == [201, 409, 409]
+    assert Booking.objects.count() == 1
@@ -0,0 +1,117 @@
+import io
+from io import StringIO
+from unittest.mock import patch
+
+import boto3
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+
+from jobs.models import Job
+from places.place_image.models import PlaceImage
+from places.place_image.serializers import PlaceImageSerializer
+from places.s3_service import s3_service
+from places.util.local_s3 import LocalS3
+
+
+@pytest.fixture
+def bucket():
+    client = boto3.client('s3', region_name=s3_service.region,
+                          aws_access_key_id='test', aws_secret_access_key='test')
+    bucket = LocalS3(client, keep_bodies=True)
+    with patch.object(s3_service, 'client', client):
+        yield bucket
+
+
+def photo(size=(2000, 1000), image_format='JPEG', mode='RGB', name='front.jpg'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, (255, 0, 0, 128) if mode == 'RGBA' else 'red').save(buffer, image_format)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{image_format.lower()}')
+
+
+def stored_image(bucket, key):
+    return Image.open(io.BytesIO(bucket.bodies[key][1]))
+
+
+@pytest.mark.django_db
+class TestGenerateVariants:
+    def test_writes_each_width_in_each_format(self, create_place, bucket):
+        image = PlaceImage.add_image_to_place(create_place(), photo(), is_primary=True)
+
+        variants = image.generate_variants()
+
+        assert set(variants) == {'webp', 'jpeg'}
+        stem = image.image_key.rsplit('.', 1)[0]
+        for image_format, pil_format in PlaceImage.VARIANT_FORMATS.items():
+            assert set(variants[image_format]) == {'320', '640', '1280'}
+            for width, key in variants[image_format].items():
+                assert key == f"{stem}_{width}w.{image_format}"
+                stored = stored_image(bucket, key)
+                assert stored.format == pil_format
+                assert stored.size == (int(width), int(width) // 2)
+                assert bucket.objects[key]['content_type'] == f'image/{image_format}'
+        image.refresh_from_db()
+        assert image.variants == variants
+
+    def test_small_and_transparent_images(self, create_place, bucket):
+        image = PlaceImage.add_image_to_place(
+            create_place(), photo(size=(200, 100), image_format='PNG', mode='RGBA', name='logo.png')
+        )
+
+        variants = image.generate_variants()
+
+        assert {image_format: list(widths) for image_format, widths in variants.items()} == {
+            'webp': ['200'], 'jpeg': ['200']
+        }
+        assert stored_image(bucket, variants['webp']['200']).mode == 'RGBA'
+        assert stored_image(bucket, variants['jpeg']['200']).mode == 'RGB'
+
+    def test_srcset_and_delete(self, create_place, bucket):
+        image = PlaceImage.add_image_to_place(create_place(), photo())
+        image.generate_variants()
+
+        srcset = PlaceImageSerializer(image).data['srcset']
+        assert srcset['webp'].split(', ') == [
+            f"{s3_service.get_url(image.variants['webp'][width])} {width}w" for width in ('320', '640', '1280')
+        ]
+
+        image.delete()
+        assert bucket.objects == {}
+
+
+@pytest.mark.django_db
+class TestVariantJobs:
+    def test_new_images_queue_a_job(self, create_place, bucket):
+        place = create_place()
+        images = place.add_images({'photo_1': photo(), 'photo_2': photo()}, 2)
+
+        job = Job.objects.get(task='place_images.generate_variants')
+        assert job.payload == {'image_ids': [image.id for image in images]}
+
+        job.status = 'running'
+        assert job.run()
+        assert all(image.variants for image in PlaceImage.objects.all())
+
+    def test_backfill_queues_images_without_variants(self, create_place, bucket):
+        place = create_place()
+        done = PlaceImage.add_image_to_place(place, photo())
+        done.generate_variants()
+        pending = [PlaceImage.add_image_to_place(place, photo()) for _ in range(3)]
+        Job.objects.all().delete()
+
+        out = StringIO()
+        call_command('backfill_image_variants', batch_size=2, stdout=out)
+
+        assert 'queued 3 image(s)' in out.getvalue()
+        assert [job.payload['image_ids'] for job in Job.objects.order_by('id')] == [
+            [pending[0].id, pending[1].id], [pending[2].id]
+        ]
+
+    def test_backfill_inline(self, create_place, bucket):
+        image = PlaceImage.add_image_to_place(create_place(), photo())
+
+        call_command('backfill_image_variants', inline=True, stdout=StringIO())
+
+        image.refresh_from_db()
+        assert set(image.variants['jpeg']) == {'320', '640', '1280'}
@@ -0,0 +1,85 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from places.booking.models import Booking
+from places.place_image.models import PlaceImage
+
+
+@pytest.fixture
+def user(create_user):
+    return create_user()
+
+
+@pytest.fixture
+def make_bookings(create_place, user):
+    def make(count, start=None):
+        start = start or timezone.now().replace(microsecond=0) + timedelta(days=3)
+        bookings = []
+        for i in range(count):
+            place = create_place()
+            PlaceImage.objects.create(place=place, image_key=f'listings/{place.id}/a.jpg', is_primary=True)
+            PlaceImage.objects.create(place=place, image_key=f'listings/{place.id}/b.jpg')
+            booking = Booking(place=place, user=user, start_time=start + timedelta(hours=i),
+                              end_time=start + timedelta(hours=i + 1), total_price=Decimal('5.00'))
+            booking.save(availability_checked=True)
+            bookings.append(booking)
+        return bookings
+    return make
+
+
+@pytest.mark.django_db
+class TestMyBookings:
+    def test_walks_pages_in_start_order(self, api_client, user, make_bookings):
+        bookings = make_bookings(5)
+        api_client.force_authenticate(user=user)
+
+        seen = []
+        cursor = None
+        for _ in range(3):
+            params = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+            body = api_client.get(reverse('my-bookings'), params).json()
+            seen += [booking['id'] for booking in body['results']]
+            cursor = body['next_cursor']
+
+        assert seen == [booking.id for booking in bookings]
+        assert cursor is None
+
+    def test_includes_place_summary_and_status(self, api_client, user, make_bookings):
+        booking = make_bookings(1)[0]
+        api_client.force_authenticate(user=user)
+
+        result = api_client.get(reverse('my-bookings')).json()['results'][0]
+
+        assert result['place']['id'] == booking.place_id
+        assert result['place']['primary_image_url'].endswith(f'listings/{booking.place_id}/a.jpg')
+        assert result['status_info']['is_upcoming'] is True
+        assert result['status_info']['can_be_cancelled'] is True
+
+    def test_query_count_does_not_grow_with_page_size(self, api_client, user, make_bookings,
+                                                       django_assert_num_queries):
+        make_bookings(10)
+        api_client.force_authenticate(user=user)
+
+        # bookings with places, then primary images
+        with django_assert_num_queries(2):
+            response = api_client.get(reverse('my-bookings'), {'limit': 10})
+
+        assert len(response.json()['results']) == 10
+
+    def test_only_own_bookings(self, api_client, create_user, make_bookings):
+        make_bookings(2)
+        api_client.force_authenticate(user=create_user())
+
+        assert api_client.get(reverse('my-bookings')).json() == {'results': [], 'next_cursor': None}
+
+    def test_rejects_bad_cursor(self, api_client, user):
+        api_client.force_authenticate(user=user)
+
+        response = api_client.get(reverse('my-bookings'), {'cursor': 'not-a-cursor'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
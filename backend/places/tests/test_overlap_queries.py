@@ -0,0 +1,102 @@
+from datetime import datetime
+from io import StringIO
+
+import pytest
+import pytz
+from django.core.management import call_command
+from django.db import connection
+
+from places.blocked_period.models import BlockedPeriod
+from places.booking.models import Booking
+from places.tests.conftest import requires_postgres
+
+
+def utc(*args):
+    return pytz.UTC.localize(datetime(*args))
+
+
+@pytest.fixture
+def place(create_place):
+    return create_place()
+
+
+@pytest.fixture
+def blocks(place, create_place):
+    other = create_place()
+    made = BlockedPeriod.objects.bulk_create([
+        BlockedPeriod(place=place, start_datetime=utc(2030, 1, 1, 9), end_datetime=utc(2030, 1, 1, 10)),
+        BlockedPeriod(place=place, start_datetime=utc(2030, 1, 1, 12), end_datetime=utc(2030, 1, 1, 14)),
+        BlockedPeriod(place=other, start_datetime=utc(2030, 1, 1, 9), end_datetime=utc(2030, 1, 1, 14)),
+    ])
+    return made
+
+
+def overlapping_ids(*args, **kwargs):
+    return set(BlockedPeriod.objects.filter(BlockedPeriod.overlapping(*args, **kwargs)).values_list('id', flat=True))
+
+
+@pytest.mark.django_db
+class TestOverlaps:
+    def test_matches_overlapping_periods_only(self, blocks):
+        morning, afternoon, other = blocks
+
+        assert overlapping_ids(utc(2030, 1, 1, 9, 30), utc(2030, 1, 1, 12, 30)) == {morning.id, afternoon.id, other.id}
+        assert overlapping_ids(utc(2030, 1, 1, 10), utc(2030, 1, 1, 12)) == {other.id}
+        assert overlapping_ids(utc(2030, 1, 1, 14), utc(2030, 1, 1, 15)) == set()
+
+    def test_inclusive_also_matches_touching_periods(self, blocks):
+        morning, afternoon, other = blocks
+
+        assert overlapping_ids(utc(2030, 1, 1, 10), utc(2030, 1, 1, 12), inclusive=True) == {
+            morning.id, afternoon.id, other.id
+        }
+        assert overlapping_ids(utc(2030, 1, 1, 14), utc(2030, 1, 1, 15), inclusive=True) == {afternoon.id, other.id}
+        assert overlapping_ids(utc(2030, 1, 1, 15), utc(2030, 1, 1, 16), inclusive=True) == set()
+
+    def test_place_id_narrows_to_one_place(self, place, blocks):
+        morning, afternoon, _ = blocks
+
+        assert overlapping_ids(utc(2030, 1, 1), utc(2030, 1, 2), place_id=place.id) == {morning.id, afternoon.id}
+
+    def test_period_is_stored(self, blocks):
+        assert BlockedPeriod.objects.filter(period__isnull=True).count() == 0
+
+    def test_booking_overlap(self, place, create_user):
+        booking, success, _ = place.create_booking(create_user(), utc(2030, 1, 1, 10), utc(2030, 1, 1, 11))
+        assert success
+
+        def matches(start, end):
+            return list(Booking.objects.filter(Booking.overlapping(start, end, place_id=place.id)))
+
+        assert matches(utc(2030, 1, 1, 10, 30), utc(2030, 1, 1, 12)) == [booking]
+        assert matches(utc(2030, 1, 1, 11), utc(2030, 1, 1, 12)) == []
+
+
+@requires_postgres
+@pytest.mark.django_db
+class TestRangeIndex:
+    @pytest.mark.parametrize('table', ['places_blockedperiod', 'places_booking'])
+    def test_period_column_follows_start_and_end(self, table, blocks, place, create_user):
+        place.create_booking(create_user(), utc(2030, 1, 2, 10), utc(2030, 1, 2, 11))
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {table} WHERE period IS NULL OR isempty(period)")
+            assert cursor.fetchone() == (0,)
+
+    def test_overlap_query_uses_gist_index(self, place, blocks):
+        # Without a plain place_id filter the btree indexes on place don't apply
+        queryset = BlockedPeriod.objects.filter(
+            BlockedPeriod.overlapping(utc(2030, 1, 1), utc(2030, 1, 2), place_id=place.id)
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        assert 'places_blockedperiod_place_period_gist' in queryset.explain()
+
+
+@pytest.mark.django_db
+def test_bench_overlap_queries_smoke():
+    out = StringIO()
+    call_command('bench_overlap_queries', sizes='20,50', queries=3, stdout=out)
+
+    assert '50 blocks' in out.getvalue()
+    assert not BlockedPeriod.objects.exists()
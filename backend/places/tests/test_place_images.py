@@ -0,0 +1,137 @@
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework import status
+
+from places.place.models import Place
+from places.place_image.models import PlaceImage
+from places.s3_service import s3_service
+
+
+def photos(count):
+    return {
+        f'photo_{i}': SimpleUploadedFile(f'photo{i}.jpg', b'jpeg bytes', content_type='image/jpeg')
+        for i in range(1, count + 1)
+    }
+
+
+class FakeBucket:
+    """Records put_object/delete_objects calls, failing puts for names in fail"""
+    def __init__(self, fail=(), latency=0):
+        self.fail = fail
+        self.latency = latency
+        self.keys = set()
+        self.threads = set()
+        self.lock = threading.Lock()
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        with self.lock:
+            self.threads.add(threading.get_ident())
+        time.sleep(self.latency)
+        if any(name in Key for name in self.fail):
+            raise ConnectionError(f"upload of {Key} failed")
+        with self.lock:
+            self.keys.add(Key)
+
+    def delete_objects(self, Bucket, Delete, **kwargs):
+        with self.lock:
+            self.keys.difference_update(item['Key'] for item in Delete['Objects'])
+        return {}
+
+
+@pytest.fixture
+def bucket():
+    bucket = FakeBucket()
+    with patch.object(s3_service.client, 'put_object', side_effect=bucket.put_object), \
+         patch.object(s3_service.client, 'delete_objects', side_effect=bucket.delete_objects):
+        yield bucket
+
+
+@pytest.mark.django_db
+class TestAddImages:
+    def test_uploads_in_parallel_and_inserts_once(self, create_place, bucket, django_assert_num_queries):
+        place = create_place()
+        bucket.latency = 0.05
+
+        # The images, then the job that makes their resized copies
+        with django_assert_num_queries(2):
+            images = place.add_images(photos(6), 6)
+
+        assert len(images) == 6
+        assert [image.is_primary for image in images] == [True] + [False] * 5
+        assert [image.image_key.split('/')[-1].split('_')[0] for image in images] == [
+            f'photo{i}' for i in range(1, 7)
+        ]
+        assert {image.image_key for image in images} == bucket.keys
+        assert all(key.startswith(f'listings/{place.id}/') for key in bucket.keys)
+        assert len(bucket.threads) > 1
+
+    def test_skips_missing_photos(self, create_place, bucket):
+        place = create_place()
+        files = photos(3)
+        del files['photo_2']
+
+        images = place.add_images(files, 3)
+
+        assert [(image.image_key.split('/')[-1][:6], image.is_primary) for image in images] == [
+            ('photo1', True), ('photo3', False)
+        ]
+
+    def test_failed_upload_removes_the_others(self, create_place, bucket):
+        place = create_place()
+        bucket.fail = ('photo3',)
+
+        with pytest.raises(ConnectionError):
+            place.add_images(photos(5), 5)
+
+        assert bucket.keys == set()
+        assert not PlaceImage.objects.exists()
+
+    def test_failed_insert_removes_the_uploads(self, create_place, bucket):
+        place = create_place()
+
+        with patch.object(PlaceImage.objects, 'bulk_create', side_effect=RuntimeError("insert failed")):
+            with pytest.raises(RuntimeError):
+                place.add_images(photos(2), 2)
+
+        assert bucket.keys == set()
+
+
+@pytest.mark.django_db
+class TestListDriveway:
+    def listing_data(self, count):
+        return {
+            'name': 'Photo Driveway',
+            'address': '123 Test St, Test City, TS 12345',
+            'latitude': '37.7749',
+            'longitude': '-122.4194',
+            'price_per_hour': '5.00',
+            'photo_count': count,
+            **photos(count),
+        }
+
+    def test_creates_listing_with_images(self, api_client, create_user, bucket):
+        user = create_user()
+        api_client.force_authenticate(user=user)
+
+        response = api_client.post(reverse('list-driveway'), self.listing_data(3), format='multipart')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        place = Place.objects.get(owner=user)
+        assert place.images.count() == 3
+        assert place.images.filter(is_primary=True).count() == 1
+
+    def test_failed_upload_removes_the_listing(self, api_client, create_user, bucket):
+        user = create_user()
+        api_client.force_authenticate(user=user)
+        bucket.fail = ('photo2',)
+
+        response = api_client.post(reverse('list-driveway'), self.listing_data(3), format='multipart')
+
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert not Place.objects.filter(owner=user).exists()
+        assert bucket.keys == set()
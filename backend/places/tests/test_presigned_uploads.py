@@ -0,0 +1,160 @@
+import base64
+import json
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
+
+import boto3
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from places.place_image.models import PlaceImage
+from places.s3_service import s3_service
+from places.util.local_s3 import LocalS3
+
+
+@pytest.fixture
+def bucket():
+    client = boto3.client('s3', region_name=s3_service.region,
+                          aws_access_key_id='test', aws_secret_access_key='test')
+    bucket = LocalS3(client)
+    with patch.object(s3_service, 'client', client):
+        yield bucket
+
+
+@pytest.fixture
+def owner_client(api_client, create_place, bucket):
+    place = create_place()
+    api_client.force_authenticate(user=place.owner)
+    api_client.place = place
+    return api_client
+
+
+def presign(client, files, method='post'):
+    return client.post(reverse('presign_images'), {
+        'place_id': client.place.id, 'files': files, 'method': method
+    }, format='json')
+
+
+def upload(key, content_type='image/jpeg', size=100):
+    # What the browser does with the presigned URL, sent through the stand-in
+    s3_service.client.put_object(Bucket=s3_service.bucket_name, Key=key, Body=b'x' * size,
+                                 ContentType=content_type)
+
+
+def confirm(client, keys, **data):
+    return client.post(reverse('confirm_images'), {
+        'place_id': client.place.id, 'keys': keys, **data
+    }, format='json')
+
+
+@pytest.mark.django_db
+class TestPresignImages:
+    def test_post_policy_is_scoped_to_the_key(self, owner_client):
+        response = presign(owner_client, [
+            {'filename': '../front door.jpg', 'content_type': 'image/jpeg'},
+            {'filename': 'side.png', 'content_type': 'image/png'},
+        ])
+
+        assert response.status_code == status.HTTP_200_OK
+        front, side = response.data['uploads']
+        directory = f"listings/{owner_client.place.id}/"
+        assert front['key'].startswith(directory + 'front_door_') and front['key'].endswith('.jpg')
+        assert side['key'].startswith(directory + 'side_')
+        assert front['method'] == 'post'
+        assert front['fields']['key'] == front['key']
+
+        policy = json.loads(base64.b64decode(front['fields']['policy']))
+        assert {'key': front['key']} in policy['conditions']
+        assert {'Content-Type': 'image/jpeg'} in policy['conditions']
+        assert ['content-length-range', 1, 10 * 1024 * 1024] in policy['conditions']
+
+    def test_put_url_is_signed_for_the_key(self, owner_client):
+        response = presign(owner_client, [{'filename': 'front.jpg', 'content_type': 'image/jpeg'}], method='put')
+
+        presigned, = response.data['uploads']
+        url = urlsplit(presigned['url'])
+        assert url.path.endswith(presigned['key'])
+        assert 'X-Amz-Signature' in parse_qs(url.query)
+        assert presigned['headers'] == {'Content-Type': 'image/jpeg', 'x-amz-acl': 'public-read'}
+
+    def test_rejects_non_images_and_other_owners(self, owner_client, api_client, create_user):
+        response = presign(owner_client, [{'filename': 'notes.pdf', 'content_type': 'application/pdf'}])
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = presign(owner_client, [])
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        api_client.force_authenticate(user=create_user())
+        response = presign(api_client, [{'filename': 'front.jpg', 'content_type': 'image/jpeg'}])
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestConfirmImages:
+    def presigned_keys(self, client, count):
+        response = presign(client, [{'filename': f'photo{i}.jpg', 'content_type': 'image/jpeg'} for i in range(count)])
+        return [upload['key'] for upload in response.data['uploads']]
+
+    def test_registers_uploaded_photos(self, owner_client, bucket):
+        keys = self.presigned_keys(owner_client, 3)
+        for key in keys:
+            upload(key)
+
+        response = confirm(owner_client, keys)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [image['image_key'] for image in response.data['images']] == keys
+        assert [image['is_primary'] for image in response.data['images']] == [True, False, False]
+        assert response.data['errors'] == {}
+
+    def test_confirming_again_is_harmless(self, owner_client, bucket):
+        keys = self.presigned_keys(owner_client, 2)
+        for key in keys:
+            upload(key)
+        confirm(owner_client, keys)
+
+        response = confirm(owner_client, keys, primary_key=keys[1])
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert PlaceImage.objects.filter(place=owner_client.place).count() == 2
+        assert PlaceImage.objects.get(is_primary=True).image_key == keys[1]
+
+    def test_rejects_missing_foreign_and_bad_uploads(self, owner_client, bucket, create_place):
+        good, missing, pdf = self.presigned_keys(owner_client, 3)
+        upload(good)
+        upload(pdf, content_type='application/pdf')
+        foreign = f"listings/{create_place().id}/photo.jpg"
+        upload(foreign)
+
+        response = confirm(owner_client, [good, missing, pdf, foreign, f"listings/{owner_client.place.id}/../x.jpg"])
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [image['image_key'] for image in response.data['images']] == [good]
+        assert set(response.data['errors']) == {missing, pdf, foreign, f"listings/{owner_client.place.id}/../x.jpg"}
+        # The rejected upload is removed, the other listing's photo is not touched
+        assert pdf not in bucket.objects
+        assert foreign in bucket.objects
+
+    @override_settings(PLACE_IMAGE_MAX_BYTES=50)
+    def test_rejects_oversized_uploads(self, owner_client, bucket):
+        key, = self.presigned_keys(owner_client, 1)
+        upload(key, size=51)
+
+        response = confirm(owner_client, [key])
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert key in response.data['errors']
+        assert key not in bucket.objects
+        assert not PlaceImage.objects.exists()
+
+    def test_rejects_malformed_primary_key(self, owner_client, bucket):
+        key, = self.presigned_keys(owner_client, 1)
+        upload(key)
+
+        for primary_key in ([], {}, 1):
+            response = confirm(owner_client, [key], primary_key=primary_key)
+
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not PlaceImage.objects.exists()
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+import pytz
+from django.urls import reverse
+from rest_framework import status
+
+from places.pricing.engine import PriceSchedule
+from places.pricing.models import RateTable
+
+
+def utc(*args):
+    return pytz.UTC.localize(datetime(*args))
+
+
+# Mon 2030-01-07; Sat 2030-01-12
+MONDAY = utc(2030, 1, 7)
+SATURDAY = utc(2030, 1, 12)
+
+
+def schedule(price='5.00', **rates):
+    rate_table = RateTable(**rates) if rates else None
+    return PriceSchedule.compile(Decimal(price), rate_table)
+
+
+class TestPriceSchedule:
+    def test_flat_rate_is_exact(self):
+        # 1h20m at $4.99/h is 6.6533..., which the old float maths got wrong at the margins
+        assert schedule('4.99').quote(MONDAY, MONDAY + timedelta(minutes=80)) == Decimal('6.65')
+
+    def test_many_windows_match_single_quotes(self):
+        prices = schedule(weekend_multiplier=Decimal('1.50'), night_multiplier=Decimal('2.00'))
+        windows = [(MONDAY + timedelta(hours=h), MONDAY + timedelta(hours=h, minutes=95)) for h in range(0, 200, 7)]
+
+        assert prices.quote_many_cents(windows) == [prices.quote_cents(start, end) for start, end in windows]
+
+    def test_weekend_and_night_multipliers_stack(self):
+        prices = schedule(weekend_multiplier=Decimal('1.50'), night_multiplier=Decimal('2.00'))
+
+        assert prices.quote(MONDAY + timedelta(hours=12), MONDAY + timedelta(hours=13)) == Decimal('5.00')
+        assert prices.quote(MONDAY + timedelta(hours=23), MONDAY + timedelta(hours=24)) == Decimal('10.00')
+        assert prices.quote(SATURDAY + timedelta(hours=12), SATURDAY + timedelta(hours=13)) == Decimal('7.50')
+        assert prices.quote(SATURDAY + timedelta(hours=2), SATURDAY + timedelta(hours=3)) == Decimal('15.00')
+
+    def test_window_spanning_week_boundary(self):
+        sunday_night = utc(2030, 1, 13, 23)
+        prices = schedule(weekend_multiplier=Decimal('2.00'), night_multiplier=Decimal('1.00'))
+
+        # One weekend hour plus one weekday hour
+        assert prices.quote(sunday_night, sunday_night + timedelta(hours=2)) == Decimal('15.00')
+
+    def test_daily_cap_applies_per_day(self):
+        prices = schedule(daily_cap=Decimal('30.00'))
+
+        assert prices.quote(MONDAY + timedelta(hours=8), MONDAY + timedelta(hours=12)) == Decimal('20.00')
+        assert prices.quote(MONDAY, MONDAY + timedelta(days=1)) == Decimal('30.00')
+        # Two capped days plus three hours of a third
+        assert prices.quote(MONDAY, MONDAY + timedelta(days=2, hours=3)) == Decimal('75.00')
+
+    def test_empty_window_is_free(self):
+        assert schedule().quote(MONDAY, MONDAY) == Decimal('0.00')
+
+
+@pytest.mark.django_db
+class TestPlacePricing:
+    def test_booking_uses_rate_table(self, create_place, create_user):
+        place = create_place()
+        RateTable.objects.create(place=place, weekend_multiplier=Decimal('2.00'))
+
+        booking, success, _ = place.create_booking(create_user(), SATURDAY + timedelta(hours=10),
+                                                   SATURDAY + timedelta(hours=12))
+
+        assert success
+        assert booking.total_price == Decimal('20.00')
+
+    def test_bulk_bookings_use_rate_table(self, create_place, create_user):
+        place = create_place()
+        RateTable.objects.create(place=place, weekend_multiplier=Decimal('2.00'))
+        windows = [(day + timedelta(hours=10), day + timedelta(hours=11)) for day in (MONDAY, SATURDAY)]
+
+        results = place.create_bookings(create_user(), windows)
+
+        assert [result['booking'].total_price for result in results] == [Decimal('5.00'), Decimal('10.00')]
+
+
+@pytest.mark.django_db
+class TestQuoteEndpoint:
+    def test_prices_many_places_in_one_request(self, api_client, create_place, django_assert_num_queries):
+        cheap = create_place(price_per_hour=Decimal('2.00'))
+        pricey = create_place(price_per_hour=Decimal('8.00'))
+        RateTable.objects.create(place=pricey, night_multiplier=Decimal('1.50'))
+        start, end = MONDAY + timedelta(hours=21), MONDAY + timedelta(hours=23)
+        quotes = [
+            {'place_id': place.id, 'start_time': start.isoformat(), 'end_time': end.isoformat()}
+            for place in (cheap, pricey, cheap)
+        ]
+        quotes.append({'place_id': 0, 'start_time': start.isoformat(), 'end_time': end.isoformat()})
+
+        with django_assert_num_queries(1):
+            response = api_client.post(reverse('quote'), {'quotes': quotes}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()['results']
+        assert [result['total_price'] for result in results] == ['4.00', '20.00', '4.00', None]
+        assert results[3]['error'] == 'Parking space not found'
+
+    def test_mixes_naive_and_offset_times(self, api_client, create_place):
+        place = create_place(price_per_hour=Decimal('2.00'))
+        quotes = [
+            {'place_id': place.id, 'start_time': '2030-01-07T10:00:00', 'end_time': '2030-01-07T12:00:00Z'},
+            {'place_id': place.id, 'start_time': '2030-01-07T10:00:00+00:00', 'end_time': '2030-01-07T09:00:00'},
+            {'place_id': place.id, 'start_time': 1893924000, 'end_time': '2030-01-07T12:00:00'},
+        ]
+
+        response = api_client.post(reverse('quote'), {'quotes': quotes}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()['results']
+        assert results[0]['total_price'] == '4.00'
+        assert results[1]['error'] == 'End time must be after start time'
+        assert results[2]['error'] == 'Invalid place_id or datetime format'
+
+    def test_rejects_too_many_quotes(self, api_client, settings):
+        settings.PRICING_MAX_QUOTES = 2
+        quotes = [{'place_id': 1, 'start_time': '2030-01-07T10:00:00Z', 'end_time': '2030-01-07T11:00:00Z'}] * 3
+
+        response = api_client.post(reverse('quote'), {'quotes': quotes}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_owner_can_set_rates(api_client, create_place, create_user):
+    owner = create_user()
+    place = create_place(owner=owner)
+    url = reverse('rate-table', args=[place.id])
+
+    api_client.force_authenticate(user=create_user())
+    assert api_client.put(url, {'weekend_multiplier': '2.00'}, format='json').status_code == status.HTTP_403_FORBIDDEN
+
+    api_client.force_authenticate(user=owner)
+    response = api_client.put(url, {'weekend_multiplier': '2.00', 'daily_cap': '40.00'}, format='json')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert place.rate_table.weekend_multiplier == Decimal('2.00')
+    assert place.rate_table.daily_cap == Decimal('40.00')
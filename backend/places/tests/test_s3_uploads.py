@@ -0,0 +1,74 @@
+import os
+import tracemalloc
+from io import StringIO
+
+import boto3
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+
+from places.s3_service import S3Service
+from places.util.local_s3 import LocalS3
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def service():
+    with override_settings(AWS_S3_MULTIPART_THRESHOLD=5 * MB, AWS_S3_MULTIPART_CHUNKSIZE=5 * MB,
+                           AWS_S3_MAX_CONCURRENCY=2):
+        service = S3Service(bucket_name='test-bucket')
+    service.client = boto3.client('s3', region_name=service.region,
+                                  aws_access_key_id='test', aws_secret_access_key='test')
+    service.bucket = LocalS3(service.client)
+    return service
+
+
+@pytest.fixture
+def large_upload():
+    upload = TemporaryUploadedFile('large.bin', 'application/octet-stream', 40 * MB, None)
+    block = os.urandom(MB)
+    for _ in range(40):
+        upload.write(block)
+    upload.seek(0)
+    yield upload
+    upload.close()
+
+
+class TestUploadFile:
+    def test_small_file_is_put_whole_and_left_open(self, service):
+        photo = SimpleUploadedFile('photo.jpg', b'x' * 1000, content_type='image/jpeg')
+
+        key = service.upload_file(photo, directory='listings/1')
+
+        assert key.startswith('listings/1/photo_') and key.endswith('.jpg')
+        assert service.bucket.objects == {key: {'size': 1000, 'content_type': 'image/jpeg'}}
+        assert not photo.closed
+        assert photo.tell() == 0
+
+    def test_bytes(self, service):
+        key = service.upload_file(b'abc', directory='media')
+
+        assert key.endswith('.bin')
+        assert service.bucket.objects[key]['size'] == 3
+
+    def test_large_file_streams_in_bounded_memory(self, service, large_upload):
+        tracemalloc.start()
+        try:
+            key = service.upload_file(large_upload, directory='media')
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert service.bucket.objects[key] == {'size': 40 * MB, 'content_type': 'application/octet-stream'}
+        # Two 5 MB parts in flight, plus their checksums and copies
+        assert peak < 20 * MB
+        assert not large_upload.closed
+
+
+def test_bench_upload_memory_smoke():
+    out = StringIO()
+    call_command('bench_upload_memory', sizes='1,6', stdout=out)
+
+    assert '6 MB file' in out.getvalue()
@@ -0,0 +1,153 @@
+from unittest.mock import patch
+
+import boto3
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from jobs.models import Job
+from places.place.models import Place
+from places.place_image.models import PlaceImage
+from places.s3_service import s3_service
+from places.util.local_s3 import LocalS3
+
+
+@pytest.fixture
+def bucket():
+    client = boto3.client('s3', region_name=s3_service.region,
+                          aws_access_key_id='test', aws_secret_access_key='test')
+    bucket = LocalS3(client)
+    with patch.object(s3_service, 'client', client), \
+         patch.object(client, 'delete_objects', wraps=client.delete_objects) as delete_objects:
+        bucket.delete_objects = delete_objects
+        yield bucket
+
+
+def put(key):
+    s3_service.client.put_object(Bucket=s3_service.bucket_name, Key=key, Body=b'x', ContentType='image/jpeg')
+
+
+def add_images(place, count):
+    """Images with a couple of resized copies each, all stored in the bucket"""
+    images = []
+    for i in range(count):
+        key = f"listings/{place.id}/photo{i}.jpg"
+        variants = {'webp': {'320': f"listings/{place.id}/photo{i}_320w.webp"},
+                    'jpeg': {'320': f"listings/{place.id}/photo{i}_320w.jpeg"}}
+        for stored in [key, *variants['webp'].values(), *variants['jpeg'].values()]:
+            put(stored)
+        images.append(PlaceImage.objects.create(place=place, image_key=key, variants=variants, is_primary=i == 0))
+    return images
+
+
+class TestDeleteFiles:
+    def test_batches_of_1000(self, bucket):
+        keys = [f"media/{i}.bin" for i in range(2500)]
+
+        assert s3_service.delete_files(keys + keys[:10]) == []
+        assert [len(call.kwargs['Delete']['Objects']) for call in bucket.delete_objects.call_args_list] == [
+            1000, 1000, 500
+        ]
+
+    def test_reports_failed_keys(self, bucket):
+        bucket.delete_objects.side_effect = [
+            {'Errors': [{'Key': 'media/b.bin', 'Code': 'AccessDenied', 'Message': 'Access Denied'}]},
+            ConnectionError("connection reset"),
+        ]
+        keys = [f"media/{i}.bin" for i in range(1000)]
+
+        assert s3_service.delete_files(['media/a.bin', 'media/b.bin'] + keys) == ['media/b.bin'] + keys[998:]
+
+
+@pytest.mark.django_db
+class TestDeleteWithImages:
+    def test_one_delete_per_table_and_one_storage_request(self, create_place, bucket,
+                                                          django_capture_on_commit_callbacks):
+        place, other = create_place(), create_place()
+        add_images(place, 5)
+        add_images(other, 1)
+
+        with CaptureQueriesContext(connection) as queries, django_capture_on_commit_callbacks(execute=True):
+            assert place.delete_with_images(background=False) == (5, [])
+            assert bucket.delete_objects.call_count == 0
+
+        image_deletes = [q for q in queries.captured_queries if q['sql'].startswith('DELETE FROM "places_placeimage"')]
+        assert len(image_deletes) == 1
+        assert bucket.delete_objects.call_count == 1
+        assert not Place.objects.filter(pk=place.pk).exists()
+        assert sorted(bucket.objects) == [
+            f"listings/{other.id}/photo0.jpg", f"listings/{other.id}/photo0_320w.jpeg",
+            f"listings/{other.id}/photo0_320w.webp",
+        ]
+
+    def test_delete_all_for_place_keeps_the_place(self, create_place, bucket, django_capture_on_commit_callbacks):
+        place = create_place()
+        add_images(place, 2)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            assert PlaceImage.delete_all_for_place(place, background=False) == (2, [])
+        assert Place.objects.filter(pk=place.pk).exists()
+        assert bucket.objects == {}
+
+    def test_background_leaves_storage_to_a_job(self, create_place, bucket):
+        place = create_place()
+        add_images(place, 3)
+
+        assert place.delete_with_images(background=True) == (3, [])
+        assert bucket.delete_objects.call_count == 0
+        assert len(bucket.objects) == 9
+
+        job = Job.objects.get(task='storage.delete_keys')
+        assert len(job.payload['keys']) == 9
+        job.status = 'running'
+        assert job.run()
+        assert bucket.objects == {}
+
+    def test_rollback_keeps_the_files(self, create_place, bucket, django_capture_on_commit_callbacks):
+        place = create_place()
+        place_id = place.pk
+        add_images(place, 2)
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            with pytest.raises(RuntimeError), transaction.atomic():
+                place.delete_with_images(background=False)
+                raise RuntimeError
+
+        assert callbacks == []
+        assert Place.objects.filter(pk=place_id).exists()
+        assert len(bucket.objects) == 6
+
+    def test_listing_delete_view_returns_before_storage_is_cleaned(self, api_client, create_place, bucket):
+        place = create_place()
+        add_images(place, 2)
+        api_client.force_authenticate(user=place.owner)
+
+        response = api_client.delete(reverse('listing', args=[place.id]))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'with 2 images' in response.data['message']
+        assert Job.objects.filter(task='storage.delete_keys').count() == 1
+        assert len(bucket.objects) == 6
+
+
+@pytest.mark.django_db
+class TestUserDelete:
+    def test_removes_the_users_listing_photos(self, create_place, create_user, bucket,
+                                              django_capture_on_commit_callbacks):
+        owner = create_user()
+        add_images(create_place(owner=owner), 2)
+        add_images(create_place(owner=owner), 1)
+        other = create_place()
+        add_images(other, 1)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            owner.delete()
+
+        assert not Place.objects.filter(owner=owner.pk).exists()
+        assert bucket.delete_objects.call_count == 1
+        assert sorted(bucket.objects) == [
+            f"listings/{other.id}/photo0.jpg", f"listings/{other.id}/photo0_320w.jpeg",
+            f"listings/{other.id}/photo0_320w.webp",
+        ]
@@ -5,4 +5,8 @@ urlpatterns = [
     path('images/', include('places.place_image.urls')),
     path('blocked-periods/', include('places.blocked_period.urls')),
     path('bookings/', include('places.booking.urls')),
+    path('holds/', include('places.booking_hold.urls')),
+    path('pricing/', include('places.pricing.urls')),
+    path('analytics/', include('places.analytics.urls')),
+    path('calendar/', include('places.calendar_feed.urls')),
 ]
\ No newline at end of file
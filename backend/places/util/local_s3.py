@@ -0,0 +1,132 @@
+import io
+import re
+import threading
+import uuid
+from urllib.parse import parse_qs, urlsplit
+
+from botocore.awsrequest import AWSResponse
+
+
+class _RawBody(io.BytesIO):
+    """A response body that both streams, as botocore reads it, and reads, as StreamingBody does"""
+    def stream(self, **kwargs):
+        yield self.getvalue()
+
+
+class LocalS3:
+    """
+    Answers a boto3 client's S3 requests in-process, so uploads, downloads,
+    HEADs and deletes (single and batched) run through the whole boto3/s3transfer path without a network.
+    Objects record their size and content type in
+    objects[key] = {'size', 'content_type'}. Bodies are read and discarded
+    unless keep_bodies is set, in which case they are kept in bodies[key]
+    and served back to GET requests.
+    """
+    def __init__(self, client, keep_bodies=False):
+        self.objects = {}
+        self.bodies = {}
+        self.keep_bodies = keep_bodies
+        self.lock = threading.Lock()
+        client.meta.events.register('before-send.s3', self.respond)
+
+    def respond(self, request, **kwargs):
+        url = urlsplit(request.url)
+        # Virtual-hosted URLs carry the bucket in the host, path-style ones in the path
+        key = url.path.lstrip('/')
+        if url.hostname.startswith('s3.'):
+            key = key.split('/', 1)[-1]
+        query = parse_qs(url.query, keep_blank_values=True)
+        # DeleteObjects lists its keys in the body
+        deleting = request.method == 'POST' and 'delete' in query
+        received, body = self._drain(request.body, keep=self.keep_bodies or deleting)
+        # Checksummed bodies are sent aws-chunked, with framing around the data
+        received = int(request.headers.get('X-Amz-Decoded-Content-Length', received))
+        if body and b'aws-chunked' in self._header(request, 'Content-Encoding').encode():
+            body = self._decode_chunked(body)
+        content_type = self._header(request, 'Content-Type')
+
+        if deleting:
+            deleted = re.findall(rb'<Key>(.*?)</Key>', body)
+            with self.lock:
+                for deleted_key in deleted:
+                    self.objects.pop(deleted_key.decode(), None)
+                    self.bodies.pop(deleted_key.decode(), None)
+            return self._response(request, b'<DeleteResult></DeleteResult>')
+        if request.method == 'POST' and 'uploads' in query:
+            with self.lock:
+                self.objects[key] = {'size': 0, 'content_type': content_type}
+            body = (f"<InitiateMultipartUploadResult><Key>{key}</Key>"
+                    f"<UploadId>{uuid.uuid4().hex}</UploadId></InitiateMultipartUploadResult>")
+            return self._response(request, body.encode())
+        if request.method == 'POST':
+            return self._response(request, b'<CompleteMultipartUploadResult><ETag>"etag"</ETag>'
+                                           b'</CompleteMultipartUploadResult>')
+        if request.method == 'PUT' and 'partNumber' in query:
+            with self.lock:
+                self.objects[key]['size'] += received
+                if self.keep_bodies:
+                    # s3transfer may send parts out of order
+                    self.bodies.setdefault(key, {})[int(query['partNumber'][0])] = body
+        elif request.method == 'PUT':
+            with self.lock:
+                self.objects[key] = {'size': received, 'content_type': content_type}
+                if self.keep_bodies:
+                    self.bodies[key] = {1: body}
+        elif request.method == 'GET' and key in self.bodies:
+            data = b''.join(part for _, part in sorted(self.bodies[key].items()))
+            headers = {'Content-Type': self.objects[key]['content_type']}
+            status_code = 200
+            byte_range = self._header(request, 'Range')
+            if byte_range:
+                first, last = byte_range.split('=', 1)[1].split('-')
+                first, last = int(first), min(int(last or len(data) - 1), len(data) - 1)
+                headers['Content-Range'] = f'bytes {first}-{last}/{len(data)}'
+                data, status_code = data[first:last + 1], 206
+            headers['Content-Length'] = str(len(data))
+            return self._response(request, data, status_code=status_code, headers=headers)
+        elif request.method == 'GET':
+            return self._response(request, b'<Error><Code>NoSuchKey</Code></Error>', status_code=404)
+        elif request.method == 'HEAD':
+            found = self.objects.get(key)
+            if found is None:
+                return self._response(request, b'', status_code=404)
+            return self._response(request, b'', headers={
+                'Content-Length': str(found['size']), 'Content-Type': found['content_type']
+            })
+        elif request.method == 'DELETE':
+            with self.lock:
+                self.objects.pop(key, None)
+                self.bodies.pop(key, None)
+            return self._response(request, b'', status_code=204)
+        return self._response(request, b'')
+
+    def _header(self, request, name):
+        value = request.headers.get(name, '')
+        return value.decode() if isinstance(value, bytes) else value
+
+    def _decode_chunked(self, body):
+        """Strip aws-chunked framing: hex size lines around each chunk, then trailers"""
+        data, position = [], 0
+        while True:
+            line_end = body.index(b'\r\n', position)
+            size = int(body[position:line_end].split(b';')[0], 16)
+            if size == 0:
+                return b''.join(data)
+            data.append(body[line_end + 2:line_end + 2 + size])
+            position = line_end + 2 + size + 2
+
+    def _drain(self, body, keep):
+        """Read a request body, returning its length and, if keep, the bytes"""
+        if body is None:
+            return 0, b''
+        if isinstance(body, (bytes, bytearray)):
+            return len(body), bytes(body) if keep else b''
+        received, chunks = 0, []
+        while chunk := body.read(256 * 1024):
+            received += len(chunk)
+            if keep:
+                chunks.append(chunk)
+        return received, b''.join(chunks)
+
+    def _response(self, request, body, status_code=200, headers=None):
+        return AWSResponse(request.url, status_code, {'ETag': '"etag"', **(headers or {})}, _RawBody(body))
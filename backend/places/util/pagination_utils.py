@@ -0,0 +1,63 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class KeysetPaginator:
+    """
+    Utility class for keyset ("seek") pagination on a (datetime, id) pair.
+    Each page is fetched by filtering past the last row of the previous one,
+    so the cost of a page does not grow with how deep the client has scrolled.
+    """
+
+    def __init__(self, time_field, limit, descending=False):
+        self.time_field = time_field
+        self.limit = limit
+        self.descending = descending
+
+    @staticmethod
+    def encode_cursor(moment, pk):
+        """Encode a (datetime, id) position as an opaque URL-safe string"""
+        raw = json.dumps([moment.isoformat(), pk]).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Decode a cursor produced by encode_cursor.
+        Raises ValueError if it is malformed.
+        """
+        try:
+            moment, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(moment), int(pk)
+        except (TypeError, ValueError, UnicodeError) as e:
+            raise ValueError("Invalid cursor") from e
+
+    def paginate(self, queryset, cursor=None):
+        """
+        Get one page of queryset, ordered by (time_field, id).
+
+        Returns:
+            (rows, next_cursor) - next_cursor is None on the last page
+        """
+        direction = '-' if self.descending else ''
+        queryset = queryset.order_by(f'{direction}{self.time_field}', f'{direction}id')
+
+        if cursor:
+            moment, pk = self.decode_cursor(cursor)
+            after = 'lt' if self.descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.time_field}__{after}': moment})
+                | Q(**{self.time_field: moment, f'id__{after}': pk})
+            )
+
+        # Fetch one extra row to learn whether there is another page
+        rows = list(queryset[:self.limit + 1])
+        if len(rows) <= self.limit:
+            return rows, None
+
+        rows = rows[:self.limit]
+        last = rows[-1]
+        return rows, self.encode_cursor(getattr(last, self.time_field), last.pk)
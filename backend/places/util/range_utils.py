@@ -0,0 +1,95 @@
+from django.db.models import BooleanField, Expression, F, Func
+
+
+class Overlaps(Expression):
+    """
+    Filter for rows whose [start_field, end_field) period overlaps
+    [start, end), or touches it too with inclusive=True.
+
+    On Postgres this is "period && tstzrange(start, end)" against the table's
+    generated range column, plus "int8range(place_id) && int8range(place_id)"
+    when place_id is given, which lets the GiST index over
+    (int8range(place_id), period) find one place's overlapping rows directly.
+    Elsewhere it falls back to comparing the two bounds (and place_id).
+
+    Usable anywhere a conditional expression is, e.g.
+    queryset.filter(Overlaps(start, end, place_id=place.pk) | Q(is_recurring=True))
+    """
+    conditional = True
+    range_column = 'period'
+
+    def __init__(self, start, end, inclusive=False, place_id=None,
+                 start_field='start_datetime', end_field='end_datetime'):
+        super().__init__(output_field=BooleanField())
+        self.start = start
+        self.end = end
+        self.inclusive = inclusive
+        self.place_id = place_id
+        self.fields = (start_field, end_field, 'place_id')
+        self.columns = []
+
+    def get_source_expressions(self):
+        return self.columns
+
+    def set_source_expressions(self, exprs):
+        self.columns = list(exprs)
+
+    def resolve_expression(self, query=None, allow_joins=True, reuse=None, summarize=False, for_save=False):
+        clone = self.copy()
+        clone.columns = [
+            F(field).resolve_expression(query, allow_joins, reuse, summarize, for_save) for field in self.fields
+        ]
+        return clone
+
+    def _bounds(self, connection):
+        return [connection.ops.adapt_datetimefield_value(value) for value in (self.start, self.end)]
+
+    def as_sql(self, compiler, connection):
+        start_sql, start_params = compiler.compile(self.columns[0])
+        end_sql, end_params = compiler.compile(self.columns[1])
+        start, end = self._bounds(connection)
+        before, after = ('<=', '>=') if self.inclusive else ('<', '>')
+        sql = f'{start_sql} {before} %s AND {end_sql} {after} %s'
+        params = [*start_params, end, *end_params, start]
+
+        if self.place_id is not None:
+            place_sql, place_params = compiler.compile(self.columns[2])
+            sql += f' AND {place_sql} = %s'
+            params += [*place_params, self.place_id]
+
+        return f'({sql})', params
+
+    def as_postgresql(self, compiler, connection):
+        alias = compiler.quote_name_unless_alias(self.columns[0].alias)
+        column = f"{alias}.{connection.ops.quote_name(self.range_column)}"
+        start, end = self._bounds(connection)
+        if self.inclusive:
+            # The stored ranges exclude their end, so a row ending at start
+            # touches [start, end] without overlapping it
+            sql = f"({column} && tstzrange(%s, %s, '[]') OR {column} -|- tstzrange(%s, %s, '[]'))"
+            params = [start, end, start, end]
+        else:
+            sql = f"{column} && tstzrange(%s, %s, '[)')"
+            params = [start, end]
+
+        if self.place_id is not None:
+            place_sql, place_params = compiler.compile(self.columns[2])
+            sql += f" AND int8range({place_sql}, {place_sql}, '[]') && int8range(%s, %s, '[]')"
+            params += [*place_params, *place_params, self.place_id, self.place_id]
+
+        return f'({sql})', params
+
+
+class PeriodRange(Func):
+    """
+    The [start, end) range of a row, for the generated period columns that
+    Overlaps uses on Postgres. Elsewhere it is just the range's text, since
+    the fallback compares the bounds themselves.
+    """
+    function = 'tstzrange'
+    template = "%(function)s(%(expressions)s, '[)')"
+    arity = 2
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template="('[' || %(expressions)s || ')')",
+                           arg_joiner=" || ',' || ", **extra_context)
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, Group, PermissionsMixin
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
@@ -68,6 +68,19 @@ class User(AbstractBaseUser, PermissionsMixin):  # Note: not AbstractUser
         super().save(*args, **kwargs)
 
 
+    def delete(self, *args, **kwargs):
+        """
+        Delete the user along with their listings, and remove the listings'
+        photos from S3, which the database cascade cannot reach
+        """
+        from places.place_image.models import PlaceImage
+
+        with transaction.atomic():
+            keys = PlaceImage.storage_keys(PlaceImage.objects.filter(place__owner=self))
+            result = super().delete(*args, **kwargs)
+            PlaceImage.delete_storage(keys)
+        return result
+
     def __str__(self):
         return self.email
 
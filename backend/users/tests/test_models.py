@@ -2,7 +2,11 @@ import pytest
 from django.db import IntegrityError
 from django.utils import timezone
 from datetime import timedelta
+import os
+import subprocess
+import sys
 import uuid
+from django.conf import settings
 from users.models import User, VerificationToken, PasswordResetToken
 
 # ------------------- Fixtures -------------------
@@ -277,3 +281,26 @@ class TestPasswordResetToken:
         assert tokens.count() == 2
         assert token1 in tokens
         assert token2 in tokens
+
+# ------------------- Deletion outside the web app -------------------
+
+# Like manage.py shell or a management command: nothing but app loading has
+# imported the places models
+DELETE_USER = """
+import sys
+import django
+django.setup()
+from django.core.management import call_command
+call_command('migrate', verbosity=0)
+assert 'places.urls' not in sys.modules
+from users.models import User
+user = User.objects.create_user(email='user@example.com', password='password123')
+user.delete()
+assert not User.objects.exists()
+"""
+
+def test_delete_user_without_urls_loaded():
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'config.test_settings'}
+    env.pop('TEST_DATABASE_URL', None)
+
+    subprocess.run([sys.executable, '-c', DELETE_USER], env=env, cwd=settings.BASE_DIR, check=True)
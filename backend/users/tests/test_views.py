@@ -5,10 +5,11 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
-from unittest.mock import patch, MagicMock
+from unittest.mock import MagicMock
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 
+from outbox.models import OutboxEvent
 from users.models import VerificationToken, PasswordResetToken
 
 User = get_user_model()
@@ -65,16 +66,15 @@ def password_reset_token(db, verified_user):
 class TestUserRegistrationView:
     url = reverse('register')  # Update with your actual URL name
     
-    @patch('users.views.send_verification_email')
-    def test_user_registration_success(self, mock_send_email, api_client, user_data):
+    def test_user_registration_success(self, api_client, user_data):
         """Test successful user registration"""
         response = api_client.post(self.url, user_data, format='json')
         
         assert response.status_code == status.HTTP_201_CREATED
         assert 'message' in response.data
         assert User.objects.filter(email=user_data['email']).exists()
-        assert VerificationToken.objects.filter(user__email=user_data['email']).exists()
-        mock_send_email.assert_called_once()
+        token = VerificationToken.objects.get(user__email=user_data['email'])
+        assert OutboxEvent.objects.get(topic='user.registered').payload['token'] == str(token.token)
     
     def test_user_registration_invalid_email(self, api_client):
         """Test registration with invalid email"""
@@ -207,8 +207,7 @@ class TestVerifyEmailView:
 class TestResendVerificationEmailView:
     url = reverse('resend_verification')  # Update with your actual URL name
     
-    @patch('users.views.send_verification_email')
-    def test_resend_verification_success(self, mock_send_email, api_client, unverified_user):
+    def test_resend_verification_success(self, api_client, unverified_user):
         """Test successful resend verification"""
         data = {'email': unverified_user.email}
         response = api_client.post(self.url, data, format='json')
@@ -216,7 +215,7 @@ class TestResendVerificationEmailView:
         assert response.status_code == status.HTTP_200_OK
         assert 'message' in response.data
         assert VerificationToken.objects.filter(user=unverified_user).exists()
-        mock_send_email.assert_called_once()
+        assert OutboxEvent.objects.filter(topic='user.verification_requested').count() == 1
     
     def test_resend_verification_already_verified(self, api_client, verified_user):
         """Test resend verification for already verified user"""
@@ -280,8 +279,7 @@ class TestVerifyAndLoginView:
 class TestForgotPasswordView:
     url = reverse('forgot-password')  # Update with your actual URL name
     
-    @patch('users.views.send_forgot_password_email')
-    def test_forgot_password_existing_email(self, mock_send_email, api_client, verified_user):
+    def test_forgot_password_existing_email(self, api_client, verified_user):
         """Test forgot password with existing email"""
         data = {'email': verified_user.email}
         response = api_client.post(self.url, data, format='json')
@@ -289,7 +287,7 @@ class TestForgotPasswordView:
         assert response.status_code == status.HTTP_200_OK
         assert 'message' in response.data
         assert PasswordResetToken.objects.filter(user=verified_user).exists()
-        mock_send_email.assert_called_once()
+        assert OutboxEvent.objects.filter(topic='user.password_reset_requested').count() == 1
     
     def test_forgot_password_nonexistent_email(self, api_client):
         """Test forgot password with non-existent email"""
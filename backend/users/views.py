@@ -10,7 +10,7 @@ from django.core.mail import send_mail
 from django.conf import settings
 from django.db import transaction
 from .models import VerificationToken, User
-from .util.email import send_verification_email, send_forgot_password_email
+from outbox.models import OutboxEvent
 from .serializers import UserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer, ResetPasswordSerializer
 import logging
 from django.contrib.auth import get_user_model
@@ -46,8 +46,8 @@ class UserRegistrationView(APIView):
                     # Create verification token
                     verification_token = VerificationToken.objects.create(user=user)
 
-                    # Send verification email
-                    send_verification_email(user, verification_token)
+                    # Queue the verification email; drain_outbox sends it once this commits
+                    OutboxEvent.publish('user.registered', user_id=user.id, token=str(verification_token.token))
 
                 return Response(
                     {"message": "User registered successfully. Please check your email to verify your account."},
@@ -171,9 +171,11 @@ class ForgotPasswordView(APIView):
 
         try:
             user = User.objects.get(email=email)
-            password_reset_token = PasswordResetToken.objects.create(user=user)
-            uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
-            send_forgot_password_email(user, uidb64, password_reset_token)
+            with transaction.atomic():
+                password_reset_token = PasswordResetToken.objects.create(user=user)
+                uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
+                OutboxEvent.publish('user.password_reset_requested', user_id=user.id, uidb64=uidb64,
+                                    token=str(password_reset_token.token))
 
             return Response({"message": "If an account with that email exists, a password reset link has been sent."}, status=status.HTTP_200_OK)
         except User.DoesNotExist:
@@ -374,13 +376,15 @@ class ResendVerificationEmailView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
   
-            VerificationToken.objects.filter(user=user).delete()
+            with transaction.atomic():
+                VerificationToken.objects.filter(user=user).delete()
 
-            verification_token = VerificationToken.objects.create(user=user)
+                verification_token = VerificationToken.objects.create(user=user)
 
-            send_verification_email(user, verification_token)
+                OutboxEvent.publish('user.verification_requested', user_id=user.id,
+                                    token=str(verification_token.token))
             
-            logger.info(f"Verification email resent to: {email}")
+            logger.info(f"Verification email queued for: {email}")
             
             return Response(
                 {"message": "Verification email sent successfully"},
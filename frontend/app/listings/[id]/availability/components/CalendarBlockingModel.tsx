@@ -317,8 +317,15 @@ function useCalendarBlocks(blockedPeriods: any[]) {
 export default function CalendarBlockingModel({ listingId }: { listingId: string }) {
   console.log("CalendarBlockingModel rendering with listingId:", listingId)
 
-  const { blockedPeriods, isLoading, isSubmitting, deletingBlocks, addBlockedPeriod, removeBlockedPeriod } =
-    useBlockedPeriods(listingId)
+  const {
+    blockedPeriods,
+    isLoading,
+    isSubmitting,
+    deletingBlocks,
+    addBlockedPeriod,
+    removeBlockedPeriod,
+    applyBlockedPeriods,
+  } = useBlockedPeriods(listingId)
 
   // Log when blockedPeriods changes
   useEffect(() => {
@@ -358,7 +365,17 @@ export default function CalendarBlockingModel({ listingId }: { listingId: string
 
   const handleAddBlock = async () => {
     console.log("handleAddBlock called with:", newBlock)
-    const success = await addBlockedPeriod(newBlock)
+    // One-off blocks go through the bulk endpoint, which merges them with
+    // neighbouring blocks in a single request; recurring ones need the
+    // single-block endpoint
+    const success =
+      newBlock.is_recurring || newBlock.block_type === "booking"
+        ? await addBlockedPeriod(newBlock)
+        : await applyBlockedPeriods(
+            [{ start_datetime: newBlock.start_datetime, end_datetime: newBlock.end_datetime }],
+            [],
+            { block_type: newBlock.block_type, reason: newBlock.reason },
+          )
     if (success) {
       console.log("Block added successfully, resetting form")
       const localEndDateTime = new Date(newBlock.end_datetime)
@@ -479,7 +496,7 @@ export default function CalendarBlockingModel({ listingId }: { listingId: string
             setSelectedDate(date)
           }}
           onSetQuickBlock={handleSetQuickBlock}
-          addBlockedPeriod={addBlockedPeriod}
+          applyBlockedPeriods={applyBlockedPeriods}
         />
       </div>
     </div>
@@ -14,7 +14,11 @@ interface CalendarSidebarProps {
   selectedView: "day" | "week" | "month"
   onSelectDate: (date: Date) => void
   onSetQuickBlock: (newBlock: any) => void
-  addBlockedPeriod: (newBlock: any) => Promise<boolean>
+  applyBlockedPeriods: (
+    intervals: { start_datetime: string; end_datetime: string }[],
+    deleteIds?: number[],
+    options?: { block_type?: "owner-block" | "maintenance"; reason?: string; suppressDefaultToast?: boolean },
+  ) => Promise<boolean>
 }
 
 // Export the component as a named export
@@ -23,7 +27,7 @@ export function CalendarSidebar({
   selectedView,
   onSelectDate,
   onSetQuickBlock,
-  addBlockedPeriod,
+  applyBlockedPeriods,
 }: CalendarSidebarProps) {
   const [isCreatingBlock, setIsCreatingBlock] = useState(false)
   const { toast } = useToast()
@@ -31,7 +35,7 @@ export function CalendarSidebar({
   // Update the handleBlockEntireView function to prevent duplicate submissions
   const handleBlockEntireView = async () => {
     // If already creating a block, don't allow another submission
-    if (isCreatingBlock || !addBlockedPeriod) return
+    if (isCreatingBlock || !applyBlockedPeriods) return
 
     // Set flag immediately to prevent duplicate submissions
     setIsCreatingBlock(true)
@@ -71,18 +75,17 @@ export function CalendarSidebar({
         blockReason = "Blocked entire month"
       }
 
-      const blockConfig = {
-        start_datetime: formatDateTimeForInput(startDate),
-        end_datetime: formatDateTimeForInput(endDate),
-        is_recurring: false,
-        block_type: "owner-block" as const,
-        reason: blockReason,
-        // Add a flag to suppress the default success message
-        suppressDefaultToast: true,
-      }
-
       // Call the API only once
-      const success = await addBlockedPeriod(blockConfig)
+      const success = await applyBlockedPeriods(
+        [{ start_datetime: formatDateTimeForInput(startDate), end_datetime: formatDateTimeForInput(endDate) }],
+        [],
+        {
+          block_type: "owner-block",
+          reason: blockReason,
+          // Suppress the default success message
+          suppressDefaultToast: true,
+        },
+      )
 
       if (success) {
         toast({
@@ -3,25 +3,40 @@
 import { useState, useEffect } from "react"
 import { useToast } from "@/components/shadcn/toast-context"
 import { ApiClient } from "@/lib/api-client"
-import type { BlockedPeriod, BlockedPeriodWithMeta, NewBlockedPeriod } from "../types/calendar-blocking"
+import type {
+  BlockedInterval,
+  BlockedPeriod,
+  BlockedPeriodsWindow,
+  BlockedPeriodWithMeta,
+  BulkBlockedPeriodsResult,
+  NewBlockedPeriod,
+} from "../types/calendar-blocking"
 
 export function useBlockedPeriods(listingId: string) {
   const { toast } = useToast()
   const [blockedPeriods, setBlockedPeriods] = useState<BlockedPeriod[]>([])
+  const [blockedIntervals, setBlockedIntervals] = useState<BlockedInterval[]>([])
   const [isLoading, setIsLoading] = useState(true)
   const [isSubmitting, setIsSubmitting] = useState(false)
   const [deletingBlocks, setDeletingBlocks] = useState<Record<number, boolean>>({})
 
-  const fetchBlockedPeriods = async () => {
+  // Without a window the server returns the week behind and ~3 months ahead
+  const fetchBlockedPeriods = async (window?: { start: Date; end: Date }) => {
     setIsLoading(true)
     try {
-      const { data, success, error } = await ApiClient.get<BlockedPeriod[]>(
-        `/api/places/blocked-periods/?place_id=${listingId}`,
+      const params = new URLSearchParams({ place_id: listingId })
+      if (window) {
+        params.set("start_date", window.start.toISOString())
+        params.set("end_date", window.end.toISOString())
+      }
+      const { data, success, error } = await ApiClient.get<BlockedPeriodsWindow>(
+        `/api/places/blocked-periods/?${params.toString()}`,
       )
 
       if (success && data) {
         // Update the state without changing the active tab
-        setBlockedPeriods(data)
+        setBlockedPeriods(data.blocks)
+        setBlockedIntervals(data.intervals)
       } else {
         toast({
           title: "Error",
@@ -215,6 +230,67 @@ export function useBlockedPeriods(listingId: string) {
     }
   }
 
+  // Create and delete many blocks in one request, e.g. for a drag-selection
+  const applyBlockedPeriods = async (
+    intervals: { start_datetime: string; end_datetime: string }[],
+    deleteIds: number[] = [],
+    options: { block_type?: "owner-block" | "maintenance"; reason?: string; suppressDefaultToast?: boolean } = {},
+  ) => {
+    setIsSubmitting(true)
+    try {
+      const { data, success, error } = await ApiClient.post<BulkBlockedPeriodsResult>(
+        "/api/places/blocked-periods/bulk/",
+        {
+          place_id: listingId,
+          create: intervals.map((interval) => ({
+            start_datetime: new Date(interval.start_datetime).toISOString(),
+            end_datetime: new Date(interval.end_datetime).toISOString(),
+          })),
+          delete: deleteIds,
+          block_type: options.block_type || "owner-block",
+          reason: options.reason || "",
+        },
+      )
+
+      if (success && data) {
+        setBlockedPeriods((prev) => [
+          ...prev.filter((period) => !data.deleted_block_ids.includes(period.id)),
+          ...data.created,
+        ])
+
+        if (data.conflicts.length > 0) {
+          toast({
+            title: "Information",
+            description: `${data.conflicts.length} time period(s) overlap existing bookings and were not blocked`,
+          })
+        } else if (!options.suppressDefaultToast) {
+          toast({
+            title: "Success",
+            description: "Blocked periods updated successfully",
+          })
+        }
+        return true
+      } else {
+        toast({
+          title: "Error",
+          description: error || "Failed to update blocked periods",
+          variant: "destructive",
+        })
+        return false
+      }
+    } catch (err) {
+      console.error("Error updating blocked periods:", err)
+      toast({
+        title: "Error",
+        description: "Failed to update blocked periods. Please try again later.",
+        variant: "destructive",
+      })
+      return false
+    } finally {
+      setIsSubmitting(false)
+    }
+  }
+
   useEffect(() => {
     if (listingId) {
       fetchBlockedPeriods()
@@ -225,11 +301,13 @@ export function useBlockedPeriods(listingId: string) {
 
   return {
     blockedPeriods,
+    blockedIntervals,
     isLoading,
     isSubmitting,
     deletingBlocks,
     fetchBlockedPeriods,
     addBlockedPeriod,
     removeBlockedPeriod,
+    applyBlockedPeriods,
   }
 }
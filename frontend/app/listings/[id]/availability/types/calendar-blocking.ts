@@ -1,4 +1,4 @@
-export type BlockType = "owner-block" | "maintenance" | "booking"
+export type BlockType = "owner-block" | "maintenance" | "booking" | "external"
 export type RecurringPattern = "daily" | "weekly" | "weekdays" | "weekends"
 export type CalendarView = "day" | "week" | "month"
 
@@ -20,6 +20,21 @@ export interface NewBlockedPeriod extends Omit<BlockedPeriod, "id" | "place" | "
   suppressDefaultToast?: boolean
 }
 
+// One occurrence of a block within the fetched window; recurring blocks are expanded
+export interface BlockedInterval {
+  block_id: number
+  start_datetime: string
+  end_datetime: string
+  block_type: BlockType
+}
+
+export interface BlockedPeriodsWindow {
+  start: string
+  end: string
+  intervals: BlockedInterval[]
+  blocks: BlockedPeriod[]
+}
+
 // Type for grouping blocks by day
 export interface DayBlocks {
   date: Date
@@ -32,3 +47,9 @@ export interface BlockedPeriodWithMeta extends BlockedPeriod {
   deleted_block_ids?: number[]
   message?: string
 }
+
+export interface BulkBlockedPeriodsResult {
+  created: BlockedPeriod[]
+  deleted_block_ids: number[]
+  conflicts: { start_datetime: string; end_datetime: string; message: string }[]
+}
@@ -18,6 +18,7 @@ interface ParkingSpotImage {
   image_key: string
   is_primary: boolean
   url: string
+  srcset?: { webp?: string; jpeg?: string }
   created_at: string
 }
 
@@ -176,10 +177,14 @@ export default function SearchPage() {
     setDateRange(range)
   }
 
+  // Helper function to get the primary image, falling back to the first one
+  const getPrimaryImage = (spot: ParkingSpot): ParkingSpotImage | undefined => {
+    return spot.images.find((img) => img.is_primary) || spot.images[0]
+  }
+
   // Helper function to get the primary image URL or a fallback
   const getPrimaryImageUrl = (spot: ParkingSpot): string => {
-    const primaryImage = spot.images.find((img) => img.is_primary)
-    return primaryImage?.url || spot.images[0]?.url || "/placeholder.svg?height=200&width=300"
+    return getPrimaryImage(spot)?.url || "/placeholder.svg?height=200&width=300"
   }
 
   // Helper function to format the full address
@@ -273,11 +278,23 @@ export default function SearchPage() {
                 {searchResults.map((spot) => (
                   <Card key={spot.id} className="overflow-hidden hover:shadow-lg transition-shadow">
                     <div className="aspect-video relative">
-                      <img
-                        src={getPrimaryImageUrl(spot) || "/placeholder.svg"}
-                        alt={spot.name}
-                        className="w-full h-full object-cover"
-                      />
+                      <picture>
+                        {getPrimaryImage(spot)?.srcset?.webp && (
+                          <source
+                            type="image/webp"
+                            srcSet={getPrimaryImage(spot)?.srcset?.webp}
+                            sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw"
+                          />
+                        )}
+                        <img
+                          src={getPrimaryImageUrl(spot) || "/placeholder.svg"}
+                          srcSet={getPrimaryImage(spot)?.srcset?.jpeg || undefined}
+                          sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw"
+                          alt={spot.name}
+                          className="w-full h-full object-cover"
+                          loading="lazy"
+                        />
+                      </picture>
                       <div className="absolute bottom-2 right-2 bg-black/70 text-white px-2 py-1 rounded text-sm font-medium">
                         ${Number.parseFloat(spot.price_per_hour).toFixed(2)}/hr
                       </div>
@@ -195,19 +195,8 @@ static async post<T>(
     formData.append("latitude", data.latitude)
     // Removed is_active field
 
-    // Add photos if provided
-    if (data.photos && data.photos.length > 0) {
-      // Add photo count first
-      formData.append("photo_count", String(data.photos.length))
-
-      // Then add each photo
-      data.photos.forEach((photo, index) => {
-        formData.append(`photo_${index + 1}`, photo)
-      })
-    } else {
-      // Explicitly set photo count to 0 if no photos
-      formData.append("photo_count", "0")
-    }
+    // Photos are uploaded straight to storage once the listing exists
+    formData.append("photo_count", "0")
 
     try {
       console.log("Submitting driveway listing")
@@ -239,13 +228,58 @@ static async post<T>(
         await this.handleErrorResponse(response)
       }
 
-      return response.json()
+      const listing = await response.json()
+      if (data.photos && data.photos.length > 0) {
+        listing.images = await this.uploadListingPhotos(listing.id, data.photos)
+      }
+      return listing
     } catch (error) {
       console.error("Error in listDriveway:", error)
       throw error
     }
   }
 
+  /**
+   * Upload photos for a listing straight to storage with presigned POSTs,
+   * then register them with the listing. Returns the listing's new images.
+   */
+  static async uploadListingPhotos(placeId: number, photos: File[]): Promise<any[]> {
+    const presigned = await this.post<{
+      uploads: { key: string; url: string; fields: Record<string, string> }[]
+    }>("/api/places/images/presign/", {
+      place_id: placeId,
+      method: "post",
+      files: photos.map((photo) => ({ filename: photo.name, content_type: photo.type })),
+    })
+    if (!presigned.success || !presigned.data) {
+      throw presigned.error
+    }
+
+    const uploads = presigned.data.uploads
+    await Promise.all(
+      uploads.map(async (upload, index) => {
+        const formData = new FormData()
+        Object.entries(upload.fields).forEach(([name, value]) => formData.append(name, value))
+        // The file must come after the policy fields
+        formData.append("file", photos[index])
+
+        const response = await fetch(upload.url, { method: "POST", body: formData })
+        if (!response.ok) {
+          throw new Error(`Uploading ${photos[index].name} failed with ${response.status}`)
+        }
+      }),
+    )
+
+    const confirmed = await this.post<{ images: any[] }>("/api/places/images/confirm/", {
+      place_id: placeId,
+      keys: uploads.map((upload) => upload.key),
+    })
+    if (!confirmed.success || !confirmed.data) {
+      throw confirmed.error
+    }
+    return confirmed.data.images
+  }
+
   /**
    * Update a listing
    */